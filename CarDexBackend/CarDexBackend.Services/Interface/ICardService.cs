@@ -20,7 +20,7 @@ namespace CarDexBackend.Services
         /// <param name="grade">Optional filter to return only cards of a specific grade (e.g., FACTORY, LIMITED_RUN, NISMO).</param>
         /// <param name="minValue">Optional minimum card value filter.</param>
         /// <param name="maxValue">Optional maximum card value filter.</param>
-        /// <param name="sortBy">Optional sort order (value_asc, value_desc, grade_asc, grade_desc, date_asc, date_desc).</param>
+        /// <param name="sortBy">Optional sort order (value_asc, value_desc, grade_asc, grade_desc); cards have no timestamp, so any other value orders by ID.</param>
         /// <param name="limit">The maximum number of results to return per page. Defaults to 50.</param>
         /// <param name="offset">The number of results to skip for pagination. Defaults to 0.</param>
         /// <returns>
@@ -333,7 +333,7 @@ namespace CarDexBackend.Services
                 BuyerUsername = buyer.Username,
                 BuyerCardId = completedTrade.BuyerCardId,
                 Price = completedTrade.Price,
-                ExecutedDate = DateTime.UtcNow
+                ExecutedDate = completedTrade.ExecutedDate
             };
 
             var sellerRewardResponse = new RewardResponse
@@ -401,7 +401,7 @@ namespace CarDexBackend.Services
                 BuyerUsername = buyer?.Username ?? _sr["UnknownMessage"],
                 BuyerCardId = trade.BuyerCardId,
                 Price = trade.Price,
-                ExecutedDate = DateTime.UtcNow
+                ExecutedDate = trade.ExecutedDate
             };
         }
 
@@ -432,7 +432,7 @@ namespace CarDexBackend.Services
                 BuyerUsername = userMap.ContainsKey(t.BuyerUserId) ? userMap[t.BuyerUserId] : _sr["UnknownMessage"],
                 BuyerCardId = t.BuyerCardId,
                 Price = t.Price,
-                ExecutedDate = DateTime.UtcNow
+                ExecutedDate = t.ExecutedDate
             }).ToList();
 
             return new TradeHistoryResponse
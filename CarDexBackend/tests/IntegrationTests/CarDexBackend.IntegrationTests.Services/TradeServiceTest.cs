@@ -373,6 +373,8 @@ namespace DefaultNamespace
             Assert.True(result.CompletedTrade.Price > 0); 
             Assert.Equal(seller.Id, result.CompletedTrade.SellerUserId); 
             Assert.Equal(buyer.Id, result.CompletedTrade.BuyerUserId); 
+            var stored = _context.CompletedTrades.Single(t => t.Id == result.CompletedTrade.Id);
+            Assert.Equal(stored.ExecutedDate, result.CompletedTrade.ExecutedDate);
         }
 
         // Additional tests for comprehensive coverage
@@ -1027,6 +1029,30 @@ namespace DefaultNamespace
             Assert.NotNull(result);
         }
 
+        [Fact]
+        public async Task GetCompletedTradeById_ShouldReturnStoredExecutedDate()
+        {
+            // Arrange
+            var seller = _context.Users.First();
+            var buyer = _context.Users.Skip(1).First();
+            var sellerCard = _context.Cards.First(c => c.UserId == seller.Id);
+            var executedDate = new DateTime(2024, 3, 15, 10, 30, 0, DateTimeKind.Utc);
+
+            var completedTrade = new CarDexBackend.Domain.Entities.CompletedTrade(
+                Guid.NewGuid(), TradeEnum.FOR_PRICE, seller.Id, sellerCard.Id, buyer.Id, 1000, null)
+            {
+                ExecutedDate = executedDate
+            };
+            _context.CompletedTrades.Add(completedTrade);
+            _context.SaveChanges();
+
+            // Act
+            var result = await _tradeService.GetCompletedTradeById(completedTrade.Id);
+
+            // Assert
+            Assert.Equal(executedDate, result.ExecutedDate);
+        }
+
         [Fact]
         public async Task GetTradeHistory_ShouldReturnAllTrades()
         {
@@ -1102,5 +1128,29 @@ namespace DefaultNamespace
             Assert.Equal(1, result.Offset);
             Assert.True(result.Trades.Count() <= 2);
         }
+
+        [Fact]
+        public async Task GetTradeHistory_ShouldReturnStoredExecutedDates()
+        {
+            // Arrange
+            var seller = _context.Users.First();
+            var buyer = _context.Users.Skip(1).First();
+            var sellerCard = _context.Cards.First(c => c.UserId == seller.Id);
+            var executedDate = new DateTime(2024, 3, 15, 10, 30, 0, DateTimeKind.Utc);
+
+            var trade = new CarDexBackend.Domain.Entities.CompletedTrade(
+                Guid.NewGuid(), TradeEnum.FOR_PRICE, seller.Id, sellerCard.Id, buyer.Id, 1000, null)
+            {
+                ExecutedDate = executedDate
+            };
+            _context.CompletedTrades.Add(trade);
+            _context.SaveChanges();
+
+            // Act
+            var result = await _tradeService.GetTradeHistory(null, 10, 0);
+
+            // Assert
+            Assert.Equal(executedDate, result.Trades.Single(t => t.Id == trade.Id).ExecutedDate);
+        }
     }
 }
@@ -2,28 +2,149 @@
 API Client for CarDex - Handles all server communication
 CORRECTED based on actual Swagger API specification
 """
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Iterable, Iterator, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import os
+import time
 import requests
 
+import json_codec
+from balancer import ReplicaPool, canFailOver
+from cassette import CassetteMiss
+from entity_store import CARD, COMPLETED_TRADE, TRADE, USER, EntityStore
+from json_stream import iterArrayItems
+from negative_cache import NegativeCache
+from rate_limit import AdaptiveLimiter, AIMDController, THROTTLE_STATUSES, TokenBucket, parseRetryAfter
+from resilience import CircuitBreakers, CircuitOpenError, Hedger, endpointKey
+from single_flight import SingleFlight
+from swr_cache import CacheEntry, StaleWhileRevalidateCache
+from tracing import Tracer, propagate
+
 # API Paths
 BASE_URL        = "http://localhost:8080"
 GET_HEALTHCHECK = f"{BASE_URL}/health"
 POST_LOGIN      = f"{BASE_URL}/auth/login"
+POST_REGISTER   = f"{BASE_URL}/auth/register"
 GET_OPEN_TRADES = f"{BASE_URL}/trades"
 GET_EXEC_TRADES = f"{BASE_URL}/trades/history"
 GET_COLLECTIONS = f"{BASE_URL}/collections"
 GET_CARD        = f"{BASE_URL}/cards"  # + /{cardId}
+GET_VEHICLES    = f"{BASE_URL}/cards/vehicles"
+GET_USERS       = f"{BASE_URL}/users"  # + /{userId}/...
+POST_BUY_PACK   = f"{BASE_URL}/packs/purchase"
+POST_PACKS      = f"{BASE_URL}/packs"   # + /{packId}/open
+POST_TRADES     = f"{BASE_URL}/trades"  # create, or + /{tradeId}/execute
+
+# Request tuning
+REQUEST_TIMEOUT = 10
+ENRICH_WORKERS  = 8
+STREAM_CHUNK    = 64 * 1024
+GARAGE_PAGE     = 1000  # cards per /users/{id}/cards/with-vehicles request
+ACCEPT_ENCODING = "gzip, deflate"  # requests/urllib3 decompress transparently
+
+# Retries after 429 Too Many Requests / 503 Service Unavailable
+MAX_RETRIES     = 2
+RETRY_BACKOFF   = 1.0   # seconds to wait when the server sends no Retry-After
+MAX_RETRY_AFTER = 30.0  # never pause the CLI longer than this
+
+# Catalog-type resources (collections, vehicles) are served stale-while-revalidate
+CATALOG_SOFT_TTL  = 5 * 60
+CATALOG_CACHE_FILE = "catalog_cache.json"
+
+# Background work (catalog builds) gets its own slow lane, so it never competes with commands for tokens
+BACKGROUND_RATE        = 5.0
+BACKGROUND_CONCURRENCY = 2
+
+# Server-side filters accepted by each list endpoint (query parameter names)
+OPEN_TRADE_FILTERS = ("type", "collectionId", "grade", "minPrice", "maxPrice", "vehicleId", "wantCardId", "sortBy")
+CARD_FILTERS       = ("userId", "collectionId", "vehicleId", "grade", "minValue", "maxValue", "sortBy")
 
 
 class APIClient:
     """Client for communicating with the CarDex API"""
 
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = None, tracer: Optional[Tracer] = None, cassette=None,
+                 base_urls: Optional[Sequence[str]] = None, catalog=None, throttle: bool = True):
         """
         Initialize API client with server URL
+
+        Args:
+            cache_dir: Directory to persist the catalog cache in (memory only if None)
+            tracer: Span tracer (spans are created but not exported if None)
+            cassette: CassetteRecorder to capture the session, or CassettePlayer to serve it offline
+            base_urls: API replicas to spread requests over (BASE_URL only if None)
+            catalog: CardCatalog to serve card lookups from before asking the server
+            throttle: Pace, hedge, retry and short-circuit requests client-side (False for
+                load tests, which must see the server's own behaviour)
         """
         self.connected = False
+        self.cassette = cassette
         self.access_token = None
+        self.user_id = None
+
+        # Collections and vehicles rarely change, so serve them from cache and revalidate in the background
+        cache_path = os.path.join(cache_dir, CATALOG_CACHE_FILE) if cache_dir else None
+        self.catalog_cache = StaleWhileRevalidateCache(soft_ttl=CATALOG_SOFT_TTL, path=cache_path)
+
+        # Identical GETs issued concurrently share one network call
+        self.inflight = SingleFlight()
+
+        # Every request waits for a token and a concurrency slot
+        self.limiter = AdaptiveLimiter() if throttle else None
+
+        # Slow GETs get a backup request; endpoints that keep failing are short-circuited
+        self.hedger = Hedger() if throttle else None
+        self.breakers = CircuitBreakers() if throttle else None
+
+        # Every request is a span, and its traceparent header lets the server correlate it
+        self.tracer = tracer or Tracer()
+
+        # Requests go to the fastest healthy replica when several API servers are given
+        self.replicas = ReplicaPool(base_urls) if base_urls else None
+
+        # One shared object per card, user and trade seen this session; trades reference cards, not copies
+        self.entities = EntityStore()
+
+        # Cards found in the local memory-mapped catalog are not fetched at all
+        self.catalog = catalog
+
+        # Card IDs that came back 404 are not requested again until their entry expires
+        self.missing_cards = NegativeCache()
+
+    def backgroundClient(self) -> "APIClient":
+        """
+        A client for low-priority background work, signed in as this one
+
+        It has its own small rate limit and circuit breakers and never
+        hedges, so a long scan neither takes tokens and concurrency slots
+        from the user's commands nor trips the breakers they rely on.
+        Replicas and the tracer are shared.
+
+        Returns:
+            APIClient: Background client (close it with this one)
+        """
+        client = APIClient(tracer=self.tracer, cassette=self.cassette, throttle=False)
+        client.limiter = AdaptiveLimiter(TokenBucket(rate=BACKGROUND_RATE, burst=BACKGROUND_CONCURRENCY),
+                                         AIMDController(initial=BACKGROUND_CONCURRENCY, maximum=BACKGROUND_CONCURRENCY))
+        client.breakers = CircuitBreakers()
+        client.replicas = self.replicas
+        client.connected = self.connected
+        client.access_token = self.access_token
+        client.user_id = self.user_id
+        return client
+
+    @property
+    def card_cache(self) -> Dict[str, Dict]:
+        """Card details seen this session, keyed by card ID (feeds the search index)"""
+        return self.entities.table(CARD)
+
+    def rememberUsers(self, trade: Dict):
+        """Record the users named in a trade (open or completed)"""
+        for prefix in ("", "seller", "buyer"):
+            id_key, name_key = (f"{prefix}UserId", f"{prefix}Username") if prefix else ("userId", "username")
+            if trade.get(id_key) and trade.get(name_key):
+                self.entities.put(USER, {"id": trade[id_key], "username": trade[name_key]})
 
     def connect(self) -> bool:
         """
@@ -33,9 +154,20 @@ class APIClient:
             bool: True if server is reachable, False otherwise
         """
 
-        # Perform healthcheck to see API connection
+        # Probe every replica and keep probing in the background, then perform healthcheck
+        if self.replicas is not None:
+            self.replicas.start()
         self.connected = self.healthCheck()
         return self.connected
+
+    def close(self):
+        """Stop background replica health checks, catalog syncs and hedge threads"""
+        if self.replicas is not None:
+            self.replicas.stop()
+        if self.catalog is not None:
+            self.catalog.stop()
+        if self.hedger is not None:
+            self.hedger.close()
         
     def getHeaders(self) -> Dict[str, str]:
         """
@@ -50,6 +182,318 @@ class APIClient:
         return { 
             "Authorization": f"Bearer {self.access_token}"
         }
+
+    @staticmethod
+    def buildFilterParams(filters: Dict, allowed: Iterable[str]) -> Dict:
+        """
+        Validate server-side filters and drop unset ones
+
+        Args:
+            filters: Query parameter names mapped to values (None = not set)
+            allowed: Filter names the endpoint supports
+
+        Returns:
+            Dict: Filters to send as query parameters
+
+        Raises:
+            ValueError: If a filter is not supported by the endpoint
+        """
+        unknown = set(filters) - set(allowed)
+        if unknown:
+            raise ValueError(f"Unsupported filter(s): {', '.join(sorted(unknown))}")
+
+        return {name: value for name, value in filters.items() if value is not None}
+
+    def _send(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+              stream: bool = False, method: str = "GET", body: Optional[Dict] = None,
+              authenticated: bool = True) -> requests.Response:
+        """
+        Issue one HTTP request through the client's rate limiter
+
+        Every request made by the client goes through here. The limiter caps
+        the request rate and adapts how many requests run at once to the
+        server's latency and errors. A 429/503 pauses all requests for the
+        server's Retry-After (or RETRY_BACKOFF); a GET is then retried up to
+        MAX_RETRIES times, while a POST is returned as-is, since the server
+        may already have applied it. Timeouts, connection errors and 5xx
+        responses trip the endpoint's circuit breaker, after which requests
+        to it fail fast. A client built with throttle=False skips all of this.
+
+        With several replicas, each replica has its own breaker per endpoint,
+        and a request that cannot reach one replica is sent to the next (see
+        canFailOver) before any error is raised.
+
+        Args:
+            url: Endpoint to call
+            params: Query parameters
+            headers: Extra headers (e.g. conditional request validators)
+            stream: Leave the body unread so it can be consumed in chunks; the returned response keeps
+                its limiter slot, which the caller frees with self.limiter.free() once the body is read
+            method: HTTP method (GET or POST)
+            body: JSON body for POST requests
+            authenticated: Send the bearer token (False for health and login)
+
+        Returns:
+            requests.Response: Raw response (status not checked)
+
+        Raises:
+            CircuitOpenError: If the endpoint's circuit breaker is open
+        """
+        request_headers = {
+            **(self.getHeaders() if authenticated else {}),
+            "Accept-Encoding": ACCEPT_ENCODING,
+            **(headers or {})
+        }
+        kwargs = {"headers": request_headers, "timeout": REQUEST_TIMEOUT}
+        if method == "GET":
+            kwargs.update(params=params, stream=stream)
+        else:
+            kwargs.update(json=body)
+        if self.cassette is not None:
+            send = partial(self.cassette.send, method)
+        else:
+            send = getattr(requests, method.lower())
+        endpoint = endpointKey(url)
+        # Latency is judged against earlier requests of the same kind, e.g. /cards pages of the same size
+        kind = (endpoint, (params or {}).get("limit"))
+        retries = MAX_RETRIES if method == "GET" and self.limiter is not None else 0
+        # A streamed body is read after we return, so the response keeps its limiter slot until then
+        hold = stream and self.limiter is not None
+        attempt = 0
+        failed_on = []
+        error = None
+
+        while True:
+            # Each attempt may go to a different replica; ones this attempt already failed on are skipped
+            route = self._route(url, endpoint, failed_on)
+            if route is None:
+                raise error or CircuitOpenError(f"{endpoint} is failing on every replica")
+            replica, target, breaker = route
+
+            with self.tracer.span(f"HTTP {method} {endpoint}", url=target, attempt=attempt) as span:
+                # Each attempt is its own span, so the server can match retries and hedges
+                kwargs["headers"] = {**request_headers, "traceparent": span.traceparent}
+
+                if self.limiter is not None:
+                    self.limiter.acquire()
+                start = time.monotonic()
+                try:
+                    response = send(target, **kwargs)
+                except Exception as e:
+                    # An HTTPError means the server answered and a cassette miss never reached one;
+                    # anything else counts against the endpoint
+                    overloaded = not isinstance(e, (requests.exceptions.HTTPError, CassetteMiss))
+                    self._settle(breaker, kind, time.monotonic() - start, overloaded)
+                    if replica is None:
+                        raise
+                    self.replicas.release(replica, time.monotonic() - start, failed=overloaded)
+                    if not canFailOver(e, method):
+                        raise
+                    span.setAttribute("failover", True)
+                    failed_on.append(replica)
+                    error = e
+                    continue
+
+                status = response.status_code
+                span.setAttribute("status", status if isinstance(status, int) else None)
+                server_error = isinstance(status, int) and status >= 500
+                if replica is not None:
+                    self.replicas.release(replica, time.monotonic() - start, failed=server_error)
+
+                if status not in THROTTLE_STATUSES:
+                    self._settle(breaker, kind, time.monotonic() - start, server_error, free=not hold)
+                    return response
+
+                retry_after = parseRetryAfter(response.headers.get("Retry-After"))
+                retry_after = min(retry_after if retry_after is not None else RETRY_BACKOFF, MAX_RETRY_AFTER)
+                span.setAttribute("retry_after", retry_after)
+                self._settle(breaker, kind, time.monotonic() - start, True, failed=server_error,
+                             retry_after=retry_after, free=not (hold and attempt == retries))
+                if attempt == retries:
+                    return response
+                response.close()
+                attempt += 1
+                failed_on = []
+                error = None
+
+    def _route(self, url: str, endpoint: str, exclude: List) -> Optional[Tuple]:
+        """
+        Choose where the next attempt goes
+
+        Without replicas the request goes to url, guarded by the endpoint's
+        breaker. With replicas, each replica's breaker for the endpoint is
+        checked and replicas whose breaker is open are passed over.
+
+        Returns:
+            (replica or None, url to send to, breaker or None), or None if no replica is left
+
+        Raises:
+            CircuitOpenError: If the single server's breaker for the endpoint is open
+        """
+        if self.replicas is None:
+            breaker = self.breakers.get(endpoint) if self.breakers is not None else None
+            if breaker is not None and not breaker.allow():
+                raise CircuitOpenError(f"{endpoint} is failing, not retrying for {breaker.retryIn():.0f}s")
+            return None, url, breaker
+
+        exclude = list(exclude)
+        while True:
+            replica, target = self.replicas.route(url, BASE_URL, exclude)
+            if replica is None:
+                return None
+            breaker = self.breakers.get(replica.base_url + endpoint) if self.breakers is not None else None
+            if breaker is None or breaker.allow():
+                return replica, target, breaker
+            self.replicas.cancel(replica)
+            exclude.append(replica)
+
+    def _settle(self, breaker, kind: Tuple, latency: float, overloaded: bool, failed: Optional[bool] = None,
+                retry_after: Optional[float] = None, free: bool = True):
+        """
+        Report a finished attempt to the limiter and the endpoint's circuit breaker
+
+        Args:
+            kind: (endpoint, page size) the latency is compared within
+            overloaded: The server signalled overload (throttling, 5xx, timeout) - backs the limiter off
+            failed: Counts against the breaker (default: same as overloaded)
+            retry_after: Seconds the server asked us to wait
+            free: Free the limiter slot now (False keeps it until the caller frees it)
+        """
+        if self.limiter is not None:
+            self.limiter.release(latency, overloaded=overloaded, retry_after=retry_after, key=kind, free=free)
+        if breaker is not None:
+            if overloaded if failed is None else failed:
+                breaker.recordFailure()
+            else:
+                breaker.recordSuccess()
+
+    def _get(self, url: str, params: Optional[Dict] = None):
+        """
+        Perform an authenticated GET and decode the JSON body
+
+        Concurrent calls for the same URL and query parameters are coalesced,
+        so only one request hits the server and every caller receives its
+        result (or its exception). A request slower than the endpoint's
+        recent p95 is hedged with a duplicate and the first answer wins.
+
+        Returns:
+            Decoded JSON response body
+        """
+        self.getHeaders()  # fail fast when not logged in
+        key = (url, tuple(sorted((params or {}).items())))
+
+        endpoint = endpointKey(url)
+
+        def attempt():
+            response = self._send(url, params)
+            response.raise_for_status()
+            return json_codec.decodeResponse(response)
+
+        with self.tracer.span(f"GET {endpoint}", url=url, params=dict(params or {})):
+            if self.hedger is None:
+                return self.inflight.do(key, attempt)
+            return self.inflight.do(key, lambda: self.hedger.call(endpoint, attempt))
+
+    def _post(self, url: str, body: Optional[Dict] = None):
+        """
+        Perform an authenticated POST and decode the JSON body
+
+        Writes are neither coalesced, hedged nor retried, since repeating them is not safe.
+
+        Returns:
+            Decoded JSON response body
+        """
+        with self.tracer.span(f"POST {endpointKey(url)}", url=url):
+            response = self._send(url, method="POST", body=body or {})
+            response.raise_for_status()
+            return json_codec.decodeResponse(response)
+
+    def _getCatalog(self, url: str):
+        """
+        Perform an authenticated GET for a catalog resource, stale-while-revalidate
+
+        The first call blocks; afterwards the cached body is returned at once
+        and refreshed in the background when older than CATALOG_SOFT_TTL.
+        Refreshes are conditional, so an unchanged resource costs a 304.
+
+        Returns:
+            Decoded JSON response body
+        """
+        self.getHeaders()  # fail fast when not logged in
+
+        def fetch(previous: Optional[CacheEntry]) -> CacheEntry:
+            return self.inflight.do(("catalog", url), lambda: self._fetchConditional(url, previous))
+
+        return self.catalog_cache.get(url, fetch)
+
+    def _fetchConditional(self, url: str, previous: Optional[CacheEntry]) -> CacheEntry:
+        """
+        GET a resource, revalidating a previous copy with ETag / Last-Modified when available
+
+        Returns:
+            CacheEntry: New entry (reusing the previous value on 304 Not Modified)
+        """
+        headers = {}
+        if previous is not None:
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+
+        response = self._send(url, headers=headers)
+        if previous is not None and response.status_code == 304:
+            return CacheEntry(previous.value, previous.etag, previous.last_modified)
+
+        response.raise_for_status()
+        return CacheEntry(
+            json_codec.decodeResponse(response),
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified")
+        )
+
+    def _stream(self, url: str, key: str, params: Optional[Dict] = None) -> Iterator[Dict]:
+        """
+        Perform an authenticated GET and yield items of one array as they arrive
+
+        The body is requested compressed and read in chunks, so items are
+        decoded while the rest of the page is still downloading and the full
+        body is never held in memory.
+
+        Args:
+            url: Endpoint to fetch
+            key: Array field to stream (e.g. "trades" or "cards")
+            params: Query parameters
+
+        Returns:
+            Iterator[Dict]: Decoded array items
+        """
+        response = self._send(url, params, stream=True)
+        try:
+            response.raise_for_status()
+            yield from iterArrayItems(response.iter_content(chunk_size=STREAM_CHUNK), key)
+        finally:
+            response.close()
+            if self.limiter is not None:
+                self.limiter.free()
+    
+    def _streamPages(self, url: str, key: str, params: Dict, page_size: int) -> Iterator[Dict]:
+        """
+        Stream every item of a paged list, one page request after another
+
+        Stops at the first page shorter than page_size.
+
+        Returns:
+            Iterator[Dict]: Decoded items of every page
+        """
+        offset = 0
+        while True:
+            received = 0
+            for item in self._stream(url, key, {"limit": page_size, "offset": offset, **params}):
+                received += 1
+                yield item
+            if received < page_size:
+                return
+            offset += page_size
     
     def healthCheck(self) -> bool:
         """
@@ -62,10 +506,7 @@ class APIClient:
         print("Connecting to CarDex API..................................................", end="", flush=True)
 
         try:
-            response = requests.get(
-                GET_HEALTHCHECK,
-                timeout=10
-            )
+            response = self._send(GET_HEALTHCHECK, authenticated=False)
             response.raise_for_status()
             
             print("[DONE]")
@@ -86,19 +527,23 @@ class APIClient:
             bool: True if login successful, False otherwise
         """
         try:
-            response = requests.post(
+            response = self._send(
                 POST_LOGIN,
-                json={
+                method="POST",
+                body={
                     "username": username,
                     "password": password
                 },
-                timeout=10
+                authenticated=False
             )
             response.raise_for_status()
             
             # Extract token from response
-            data = response.json()
+            data = json_codec.decodeResponse(response)
             self.access_token = data["accessToken"]
+            self.user_id = (data.get("user") or {}).get("id")
+            if self.user_id:
+                self.entities.put(USER, data["user"])
             
             return True
             
@@ -114,9 +559,48 @@ class APIClient:
 
         return False
 
-    def getCompletedTrades(self, limit: int = 5) -> List[Dict]:
+    def register(self, username: str, password: str) -> bool:
+        """
+        Create an account; the server logs the new user in straight away
+
+        Returns:
+            bool: True if the account was created, False otherwise
+        """
+        try:
+            response = self._send(
+                POST_REGISTER,
+                method="POST",
+                body={
+                    "username": username,
+                    "password": password
+                },
+                authenticated=False
+            )
+            response.raise_for_status()
+
+            data = json_codec.decodeResponse(response)
+            self.access_token = data["accessToken"]
+            self.user_id = (data.get("user") or {}).get("id")
+            if self.user_id:
+                self.entities.put(USER, data["user"])
+
+            return True
+
+        except requests.exceptions.HTTPError as e:
+
+            if(e.response.status_code == 409):
+                print(f"Username '{username}' is already taken.\n")
+
+        except requests.exceptions.RequestException as e:
+
+            print(f"Registration failed: {e}\n")
+            self.access_token = None
+
+        return False
+
+    def getCompletedTrades(self, limit: int = 5, offset: int = 0) -> List[Dict]:
         """
-        Fetch COMPLETED trades (executed transactions)
+        Fetch COMPLETED trades (executed transactions), newest first
             
         Returns:
             List[Dict]: Completed trades
@@ -125,23 +609,32 @@ class APIClient:
         # Build query parameters
         params = {
             "limit": limit,
-            "offset": 0 
+            "offset": offset
         }
         
-        response = requests.get(
-            GET_EXEC_TRADES,
-            headers=self.getHeaders(),
-            params=params,
-            timeout=10
-        )
-        response.raise_for_status()
-        
-        data = response.json()
+        data = self._get(GET_EXEC_TRADES, params)
         return data.get("trades", [])
 
-    def getOpenTrades(self, limit: int = 5) -> List[Dict]:
+    def streamCompletedTrades(self, limit: int = 50, offset: int = 0) -> Iterator[Dict]:
+        """
+        Stream COMPLETED trades one at a time from a (possibly large) history page
+
+        Returns:
+            Iterator[Dict]: Completed trades, yielded as they are received
+        """
+        params = {
+            "limit": limit,
+            "offset": offset
+        }
+        return self._stream(GET_EXEC_TRADES, "trades", params)
+
+    def getOpenTrades(self, limit: int = 5, offset: int = 0, **filters) -> List[Dict]:
         """
         Fetch OPEN trades (active marketplace listings)
+
+        Filtering and sorting are done by the server; any of OPEN_TRADE_FILTERS
+        (type, collectionId, grade, minPrice, maxPrice, vehicleId, wantCardId,
+        sortBy) may be passed as keyword arguments.
             
         Returns:
             List[Dict]: Open trades matching filters
@@ -150,55 +643,92 @@ class APIClient:
         # Build query parameters dict, to specify limit
         params = {
             "limit": limit,
-            "offset": 0,
-            "sortBy": "date_desc"
+            "offset": offset,
+            "sortBy": "date_desc",
+            **self.buildFilterParams(filters, OPEN_TRADE_FILTERS)
         }
         
-        response = requests.get(
-            GET_OPEN_TRADES,
-            headers=self.getHeaders(),
-            params=params,
-            timeout=10
-        )
-        response.raise_for_status()
-        
-        data = response.json()
+        data = self._get(GET_OPEN_TRADES, params)
         return data.get("trades", [])
 
     def getAvailablePacks(self) -> List[Dict]:
         """
         Fetch available packs that can be purchased
+
+        Served from the catalog cache after the first call.
         
         Returns:
             List[Dict]: All collections (which represent available packs)
         """
-        response = requests.get(
-            GET_COLLECTIONS,
-            headers=self.getHeaders(),
-            timeout=10
-        )
-        response.raise_for_status()
-        
-        data = response.json()
+        data = self._getCatalog(GET_COLLECTIONS)
         return data.get("collections", [])
 
     def getCollections(self) -> List[Dict]:
         """
         Fetch all collections in the game
+
+        Served from the catalog cache after the first call.
         
         Returns:
             List[Dict]: All collections
         """
-        response = requests.get(
-            GET_COLLECTIONS,
-            headers=self.getHeaders(),
-            timeout=10
-        )
-        response.raise_for_status()
-        
-        data = response.json()
+        data = self._getCatalog(GET_COLLECTIONS)
         return data.get("collections", [])
     
+    def getCards(self, limit: int = 50, offset: int = 0, **filters) -> List[Dict]:
+        """
+        Fetch a page of cards
+
+        Filtering and sorting are done by the server; any of CARD_FILTERS
+        (userId, collectionId, vehicleId, grade, minValue, maxValue, sortBy)
+        may be passed as keyword arguments.
+
+        Returns:
+            List[Dict]: Cards matching filters
+        """
+        params = {
+            "limit": limit,
+            "offset": offset,
+            **self.buildFilterParams(filters, CARD_FILTERS)
+        }
+
+        data = self._get(GET_CARD, params)
+        return data.get("cards", [])
+
+    def countCards(self, **filters) -> int:
+        """
+        Count the cards matching server-side filters without fetching them
+
+        Accepts the same filters as getCards.
+
+        Returns:
+            int: The server's total for the query
+        """
+        params = {
+            "limit": 1,
+            "offset": 0,
+            **self.buildFilterParams(filters, CARD_FILTERS)
+        }
+
+        data = self._get(GET_CARD, params)
+        return data.get("total", 0)
+
+    def streamCards(self, limit: int = 50, offset: int = 0, **filters) -> Iterator[Dict]:
+        """
+        Stream cards one at a time from a (possibly large) /cards page
+
+        Accepts the same server-side filters as getCards.
+
+        Returns:
+            Iterator[Dict]: Cards, yielded as they are received
+        """
+        params = {
+            "limit": limit,
+            "offset": offset,
+            **self.buildFilterParams(filters, CARD_FILTERS)
+        }
+        return self._stream(GET_CARD, "cards", params)
+
     def getCard(self, card_id: str) -> Optional[Dict]:
         """
         Fetch detailed information about a specific card
@@ -208,83 +738,289 @@ class APIClient:
             
         Returns:
             Dict: Card details including name, grade, value, vehicleId, etc.
-                  Returns None if card not found
+                  Returns None if card not found (known-missing cards are not requested again)
         """
+        if self.catalog is not None:
+            card = self.catalog.lookup(card_id)
+            if card is not None:
+                self.missing_cards.discard(card_id)
+                return self.entities.put(CARD, card)
+        if card_id in self.missing_cards:
+            return None
         try:
-            response = requests.get(
-                f"{GET_CARD}/{card_id}",
-                headers=self.getHeaders(),
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
+            card = self._get(f"{GET_CARD}/{card_id}")
+            self.missing_cards.discard(card_id)
+            return self.entities.put(CARD, card, card_id)
             
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 404:
+                self.entities.invalidate(CARD, card_id)
+                self.missing_cards.add(card_id)
+                return None
+            raise
+
+    def getCardOwner(self, card_id: str) -> Optional[str]:
+        """
+        Fetch who owns a card now (always from the server; the local catalog has no owners)
+
+        Returns:
+            str: Owner's user ID, or None if the card does not exist
+        """
+        try:
+            return self._get(f"{GET_CARD}/{card_id}").get("ownerId") or None
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
                 return None
             raise
 
-    def getOpenTradesWithDetails(self, limit: int = 5) -> List[Dict]:
+    def getVehicles(self) -> List[Dict]:
+        """
+        Fetch all vehicles in the game
+
+        Served from the catalog cache after the first call.
+
+        Returns:
+            List[Dict]: Vehicles with id, year, make, model, stats and value
+        """
+        data = self._getCatalog(GET_VEHICLES)
+        return data.get("vehicles", [])
+
+    def getUserCards(self, user_id: Optional[str] = None, limit: int = 50, offset: int = 0,
+                     collection_id: Optional[str] = None, grade: Optional[str] = None) -> List[Dict]:
+        """
+        Fetch a page of a user's cards (the logged-in user by default)
+
+        Returns:
+            List[Dict]: Cards with id, vehicleId, collectionId, grade and value
+        """
+        params = {
+            "limit": limit,
+            "offset": offset,
+            **self.buildFilterParams({"collectionId": collection_id, "grade": grade}, ("collectionId", "grade"))
+        }
+        data = self._get(f"{GET_USERS}/{user_id or self.user_id}/cards", params)
+        return data.get("cards", [])
+
+    def streamUserCardsWithVehicles(self, user_id: Optional[str] = None, collection_id: Optional[str] = None,
+                                    grade: Optional[str] = None, page_size: int = GARAGE_PAGE) -> Iterator[Dict]:
+        """
+        Stream every card a user owns (the logged-in user by default), with vehicle details joined
+
+        Pages of page_size cards are requested one after another and each is
+        decoded as it downloads, so even a huge inventory takes a handful of
+        requests and rows can be shown before the first page has finished.
+
+        Returns:
+            Iterator[Dict]: Cards with id, vehicleId, collectionId, grade, value,
+                year, make, model, stat1-3 and image
+        """
+        url = f"{GET_USERS}/{user_id or self.user_id}/cards/with-vehicles"
+        filters = self.buildFilterParams({"collectionId": collection_id, "grade": grade}, ("collectionId", "grade"))
+        return self._streamPages(url, "cards", filters, page_size)
+
+    def streamUserCards(self, user_id: Optional[str] = None, page_size: int = GARAGE_PAGE) -> Iterator[Dict]:
+        """
+        Stream every card a user owns (the logged-in user by default), page after page
+
+        Returns:
+            Iterator[Dict]: Cards with id, vehicleId, collectionId, grade and value
+        """
+        return self._streamPages(f"{GET_USERS}/{user_id or self.user_id}/cards", "cards", {}, page_size)
+
+    def getCollectionProgress(self, user_id: Optional[str] = None) -> List[Dict]:
+        """
+        Fetch how many of each collection's vehicles a user owns (the logged-in user by default)
+
+        Only collections the user has at least one card from are listed.
+
+        Returns:
+            List[Dict]: collectionId, collectionName, ownedVehicles, totalVehicles, percentage
+        """
+        data = self._get(f"{GET_USERS}/{user_id or self.user_id}/collection-progress")
+        return data.get("collections", [])
+
+    def purchasePack(self, collection_id: str) -> Dict:
+        """
+        Buy an unopened pack from a collection
+
+        Returns:
+            Dict: The new pack (under 'pack') and the user's remaining currency
+        """
+        return self._post(POST_BUY_PACK, {"collectionId": collection_id})
+
+    def openPack(self, pack_id: str) -> Dict:
+        """
+        Open a pack the user owns
+
+        Returns:
+            Dict: The cards pulled (under 'cards', with full details) and the pack
+        """
+        return self._post(f"{POST_PACKS}/{pack_id}/open")
+
+    def createTrade(self, card_id: str, price: Optional[int] = None, want_card_id: Optional[str] = None) -> Dict:
+        """
+        List a card on the market, for a price or in exchange for another card
+
+        Returns:
+            Dict: The new open trade
+        """
+        body = {"type": "FOR_CARD" if want_card_id else "FOR_PRICE", "cardId": card_id}
+        if want_card_id:
+            body["wantCardId"] = want_card_id
+        else:
+            body["price"] = price
+        return self.entities.put(TRADE, self._post(POST_TRADES, body))
+
+    def executeTrade(self, trade_id: str, buyer_card_id: Optional[str] = None) -> Dict:
+        """
+        Accept an open trade (buyer_card_id is required for card-for-card trades)
+
+        Returns:
+            Dict: completed_trade plus seller_reward and buyer_reward
+        """
+        body = {"buyerCardId": buyer_card_id} if buyer_card_id else {}
+        result = self._post(f"{POST_TRADES}/{trade_id}/execute", body)
+
+        # The listing is gone and both cards changed hands (so they certainly exist)
+        trade = self.entities.get(TRADE, trade_id) or {}
+        for card_id in (trade.get("cardId"), buyer_card_id):
+            if card_id:
+                self.entities.invalidate(CARD, card_id)
+                self.missing_cards.discard(card_id)
+        self.entities.invalidate(TRADE, trade_id)
+        return result
+
+    def getOpenTradesForVehicles(self, vehicle_ids: Iterable[str], limit: int = 3) -> Dict[str, List[Dict]]:
+        """
+        Fetch the latest open listings for several vehicles concurrently
+
+        Returns:
+            Dict[str, List[Dict]]: Open trades keyed by vehicle ID
+        """
+        vehicle_ids = list(dict.fromkeys(vehicle_ids))
+        if not vehicle_ids:
+            return {}
+
+        with self.tracer.span("getOpenTradesForVehicles", count=len(vehicle_ids)), \
+                ThreadPoolExecutor(max_workers=min(ENRICH_WORKERS, len(vehicle_ids))) as pool:
+            fetch = propagate(lambda vehicle_id: self.getOpenTrades(limit, vehicleId=vehicle_id))
+            return dict(zip(vehicle_ids, pool.map(fetch, vehicle_ids)))
+
+    def getCardsById(self, card_ids: Iterable[str], checkpoint: Optional[Callable[[], None]] = None) -> Dict[str, Dict]:
+        """
+        Fetch several cards concurrently
+
+        Duplicate IDs are fetched once, and IDs already being fetched by
+        another caller are coalesced by the single-flight layer. Cards in the
+        local catalog are served from it without a request.
+
+        Args:
+            card_ids: Cards to fetch
+            checkpoint: Called before each request; raise from it to abandon the remaining fetches
+
+        Returns:
+            Dict[str, Dict]: Card details keyed by card ID (missing cards omitted)
+        """
+        unique_ids = list(dict.fromkeys(card_id for card_id in card_ids if card_id))
+        found = {}
+        if self.catalog is not None:
+            for card_id in unique_ids:
+                card = self.catalog.lookup(card_id)
+                if card is not None:
+                    self.missing_cards.discard(card_id)
+                    found[card_id] = self.entities.put(CARD, card)
+            unique_ids = [card_id for card_id in unique_ids if card_id not in found]
+        if not unique_ids:
+            return found
+
+        def fetch(card_id: str) -> Optional[Dict]:
+            if checkpoint is not None:
+                checkpoint()
+            return self.getCard(card_id)
+
+        with self.tracer.span("getCardsById", count=len(unique_ids), local=len(found)), \
+                ThreadPoolExecutor(max_workers=min(ENRICH_WORKERS, len(unique_ids))) as pool:
+            cards = pool.map(propagate(fetch), unique_ids)
+            found.update((card_id, card) for card_id, card in zip(unique_ids, cards) if card)
+            return found
+
+    def getOpenTradesWithDetails(self, limit: int = 5, checkpoint: Optional[Callable[[], None]] = None,
+                                 **filters) -> List[Dict]:
         """
         Fetch OPEN trades with full card details merged in
         
         This function:
-        1. Fetches open trades
-        2. For each trade, fetches the associated card details
+        1. Fetches open trades (server-side filtered, see getOpenTrades)
+        2. Fetches the associated card details concurrently
         3. Merges card info into the trade object
+
+        Args:
+            checkpoint: Called between requests; raise from it to abandon the fetch (see getCardsById)
         
         Returns:
             List[Dict]: Open trades with card details included
-                Each trade will have a 'cardDetails' key with full card info
+                Each trade will have a 'cardDetails' key referencing the shared card entity
         """
-        trades = self.getOpenTrades(limit)
+        with self.tracer.span("getOpenTradesWithDetails", limit=limit):
+            trades = self.entities.putMany(TRADE, self.getOpenTrades(limit, **filters))
+
+            # Fetch offered cards, and wanted cards for card-for-card trades
+            cards = self.getCardsById(
+                (card_id
+                 for trade in trades
+                 for card_id in (trade.get("cardId"), trade.get("wantCardId"))),
+                checkpoint
+            )
         
-        # Enrich each trade with card details
+        # Point each trade at the shared card entities
         for trade in trades:
-            card_id = trade.get("cardId")
-            if card_id:
-                card_details = self.getCard(card_id)
-                if card_details:
-                    trade["cardDetails"] = card_details
-                    
-            # Also fetch wantCard details if it's a card-for-card trade
-            want_card_id = trade.get("wantCardId")
-            if want_card_id:
-                want_card_details = self.getCard(want_card_id)
-                if want_card_details:
-                    trade["wantCardDetails"] = want_card_details
+            self.rememberUsers(trade)
+            card_details = cards.get(trade.get("cardId"))
+            if card_details:
+                trade["cardDetails"] = card_details
+
+            want_card_details = cards.get(trade.get("wantCardId"))
+            if want_card_details:
+                trade["wantCardDetails"] = want_card_details
                     
         return trades
 
-    def getCompletedTradesWithDetails(self, limit: int = 5) -> List[Dict]:
+    def getCompletedTradesWithDetails(self, limit: int = 5, checkpoint: Optional[Callable[[], None]] = None) -> List[Dict]:
         """
         Fetch COMPLETED trades with full card details for both parties
         
         This function:
         1. Fetches completed trades
-        2. For each trade, fetches both seller's and buyer's card details
+        2. Fetches both seller's and buyer's card details concurrently
         3. Merges card info into the trade object
+
+        Args:
+            checkpoint: Called between requests; raise from it to abandon the fetch (see getCardsById)
         
         Returns:
             List[Dict]: Completed trades with card details included
                 Each trade will have 'sellerCardDetails' and optionally 'buyerCardDetails'
         """
-        trades = self.getCompletedTrades(limit)
+        with self.tracer.span("getCompletedTradesWithDetails", limit=limit):
+            trades = self.entities.putMany(COMPLETED_TRADE, self.getCompletedTrades(limit))
+
+            # Fetch seller cards, and buyer cards for card-for-card trades
+            cards = self.getCardsById(
+                (card_id
+                 for trade in trades
+                 for card_id in (trade.get("sellerCardId"), trade.get("buyerCardId"))),
+                checkpoint
+            )
         
-        # Enrich each trade with card details from both parties
+        # Point each trade at the shared card entities of both parties
         for trade in trades:
-            # Get seller's card details
-            seller_card_id = trade.get("sellerCardId")
-            if seller_card_id:
-                seller_card = self.getCard(seller_card_id)
-                if seller_card:
-                    trade["sellerCardDetails"] = seller_card
-            
-            # Get buyer's card details (if card-for-card trade)
-            buyer_card_id = trade.get("buyerCardId")
-            if buyer_card_id:
-                buyer_card = self.getCard(buyer_card_id)
-                if buyer_card:
-                    trade["buyerCardDetails"] = buyer_card
+            self.rememberUsers(trade)
+            seller_card = cards.get(trade.get("sellerCardId"))
+            if seller_card:
+                trade["sellerCardDetails"] = seller_card
+
+            buyer_card = cards.get(trade.get("buyerCardId"))
+            if buyer_card:
+                trade["buyerCardDetails"] = buyer_card
                     
-        return trades
\ No newline at end of file
+        return trades
@@ -0,0 +1,277 @@
+"""
+Ownership and trade-ledger audit for CarDex CLI
+Cross-checks completed trades against who holds each card now, one partition at a time
+"""
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import json_codec
+from trade_sync import TradeHistory, parseTimestamp
+
+# Card IDs are hashed into this many spill files; one file is checked in memory at a time per worker
+PARTITIONS = 64
+# Threads fetching users' cards, and processes checking partitions (None = one per CPU)
+FETCH_WORKERS = 8
+CHECK_WORKERS = None
+# Findings listed per kind in the report (every finding is counted)
+SAMPLES_PER_KIND = 10
+# Threads looking up the owner of cards no trader holds
+OWNER_WORKERS = 8
+
+# Finding kinds
+DOUBLE_SALE = "double_sale"          # a trade gave away a card its seller no longer held
+WRONG_OWNER = "wrong_owner"          # held by someone other than the last user to receive it
+MISSING = "missing"                  # its last recipient does not hold it, and the server names no owner
+MULTIPLE_OWNERS = "multiple_owners"  # listed in more than one user's cards
+
+KINDS = (DOUBLE_SALE, WRONG_OWNER, MISSING, MULTIPLE_OWNERS)
+
+# Spill record tags
+TRANSFER = "t"
+OWNER = "o"
+CHANGED = "c"
+
+
+def transfers(trade: Dict) -> List[Tuple[str, str, str]]:
+    """
+    Card movements of one completed trade
+
+    The seller's card goes to the buyer; in a FOR_CARD trade the buyer's card
+    goes to the seller.
+
+    Returns:
+        List of (card ID, from user, to user)
+    """
+    moves = [(trade["sellerCardId"], trade.get("sellerUserId"), trade.get("buyerUserId"))]
+    if trade.get("buyerCardId"):
+        moves.append((trade["buyerCardId"], trade.get("buyerUserId"), trade.get("sellerUserId")))
+    return moves
+
+
+class PartitionWriter:
+    """Appends records to one of `partitions` spill files chosen by card ID"""
+
+    def __init__(self, directory: str, partitions: int = PARTITIONS):
+        self.paths = [os.path.join(directory, f"part-{index:04d}.jsonl") for index in range(partitions)]
+        self._files = [open(path, "ab") for path in self.paths]
+        self._lock = threading.Lock()
+
+    def write(self, record: list):
+        line = json_codec.dumps(record) + b"\n"
+        index = zlib.crc32(record[1].encode()) % len(self._files)
+        with self._lock:
+            self._files[index].write(line)
+
+    def close(self):
+        for f in self._files:
+            f.close()
+
+
+def auditPartition(path: str, samples: int = SAMPLES_PER_KIND) -> Dict:
+    """
+    Check every card whose records landed in one spill file
+
+    For each card the transfers are replayed in execution order: each one
+    must start from the user the previous one ended at, and the user who
+    holds the card now must be the last one to have received it. Cards
+    traded while the audit was fetching ownership are only checked for
+    double sales. Cards no trader holds are returned as `unheld` rather than
+    flagged, since only traders' cards were read: their owner is looked up
+    afterwards.
+
+    Returns:
+        Dict: cards and transfers checked, counts per finding kind, up to `samples` findings per kind,
+            and (card ID, last trade ID, last recipient) of every card no trader holds
+    """
+    moves = defaultdict(list)
+    owners = defaultdict(set)
+    changed = set()
+    with open(path, "rb") as f:
+        for line in f:
+            record = json_codec.loads(line)
+            if record[0] == TRANSFER:
+                moves[record[1]].append(record[2:])
+            elif record[0] == OWNER:
+                owners[record[1]].add(record[2])
+            else:
+                changed.add(record[1])
+
+    counts = Counter()
+    findings = []
+    unheld = []
+
+    def flag(kind: str, card_id: str, trade_id: Optional[str], detail: str):
+        counts[kind] += 1
+        if counts[kind] <= samples:
+            findings.append({"kind": kind, "cardId": card_id, "tradeId": trade_id, "detail": detail})
+
+    for card_id in moves.keys() | owners.keys():
+        history = sorted(moves.get(card_id, ()), key=lambda move: (move[0], move[1]))
+        for previous, current in zip(history, history[1:]):
+            if current[3] != previous[4]:
+                flag(DOUBLE_SALE, card_id, current[2],
+                     f"sold by {current[3]} after trade {previous[2]} gave it to {previous[4]}")
+
+        if card_id in changed:
+            continue
+        holders = owners.get(card_id, set())
+        if len(holders) > 1:
+            flag(MULTIPLE_OWNERS, card_id, None, f"held by {', '.join(sorted(holders))}")
+        elif history and holders and history[-1][4] not in holders:
+            flag(WRONG_OWNER, card_id, history[-1][2],
+                 f"held by {next(iter(holders))}, last received by {history[-1][4]}")
+        elif history and not holders:
+            unheld.append((card_id, history[-1][2], history[-1][4]))
+
+    return {"cards": len(moves.keys() | owners.keys()), "transfers": sum(map(len, moves.values())),
+            "counts": counts, "findings": findings, "unheld": unheld}
+
+
+def resolveUnheld(api_client, unheld: List[Tuple[str, str, str]], workers: int = OWNER_WORKERS) -> List[Dict]:
+    """
+    Classify cards that no trader holds by asking the server who owns each one
+
+    A card held by a user who never traded is not in any card list the audit
+    read, so it is WRONG_OWNER rather than MISSING. One owner per card is
+    all the server keeps, so a card cannot be listed under a non-trader as
+    well as a trader.
+
+    Returns:
+        List[Dict]: A finding per card owned by someone other than its last recipient, or by nobody
+    """
+    if not unheld:
+        return []
+    with ThreadPoolExecutor(max_workers=min(workers, len(unheld)), thread_name_prefix="cardex-audit") as pool:
+        owners = list(pool.map(api_client.getCardOwner, [card_id for card_id, _, _ in unheld]))
+
+    findings = []
+    for (card_id, trade_id, recipient), owner in zip(unheld, owners):
+        if owner == recipient:
+            continue  # the recipient's card list was read while the card was moving
+        if owner:
+            findings.append({"kind": WRONG_OWNER, "cardId": card_id, "tradeId": trade_id,
+                             "detail": f"held by {owner} (no trades), last received by {recipient}"})
+        else:
+            findings.append({"kind": MISSING, "cardId": card_id, "tradeId": trade_id,
+                             "detail": f"not held by its last recipient {recipient}, or by anyone"})
+    return findings
+
+
+def spawnPool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Process pool whose workers start as fresh interpreters
+
+    The CLI has live threads (prefetcher, catalog sync, replica checks), and
+    a forked child can inherit a lock one of them held and wait on it forever.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def spillTrades(history: TradeHistory, writer: PartitionWriter, end: int) -> Tuple[int, Set[str]]:
+    """
+    Write a transfer record for every card movement in the local history log
+
+    Returns:
+        (trades read, IDs of every user who took part in a trade)
+    """
+    users = set()
+    count = 0
+    for sequence, trade in enumerate(history.iterate(end=end)):
+        if not trade.get("sellerCardId") or not trade.get("executedDate"):
+            continue
+        timestamp = parseTimestamp(trade["executedDate"])
+        for card_id, giver, receiver in transfers(trade):
+            writer.write([TRANSFER, card_id, timestamp, sequence, trade.get("id"), giver, receiver])
+        users.update(user for user in (trade.get("sellerUserId"), trade.get("buyerUserId")) if user)
+        count += 1
+    return count, users
+
+
+def spillOwners(api_client, users: Iterable[str], writer: PartitionWriter, workers: int = FETCH_WORKERS) -> int:
+    """
+    Write an ownership record for every card each user holds now
+
+    Users' card lists are streamed page by page on a thread pool.
+
+    Returns:
+        int: Ownership records written
+    """
+    def fetch(user_id: str) -> int:
+        held = 0
+        for card in api_client.streamUserCards(user_id):
+            writer.write([OWNER, card["id"], user_id])
+            held += 1
+        return held
+
+    users = sorted(users)
+    if not users:
+        return 0
+    with ThreadPoolExecutor(max_workers=min(workers, len(users)), thread_name_prefix="cardex-audit") as pool:
+        return sum(pool.map(fetch, users))
+
+
+def runAudit(api_client, history: TradeHistory, partitions: int = PARTITIONS, fetch_workers: int = FETCH_WORKERS,
+             check_workers: Optional[int] = CHECK_WORKERS, executor=spawnPool,
+             directory: Optional[str] = None) -> Dict:
+    """
+    Audit the completed trade history against current card ownership
+
+    1. Sync the local trade history and spill every card movement, hashed
+       by card ID into `partitions` files.
+    2. Stream the cards of every user who took part in a trade into the same
+       partitions.
+    3. Sync again; cards traded in the meantime are marked so their
+       ownership is not compared against a snapshot that raced the trade.
+    4. Check the partitions in parallel, each one holding only its own
+       cards in memory.
+    5. Ask the server who owns each card that no trader holds.
+
+    Returns:
+        Dict: Totals, counts per finding kind, sample findings and stage timings
+    """
+    report = {"partitions": partitions, "timings": {}}
+    with tempfile.TemporaryDirectory(prefix="cardex-audit-", dir=directory) as spill_dir:
+        writer = PartitionWriter(spill_dir, partitions)
+        try:
+            start = time.monotonic()
+            history.sync(api_client)
+            report["trades"], users = spillTrades(history, writer, history.size())
+            report["users"] = len(users)
+            report["timings"]["trades"] = time.monotonic() - start
+
+            start = time.monotonic()
+            report["owned"] = spillOwners(api_client, users, writer, fetch_workers)
+            for trade in history.sync(api_client):
+                for card_id, _, _ in transfers(trade):
+                    writer.write([CHANGED, card_id])
+            report["timings"]["ownership"] = time.monotonic() - start
+        finally:
+            writer.close()
+
+        start = time.monotonic()
+        with executor(max_workers=check_workers) as pool:
+            results = list(pool.map(auditPartition, writer.paths))
+        report["timings"]["check"] = time.monotonic() - start
+
+    start = time.monotonic()
+    resolved = resolveUnheld(api_client, [entry for result in results for entry in result["unheld"]], fetch_workers)
+    report["timings"]["ownership"] += time.monotonic() - start
+
+    counts = Counter(finding["kind"] for finding in resolved)
+    report["findings"] = list(resolved)
+    for result in results:
+        counts.update(result["counts"])
+        report["findings"].extend(result["findings"])
+    report["counts"] = {kind: counts[kind] for kind in KINDS}
+    report["cards"] = sum(result["cards"] for result in results)
+    report["transfers"] = sum(result["transfers"] for result in results)
+    report["findings"] = [finding for kind in KINDS
+                          for finding in [f for f in report["findings"] if f["kind"] == kind][:SAMPLES_PER_KIND]]
+    return report
@@ -0,0 +1,182 @@
+"""
+Client-side load balancing for CarDex CLI
+Spreads requests over several API replicas, favouring the fastest healthy ones
+"""
+import random
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+# Weight of the newest latency sample in each replica's moving average
+EWMA_ALPHA = 0.3
+# Seconds between background /health probes, and how long each may take
+HEALTH_INTERVAL = 5.0
+HEALTH_TIMEOUT = 2.0
+# Consecutive failed requests that take a replica out of rotation until its next good probe
+FAILURE_LIMIT = 3
+
+
+def canFailOver(error: Exception, method: str) -> bool:
+    """
+    Whether a request that failed on one replica may be sent to another
+
+    GETs move on after any connection error or timeout. Writes only move on
+    when no connection was made, since a replica that timed out may already
+    have applied the write.
+    """
+    if not isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return False
+    if method == "GET" or isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class Replica:
+    """One API server and what the client has observed of it"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.ewma: Optional[float] = None
+        self.inflight = 0
+        self.healthy = True
+        self.failures = 0
+        self.requests = 0
+
+    def score(self) -> float:
+        """Expected wait: average latency scaled by requests already queued on it"""
+        return (self.ewma or 0.0) * (self.inflight + 1)
+
+
+class ReplicaPool:
+    """
+    Routes each request to one of several replicas
+
+    Two healthy replicas are sampled at random and the one with the lower
+    score (EWMA latency x (in-flight + 1)) wins - the "power of two choices",
+    which avoids the herd behaviour of always picking the single fastest
+    node while still steering clear of slow ones. Replicas with no samples
+    score 0, so new or recovered replicas are tried straight away.
+
+    A background thread probes every replica's /health endpoint; failed
+    probes, or FAILURE_LIMIT failed requests in a row, take a replica out of
+    rotation until a probe succeeds. If every replica is down, all of them
+    are tried rather than none.
+    """
+
+    def __init__(self, base_urls: Sequence[str], health_path: str = "/health",
+                 interval: float = HEALTH_INTERVAL, rng: Optional[random.Random] = None,
+                 probe: Optional[Callable[[str], requests.Response]] = None):
+        if not base_urls:
+            raise ValueError("At least one API URL is required")
+        self.replicas = [Replica(url) for url in base_urls]
+        self.health_path = health_path
+        self.interval = interval
+        self.rng = rng or random.Random()
+        self.probe = probe or (lambda url: requests.get(url, timeout=HEALTH_TIMEOUT))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self):
+        return len(self.replicas)
+
+    def healthy(self) -> List[Replica]:
+        with self._lock:
+            return [replica for replica in self.replicas if replica.healthy]
+
+    def choose(self, exclude: Sequence[Replica] = ()) -> Optional[Replica]:
+        """
+        Pick a replica for the next request and count it as in flight
+
+        Args:
+            exclude: Replicas not to use (e.g. ones this request already failed on)
+
+        Returns:
+            Replica, or None if every replica is excluded
+        """
+        with self._lock:
+            allowed = [replica for replica in self.replicas if replica not in exclude]
+            candidates = [replica for replica in allowed if replica.healthy] or allowed
+            if not candidates:
+                return None
+            if len(candidates) == 1:
+                chosen = candidates[0]
+            else:
+                first, second = self.rng.sample(candidates, 2)
+                chosen = first if first.score() <= second.score() else second
+            chosen.inflight += 1
+            chosen.requests += 1
+            return chosen
+
+    def route(self, url: str, base_url: str, exclude: Sequence[Replica] = ()) -> Tuple[Optional[Replica], str]:
+        """
+        Rewrite a URL built on base_url to point at the chosen replica
+
+        Returns:
+            (replica, url): pass the replica back to release() when the request ends;
+                replica is None if every replica is excluded
+        """
+        replica = self.choose(exclude)
+        if replica is not None and url.startswith(base_url):
+            url = replica.base_url + url[len(base_url):]
+        return replica, url
+
+    def observe(self, replica: Replica, latency: float):
+        """Fold a latency sample into the replica's moving average"""
+        replica.ewma = latency if replica.ewma is None else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * replica.ewma
+
+    def cancel(self, replica: Replica):
+        """Return a chosen replica unused (nothing was sent to it)"""
+        with self._lock:
+            replica.inflight = max(0, replica.inflight - 1)
+            replica.requests -= 1
+
+    def release(self, replica: Replica, latency: float, failed: bool = False):
+        """Record the outcome of a request routed to replica"""
+        with self._lock:
+            replica.inflight = max(0, replica.inflight - 1)
+            if failed:
+                replica.failures += 1
+                if replica.failures >= FAILURE_LIMIT:
+                    replica.healthy = False
+            else:
+                replica.failures = 0
+                self.observe(replica, latency)
+
+    def checkAll(self):
+        """Probe every replica's health endpoint once"""
+        for replica in self.replicas:
+            start = time.monotonic()
+            try:
+                response = self.probe(replica.base_url + self.health_path)
+                healthy = response.status_code < 500
+            except requests.exceptions.RequestException:
+                healthy = False
+            latency = time.monotonic() - start
+            with self._lock:
+                replica.healthy = healthy
+                if healthy:
+                    replica.failures = 0
+                    self.observe(replica, latency)
+
+    def start(self):
+        """Probe all replicas now, then keep probing in the background"""
+        self.checkAll()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cardex-health", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.checkAll()
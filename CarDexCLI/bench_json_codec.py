@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the JSON codec layer
+Compares every installed codec on representative /trades/history and /cards pages
+
+Usage:
+    python bench_json_codec.py                      # synthetic pages
+    python bench_json_codec.py --rows 5000          # bigger pages
+    python bench_json_codec.py --live               # real pages, plus decode share of request latency
+"""
+import argparse
+import getpass
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+import requests
+
+import json_codec
+from api_client import APIClient, GET_CARD, GET_EXEC_TRADES, REQUEST_TIMEOUT
+
+GRADES = ["FACTORY", "LIMITED_RUN", "NISMO"]
+VEHICLES = ["1999 Nissan Skyline GT-R", "1993 Mazda RX-7 FD", "2002 Acura NSX", "2019 Subaru WRX STI", "1998 Toyota Supra"]
+
+
+def makeTradeHistoryPage(rows: int) -> bytes:
+    """Build a /trades/history page shaped like TradeHistoryResponse"""
+    now = datetime(2025, 1, 1)
+    trades = []
+    for i in range(rows):
+        for_card = random.random() < 0.3
+        trades.append({
+            "id": str(uuid.uuid4()),
+            "type": "FOR_CARD" if for_card else "FOR_PRICE",
+            "sellerUserId": str(uuid.uuid4()),
+            "sellerUsername": f"seller{i % 97}",
+            "sellerCardId": str(uuid.uuid4()),
+            "buyerUserId": str(uuid.uuid4()),
+            "buyerUsername": f"buyer{i % 89}",
+            "buyerCardId": str(uuid.uuid4()) if for_card else None,
+            "price": 0 if for_card else random.randint(100, 50000),
+            "executedDate": (now - timedelta(minutes=i)).isoformat() + "Z"
+        })
+    return json.dumps({"trades": trades, "total": rows, "limit": rows, "offset": 0}).encode("utf-8")
+
+
+def makeCardsPage(rows: int) -> bytes:
+    """Build a /cards page shaped like CardListResponse"""
+    cards = [{
+        "id": str(uuid.uuid4()),
+        "name": random.choice(VEHICLES),
+        "grade": random.choice(GRADES),
+        "value": random.randint(100, 50000),
+        "createdAt": "2025-01-01T00:00:00Z",
+        "imageUrl": f"https://cdn.example/cards/{i}.png"
+    } for i in range(rows)]
+    return json.dumps({"cards": cards, "total": rows, "limit": rows, "offset": 0}).encode("utf-8")
+
+
+def bestOf(fn: Callable[[], object], repeat: int) -> float:
+    """Best wall time of fn over several runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchDecode(pages: Dict[str, bytes], repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Time every available codec on every page
+
+    Returns:
+        Dict: {page name: {codec name: seconds per decode}}
+    """
+    results = {}
+    for name, body in pages.items():
+        results[name] = {codec.name: bestOf(lambda: codec.loads(body), repeat) for codec in json_codec.availableCodecs()}
+    return results
+
+
+def fetchLivePages(rows: int) -> Dict[str, tuple]:
+    """
+    Log in and download real pages
+
+    Returns:
+        Dict: {page name: (raw body, seconds spent on the network)}
+    """
+    client = APIClient()
+    if not client.connect():
+        raise SystemExit(1)
+
+    username = os.environ.get("CARDEX_USERNAME") or input("[Username]: ")
+    password = os.environ.get("CARDEX_PASSWORD") or getpass.getpass("[Password]: ")
+    if not client.login(username, password):
+        raise SystemExit(1)
+
+    pages = {}
+    for name, url in (("/trades/history", GET_EXEC_TRADES), ("/cards", GET_CARD)):
+        start = time.perf_counter()
+        response = requests.get(url, headers=client.getHeaders(), params={"limit": rows, "offset": 0}, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        body = response.content
+        pages[name] = (body, time.perf_counter() - start)
+    return pages
+
+
+def printReport(results: Dict[str, Dict[str, float]], sizes: Dict[str, int], network: Dict[str, float]):
+    """Print a table of decode times, throughput and (for live runs) decode share"""
+    print("\n" + "=" * 80)
+    print(f"JSON DECODE BENCHMARK - active codec: {json_codec.CODEC.name}".center(80))
+    print("=" * 80)
+
+    for page, timings in results.items():
+        size_mb = sizes[page] / (1024 * 1024)
+        baseline = timings.get("json")
+        print(f"\n{page}  ({sizes[page]:,} bytes)")
+        print("-" * 80)
+        for codec_name, seconds in timings.items():
+            line = f"  {codec_name:<8} {seconds * 1000:9.2f} ms   {size_mb / seconds:8.1f} MB/s"
+            if baseline:
+                line += f"   {baseline / seconds:5.1f}x vs json"
+            if page in network:
+                share = seconds / (seconds + network[page]) * 100
+                line += f"   {share:5.1f}% of request latency"
+            print(line)
+        if page in network:
+            print(f"  network  {network[page] * 1000:9.2f} ms")
+
+    print("\n" + "=" * 80 + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON codecs on CarDex list pages")
+    parser.add_argument("--rows", type=int, default=1000, help="rows per page (default 1000)")
+    parser.add_argument("--repeat", type=int, default=20, help="timing repetitions, best is reported")
+    parser.add_argument("--live", action="store_true", help="benchmark real pages from the running API")
+    args = parser.parse_args()
+
+    network = {}
+    if args.live:
+        live = fetchLivePages(args.rows)
+        pages = {name: body for name, (body, _) in live.items()}
+        network = {name: seconds for name, (_, seconds) in live.items()}
+    else:
+        random.seed(42)
+        pages = {
+            "/trades/history": makeTradeHistoryPage(args.rows),
+            "/cards": makeCardsPage(args.rows)
+        }
+
+    results = benchDecode(pages, args.repeat)
+    printReport(results, {name: len(body) for name, body in pages.items()}, network)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Price candles for CarDex CLI
+Incrementally maintained OHLC/volume bars per vehicle and grade, from completed trades
+"""
+import os
+import struct
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import json_codec
+from trade_sync import TradeHistory, parseTimestamp
+
+# Bar widths in seconds
+INTERVALS = {"1h": 60 * 60, "1d": 24 * 60 * 60}
+DEFAULT_INTERVAL = "1h"
+
+# Pseudo-grade whose series folds in every grade of a vehicle
+ALL_GRADES = "ALL"
+
+# One bar on disk: bucket start (epoch seconds), open, high, low, close, volume - 28 bytes
+RECORD = struct.Struct("<q5i")
+
+# How far into the trade history log the bars have been built
+CURSOR_FILE = "cursor.json"
+
+# Trades read from the history log (and cards looked up) per step of a refresh
+REFRESH_BATCH = 5000
+
+# Refreshes that retry a trade whose card could not be resolved before it is dropped
+PENDING_ATTEMPTS = 5
+
+
+def isPriceTrade(trade: Dict) -> bool:
+    """A completed FOR_PRICE trade with a price and an execution time, i.e. one that moves the bars"""
+    return trade.get("type", "FOR_PRICE") == "FOR_PRICE" and bool(trade.get("price")) and bool(trade.get("executedDate"))
+
+
+class Candle:
+    """One OHLC bar"""
+
+    __slots__ = ("start", "open", "high", "low", "close", "volume")
+
+    def __init__(self, start: int, open: int, high: int, low: int, close: int, volume: int):
+        self.start = start
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def fold(self, price: int, latest: bool = True):
+        """Add a trade; only a trade newer than every folded one moves the close"""
+        self.high = max(self.high, price)
+        self.low = min(self.low, price)
+        self.volume += 1
+        if latest:
+            self.close = price
+
+    def pack(self) -> bytes:
+        return RECORD.pack(self.start, self.open, self.high, self.low, self.close, self.volume)
+
+    def toDict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class CandleSeries:
+    """
+    Bars of one (vehicle, grade, interval), backed by a file of fixed-width records
+
+    Bars are loaded on first use. Folding a trade usually touches the last
+    bar or appends one, so flush() rewrites only the records that changed;
+    the whole file is rewritten only if a late trade opens a bar between two
+    existing ones.
+    """
+
+    def __init__(self, path: str, seconds: int):
+        self.path = path
+        self.seconds = seconds
+        self._candles: Optional[List[Candle]] = None
+        self._starts: List[int] = []
+        self._dirty = set()
+        self._rewrite = False
+
+    @property
+    def candles(self) -> List[Candle]:
+        if self._candles is None:
+            self._candles = []
+            if os.path.exists(self.path):
+                with open(self.path, "rb") as f:
+                    data = f.read()
+                usable = len(data) - len(data) % RECORD.size  # ignore a torn trailing record
+                self._candles = [Candle(*fields) for fields in RECORD.iter_unpack(data[:usable])]
+            self._starts = [candle.start for candle in self._candles]
+        return self._candles
+
+    def fold(self, timestamp: float, price: int):
+        """Fold one trade into its bar"""
+        candles = self.candles
+        start = int(timestamp // self.seconds * self.seconds)
+
+        if candles and start == candles[-1].start:
+            candles[-1].fold(price)
+            self._dirty.add(len(candles) - 1)
+        elif not candles or start > candles[-1].start:
+            candles.append(Candle(start, price, price, price, price, 1))
+            self._starts.append(start)
+            self._dirty.add(len(candles) - 1)
+        else:
+            index = bisect_left(self._starts, start)
+            if self._starts[index] == start:
+                candles[index].fold(price, latest=False)
+                self._dirty.add(index)
+            else:
+                candles.insert(index, Candle(start, price, price, price, price, 1))
+                self._starts.insert(index, start)
+                self._rewrite = True
+
+    def flush(self):
+        """Write changed bars back to disk"""
+        if self._candles is None or not (self._dirty or self._rewrite):
+            return
+        if self._rewrite or not os.path.exists(self.path):
+            with open(self.path, "wb") as f:
+                f.write(b"".join(candle.pack() for candle in self._candles))
+        else:
+            with open(self.path, "r+b") as f:
+                for index in sorted(self._dirty):
+                    f.seek(index * RECORD.size)
+                    f.write(self._candles[index].pack())
+        self._dirty.clear()
+        self._rewrite = False
+
+    def last(self, count: int) -> List[Candle]:
+        return self.candles[-count:] if count > 0 else []
+
+
+class CandleStore:
+    """
+    OHLC bars for every vehicle and grade, kept up to date incrementally
+
+    Trades come from a local TradeHistory. A cursor records how far into the
+    history log the bars have been built, so a refresh syncs the history
+    (fetching only new trades) and folds in just the trades past the cursor.
+    The cursor also keeps trades whose card could not be resolved, so they
+    are retried on later refreshes rather than skipped.
+    """
+
+    def __init__(self, directory: str, history: TradeHistory, intervals: Optional[Dict[str, int]] = None):
+        self.directory = directory
+        self.history = history
+        self.intervals = intervals or INTERVALS
+        self.series_cache: Dict[Tuple[str, str, str], CandleSeries] = {}
+        self.cursor = {"offset": 0}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.loadCursor()
+
+    def loadCursor(self):
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE), "rb") as f:
+                self.cursor = json_codec.loads(f.read())
+        except (OSError, ValueError):
+            pass
+
+    def saveCursor(self):
+        path = os.path.join(self.directory, CURSOR_FILE)
+        with open(path + ".tmp", "wb") as f:
+            f.write(json_codec.dumps(self.cursor))
+        os.replace(path + ".tmp", path)
+
+    def series(self, vehicle_id: str, grade: str = ALL_GRADES, interval: str = DEFAULT_INTERVAL) -> CandleSeries:
+        key = (vehicle_id, grade.upper(), interval)
+        if key not in self.series_cache:
+            path = os.path.join(self.directory, f"{vehicle_id}_{key[1]}_{interval}.bin")
+            self.series_cache[key] = CandleSeries(path, self.intervals[interval])
+        return self.series_cache[key]
+
+    def ingest(self, trades: Iterable[Dict], cards: Dict[str, Dict]) -> int:
+        """
+        Fold completed trades into the bars
+
+        Only FOR_PRICE trades with a price count. The vehicle and grade come
+        from the seller's card.
+
+        Args:
+            trades: Completed trades not folded in before, in any order
+            cards: Card details keyed by card ID, covering each trade's sellerCardId
+
+        Returns:
+            int: Trades folded into bars
+        """
+        ordered = sorted(((parseTimestamp(t["executedDate"]), t) for t in trades if isPriceTrade(t)),
+                         key=lambda pair: pair[0])
+
+        folded = 0
+        with self._lock:
+            touched = set()
+            for timestamp, trade in ordered:
+                card = cards.get(trade.get("sellerCardId")) or {}
+                if not card.get("vehicleId"):
+                    continue
+                for grade in (card.get("grade", "FACTORY").upper(), ALL_GRADES):
+                    for interval in self.intervals:
+                        series = self.series(card["vehicleId"], grade, interval)
+                        series.fold(timestamp, trade["price"])
+                        touched.add(series)
+                folded += 1
+
+            for series in touched:
+                series.flush()
+        return folded
+
+    def refresh(self, api_client) -> int:
+        """
+        Sync the trade history and fold in every trade not yet in the bars
+
+        The log is read REFRESH_BATCH trades at a time, and the cursor is saved
+        after each batch, so a first refresh over a long history holds one
+        batch in memory and an interrupted one resumes where it stopped. Card
+        details come from the client's catalog when it has one. A trade whose
+        card is missing or has no vehicle is kept in the cursor and retried
+        with the next refresh, up to PENDING_ATTEMPTS times.
+
+        Returns:
+            int: Trades folded into bars
+        """
+        self.history.sync(api_client)
+        offset = self.cursor.get("offset", 0)
+        retry = [(entry["attempts"], entry["trade"]) for entry in self.cursor.get("pending", [])]
+        pending = []
+        folded = 0
+        while True:
+            trades, end = self.history.read(offset, REFRESH_BATCH)
+            batch = retry + [(0, trade) for trade in trades if isPriceTrade(trade)]
+            retry = []
+            if not trades and not batch:
+                return folded
+
+            cards = api_client.getCardsById(trade.get("sellerCardId") for _, trade in batch)
+            folded += self.ingest((trade for _, trade in batch), cards)
+            pending += [{"attempts": attempts + 1, "trade": trade} for attempts, trade in batch
+                        if not (cards.get(trade.get("sellerCardId")) or {}).get("vehicleId")
+                        and attempts + 1 < PENDING_ATTEMPTS]
+            offset = end
+            self.cursor = {"offset": offset, "pending": pending}
+            self.saveCursor()
+
+    def candles(self, vehicle_id: str, grade: str = ALL_GRADES, interval: str = DEFAULT_INTERVAL,
+                count: int = 24) -> List[Candle]:
+        """The latest count bars of a vehicle"""
+        return self.series(vehicle_id, grade, interval).last(count)
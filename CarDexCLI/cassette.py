@@ -0,0 +1,194 @@
+"""
+Record/replay of HTTP sessions for CarDex CLI
+Captures real responses (with timings) to a cassette file and serves them back offline
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import json_codec
+
+MAGIC = b"CDXCAS1\n"
+
+# Per record: key length, meta length, body length (compressed), status, latency (s), offset from start (s)
+RECORD_HEADER = struct.Struct("<IIIHdd")
+
+# Response headers worth keeping (conditional requests, throttling, content type)
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Retry-After")
+
+# Request bodies sent to these paths are credentials and are left out of the key
+CREDENTIAL_PATHS = ("/auth/login", "/auth/register")
+
+
+def requestKey(method: str, url: str, params: Optional[Dict] = None, body: Optional[Dict] = None) -> str:
+    """
+    Identify a request independently of the host it was sent to
+
+    e.g. GET /trades?limit=5&offset=0, POST /trades/{id}/execute#<body hash>
+    """
+    path = urlsplit(url).path or "/"
+    query = urlencode(sorted((k, str(v)) for k, v in (params or {}).items() if v is not None))
+    key = f"{method.upper()} {path}" + (f"?{query}" if query else "")
+    if body and path not in CREDENTIAL_PATHS:
+        key += "#" + hashlib.sha1(json_codec.dumps(body)).hexdigest()[:16]
+    return key
+
+
+class CassetteMiss(requests.exceptions.RequestException):
+    """A replayed request that is not in the cassette - not a sign the server is struggling"""
+
+
+class CassetteResponse:
+    """The parts of requests.Response the client uses, backed by recorded bytes"""
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes, url: str = ""):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.url = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json_codec.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def close(self):
+        pass
+
+
+class CassetteRecorder:
+    """
+    Sends requests for real and appends each exchange to a cassette
+
+    Records are appended as they complete, so a session that crashes still
+    leaves a usable cassette. Bodies are zlib-compressed; request headers
+    (including the bearer token) are never written, but response bodies are,
+    so a cassette of a logged-in session should be treated as a secret.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.started = time.monotonic()
+        self.records = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+
+    def send(self, method: str, url: str, **kwargs) -> CassetteResponse:
+        start = time.monotonic()
+        response = getattr(requests, method.lower())(url, **kwargs)
+        try:
+            content = response.content
+        finally:
+            response.close()
+        elapsed = time.monotonic() - start
+
+        key = requestKey(method, url, kwargs.get("params"), kwargs.get("json")).encode()
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        meta = json_codec.dumps({"url": url, "headers": headers})
+        body = zlib.compress(content)
+
+        with self._lock:
+            self._file.write(RECORD_HEADER.pack(len(key), len(meta), len(body), response.status_code,
+                                                elapsed, start - self.started))
+            self._file.write(key + meta + body)
+            self._file.flush()
+            self.records += 1
+        return CassetteResponse(response.status_code, headers, content, url)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class CassettePlayer:
+    """
+    Serves recorded responses from a memory-mapped cassette
+
+    Opening a cassette reads only the fixed-size record headers and keys to
+    build an index; bodies stay in the mapped file until a request needs
+    them. A request recorded several times gets its responses in recorded
+    order, then the last one again.
+
+    speed scales the recorded latencies: 1 replays at original timing, 10
+    ten times faster, 0 (or None) without waiting at all.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0, sleep=time.sleep):
+        self.path = path
+        self.speed = speed
+        self.sleep = sleep
+        self.served = 0
+        self.misses = 0
+        self.index: Dict[str, List[Tuple[int, int, int, int, float]]] = defaultdict(list)
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a CarDex cassette")
+        self.buildIndex()
+
+    def buildIndex(self):
+        position = len(MAGIC)
+        end = len(self._map)
+        while position + RECORD_HEADER.size <= end:
+            key_len, meta_len, body_len, status, elapsed, _ = RECORD_HEADER.unpack_from(self._map, position)
+            key_start = position + RECORD_HEADER.size
+            record_end = key_start + key_len + meta_len + body_len
+            if record_end > end:
+                break  # torn final record from an interrupted recording
+            key = bytes(self._map[key_start:key_start + key_len]).decode()
+            self.index[key].append((key_start + key_len, meta_len, body_len, status, elapsed))
+            position = record_end
+
+    def __len__(self):
+        return sum(len(records) for records in self.index.values())
+
+    def send(self, method: str, url: str, **kwargs) -> CassetteResponse:
+        key = requestKey(method, url, kwargs.get("params"), kwargs.get("json"))
+        with self._lock:
+            records = self.index.get(key)
+            if not records:
+                self.misses += 1
+                raise CassetteMiss(f"{key} is not in cassette {self.path}")
+            turn = self._cursor[key]
+            self._cursor[key] = turn + 1
+            self.served += 1
+        meta_start, meta_len, body_len, status, elapsed = records[min(turn, len(records) - 1)]
+
+        if self.speed:
+            self.sleep(elapsed / self.speed)
+        meta = json_codec.loads(bytes(self._map[meta_start:meta_start + meta_len]))
+        body_start = meta_start + meta_len
+        content = zlib.decompress(self._map[body_start:body_start + body_len])
+        return CassetteResponse(status, meta["headers"], content, url)
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
@@ -0,0 +1,303 @@
+"""
+Local card catalog for CarDex CLI
+Fixed-width card records in a memory-mapped file, found by binary search
+"""
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"CDXCAT1\n"
+
+# magic, cards, vehicles, collections, string table offset, built at (epoch seconds)
+HEADER = struct.Struct("<8sIIIQd")
+# One card: UUID, vehicle index, collection index, grade code, value - 28 bytes, sorted by UUID
+RECORD = struct.Struct("<16sIHBxi")
+# One vehicle or collection: UUID, name offset and length in the string table
+ENTRY = struct.Struct("<16sII")
+
+GRADE_CODES = ("FACTORY", "LIMITED_RUN", "NISMO")
+UNKNOWN_GRADE = 255
+
+# Rebuild in the background once the catalog is this old (seconds), checking this often
+CATALOG_MAX_AGE = 6 * 60 * 60
+CATALOG_CHECK_INTERVAL = 60.0
+
+# Cards per /cards request, and collections fetched at once, while building
+CATALOG_PAGE = 1000
+CATALOG_WORKERS = 4
+# Records a build worker holds before sorting them and spilling them to a run file (28 bytes each)
+CATALOG_RUN = 100_000
+
+
+def vehicleName(vehicle: Dict) -> str:
+    """Display name the server gives a vehicle's cards, e.g. '1999 Nissan Skyline GT-R'"""
+    return f"{vehicle.get('year')} {vehicle.get('make')} {vehicle.get('model')}"
+
+
+def uuidBytes(text: Optional[str]) -> bytes:
+    """16-byte big-endian UUID, so byte order matches the order of the lowercase strings"""
+    try:
+        return uuid.UUID(text).bytes
+    except (TypeError, ValueError, AttributeError):
+        return bytes(16)
+
+
+class RecordKeys:
+    """The sorted UUID column of a mapped catalog, as a sequence bisect can search"""
+
+    def __init__(self, data, count: int):
+        self.data = data
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index: int) -> bytes:
+        start = HEADER.size + index * RECORD.size
+        return self.data[start:start + 16]
+
+
+class CatalogSnapshot:
+    """One opened catalog file; replaced as a whole when a newer catalog is built"""
+
+    def __init__(self, data, header: Tuple):
+        _, self.cards, self.vehicles, self.collections, self.strings, self.built_at = header
+        self.data = data
+        self.keys = RecordKeys(data, self.cards)
+        self.vehicle_table = HEADER.size + self.cards * RECORD.size
+        self.collection_table = self.vehicle_table + self.vehicles * ENTRY.size
+
+    def entry(self, table: int, index: int) -> Tuple[str, str]:
+        """(UUID, name) of a vehicle or collection table entry"""
+        raw_id, offset, length = ENTRY.unpack_from(self.data, table + index * ENTRY.size)
+        name = bytes(self.data[self.strings + offset:self.strings + offset + length]).decode()
+        return (str(uuid.UUID(bytes=raw_id)) if any(raw_id) else None), name
+
+
+class CardCatalog:
+    """
+    Every card in one memory-mapped file of fixed-width records
+
+    Records hold the card UUID, vehicle and collection indexes, grade code
+    and value, sorted by UUID; vehicle and collection names live once each
+    in a string table at the end of the file. A lookup is a binary search
+    over the mapped records with struct reads straight from the map - no
+    JSON, no per-card objects - so memory stays at the pages the OS has
+    touched no matter how many cards there are.
+
+    The catalog is rebuilt from the API (one /cards scan per collection)
+    and swapped in atomically; lookups running during a swap finish on the
+    old mapping.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.last_error: Optional[Exception] = None
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reload()
+
+    def reload(self):
+        """Map the catalog file (if there is one), replacing the current mapping"""
+        snapshot = None
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= HEADER.size:
+            with open(self.path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            header = HEADER.unpack_from(data, 0)
+            if header[0] == MAGIC:
+                snapshot = CatalogSnapshot(data, header)
+            else:
+                data.close()
+        with self._lock:
+            self._snapshot = snapshot  # an old mapping is unmapped once its last lookup drops it
+
+    def __len__(self):
+        snapshot = self._snapshot
+        return snapshot.cards if snapshot else 0
+
+    @property
+    def built_at(self) -> Optional[float]:
+        snapshot = self._snapshot
+        return snapshot.built_at if snapshot else None
+
+    def isStale(self, max_age: float = CATALOG_MAX_AGE) -> bool:
+        return self.built_at is None or time.time() - self.built_at > max_age
+
+    def lookup(self, card_id: str) -> Optional[Dict]:
+        """
+        Find a card by ID
+
+        Returns:
+            Dict: id, name, grade, value, vehicleId and collectionId, or None if the card is not in the catalog
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        key = uuidBytes(card_id)
+        index = bisect_left(snapshot.keys, key)
+        if index == snapshot.cards or snapshot.keys[index] != key:
+            return None
+
+        _, vehicle, collection, grade, value = RECORD.unpack_from(snapshot.data, HEADER.size + index * RECORD.size)
+        vehicle_id, name = snapshot.entry(snapshot.vehicle_table, vehicle)
+        collection_id, _ = snapshot.entry(snapshot.collection_table, collection)
+        return {
+            "id": card_id,
+            "name": name,
+            "grade": GRADE_CODES[grade] if grade < len(GRADE_CODES) else "UNKNOWN",
+            "value": value,
+            "vehicleId": vehicle_id,
+            "collectionId": collection_id
+        }
+
+    def sync(self, api_client, workers: int = CATALOG_WORKERS, page_size: int = CATALOG_PAGE) -> int:
+        """
+        Rebuild the catalog from the API and swap it in
+
+        Returns:
+            int: Cards in the new catalog
+        """
+        count = buildCatalog(api_client, self.path, workers, page_size)
+        self.reload()
+        return count
+
+    def startSync(self, api_client, interval: float = CATALOG_CHECK_INTERVAL, max_age: float = CATALOG_MAX_AGE):
+        """Keep the catalog fresh in the background, rebuilding it whenever it is missing or older than max_age"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while True:
+                if self.isStale(max_age):
+                    try:
+                        self.sync(api_client)
+                        self.last_error = None
+                    except Exception as e:
+                        self.last_error = e
+                if self._stop.wait(interval):
+                    return
+
+        self._thread = threading.Thread(target=run, name="cardex-catalog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def readRun(path: str) -> Iterator[bytes]:
+    """Yield the fixed-width records of a sorted run file"""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(RECORD.size * 4096)
+            if not chunk:
+                return
+            for start in range(0, len(chunk), RECORD.size):
+                yield chunk[start:start + RECORD.size]
+
+
+def buildCatalog(api_client, path: str, workers: int = CATALOG_WORKERS, page_size: int = CATALOG_PAGE,
+                 run_size: int = CATALOG_RUN) -> int:
+    """
+    Write a catalog of every card to path
+
+    /cards list items carry no vehicle or collection ID, so cards are read
+    one collection at a time (collectionId filter) and matched to vehicles by
+    name against /cards/vehicles. Vehicles that share a display name cannot
+    be told apart that way; their cards get the name but no vehicleId.
+
+    Each worker sorts at most `run_size` records at a time and spills them
+    to a run file next to the catalog; the runs are then merged into the
+    catalog, so memory stays bounded however many cards there are.
+
+    Returns:
+        int: Cards written
+    """
+    strings = bytearray()
+    lock = threading.Lock()
+
+    def intern(text: str) -> Tuple[int, int]:
+        encoded = text.encode()
+        offset = len(strings)
+        strings.extend(encoded)
+        return offset, len(encoded)
+
+    vehicle_ids: Dict[str, Optional[str]] = {}
+    for vehicle in api_client.getVehicles():
+        name = vehicleName(vehicle)
+        vehicle_ids[name] = None if name in vehicle_ids else vehicle.get("id")  # shared names stay unresolved
+    vehicles: Dict[str, int] = {}
+    vehicle_entries: List[bytes] = []
+    collections = api_client.getCollections()
+    collection_entries = [ENTRY.pack(uuidBytes(c.get("id")), *intern(c.get("name", ""))) for c in collections]
+
+    def vehicleIndex(name: str) -> int:
+        with lock:
+            if name not in vehicles:
+                vehicles[name] = len(vehicle_entries)
+                vehicle_entries.append(ENTRY.pack(uuidBytes(vehicle_ids.get(name)), *intern(name)))
+            return vehicles[name]
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="cardex-catalog-", dir=directory) as run_dir:
+        runs: List[str] = []
+
+        def spill(records: List[bytes]):
+            records.sort()
+            with lock:
+                run = os.path.join(run_dir, f"run-{len(runs):05d}")
+                runs.append(run)
+            with open(run, "wb") as f:
+                f.write(b"".join(records))
+            records.clear()
+
+        def fetch(index: int):
+            records = []
+            offset = 0
+            while True:
+                page = list(api_client.streamCards(limit=page_size, offset=offset, collectionId=collections[index]["id"]))
+                for card in page:
+                    grade = card.get("grade", "").upper()
+                    records.append(RECORD.pack(uuidBytes(card["id"]), vehicleIndex(card.get("name", "")), index,
+                                               GRADE_CODES.index(grade) if grade in GRADE_CODES else UNKNOWN_GRADE,
+                                               card.get("value", 0)))
+                    if len(records) >= run_size:
+                        spill(records)
+                if len(page) < page_size:
+                    break
+                offset += page_size
+            if records:
+                spill(records)
+
+        if collections:
+            with ThreadPoolExecutor(max_workers=min(workers, len(collections)), thread_name_prefix="cardex-catalog") as pool:
+                list(pool.map(fetch, range(len(collections))))
+
+        count = 0
+        with open(path + ".tmp", "wb") as f:
+            f.write(bytes(HEADER.size))  # filled in once the counts are known
+            for record in heapq.merge(*(readRun(run) for run in runs)):
+                f.write(record)
+                count += 1
+            f.write(b"".join(vehicle_entries))
+            f.write(b"".join(collection_entries))
+            strings_offset = f.tell()
+            f.write(strings)
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, count, len(vehicle_entries), len(collection_entries), strings_offset, time.time()))
+    os.replace(path + ".tmp", path)
+    return count
@@ -3,10 +3,154 @@
 import sys
 import getpass
 import os
+import shlex
+import argparse
+import time
+from collections import deque
+from contextlib import nullcontext
 from datetime import datetime
 
-from api_client  import APIClient
-from cli_display import Display
+from api_client   import APIClient
+from entity_store import CARD
+from cli_display  import Display
+from search_index import buildSearchIndex
+from prefetch     import Prefetcher
+from cli_dashboard import DASHBOARD_REFRESH, Dashboard
+from profiler     import profileCall
+import pack_ev
+import completion
+import audit
+from candles      import ALL_GRADES, DEFAULT_INTERVAL, INTERVALS, CandleStore
+from trade_sync   import TradeHistory
+from tracing      import JsonLinesExporter, Tracer
+from cassette     import CassettePlayer, CassetteRecorder
+from catalog      import CardCatalog
+from config       import API_URLS, CACHE_DIR, CANDLE_DIR, CATALOG_PATH, HISTORY_DIR, PROFILE_DIR, TRACE_FILE
+
+
+GRADES = ("FACTORY", "LIMITED_RUN", "NISMO")
+TRADE_TYPES = ("FOR_PRICE", "FOR_CARD")
+OPEN_SORTS = ("date_desc", "date_asc", "price_asc", "price_desc")
+CARD_SORTS = ("value_asc", "value_desc", "grade_asc", "grade_desc")
+
+
+class CommandArgumentError(Exception):
+    """Raised when a command's arguments cannot be parsed"""
+
+
+class CommandParser(argparse.ArgumentParser):
+    """ArgumentParser that reports problems to the CLI instead of exiting the process"""
+
+    def error(self, message):
+        raise CommandArgumentError(f"{self.prog}: {message}")
+
+    def exit(self, status=0, message=None):
+        # Reached after --help has been printed
+        raise CommandArgumentError(message or "")
+
+
+def positiveInt(text: str) -> int:
+    """argparse type for counts and sizes that must be at least 1"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{text}'")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return value
+
+
+def positiveFloat(text: str) -> float:
+    """argparse type for rates and durations that must be above zero"""
+    try:
+        value = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid float value: '{text}'")
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f"must be a positive number, got {value:g}")
+    return value
+
+
+def oddsArgument(text: str) -> dict:
+    """argparse type for --odds, reporting bad grades in argparse's own error format"""
+    try:
+        return pack_ev.parseOdds(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def buildCommandParsers() -> dict:
+    """
+    Build the option parsers for commands that take arguments
+
+    Filter options map one-to-one onto the server's query parameters,
+    so filtering and sorting happen server-side.
+    """
+    parsers = {}
+
+    parser = CommandParser(prog="open", description="Show open trades, filtered and sorted by the server")
+    parser.add_argument("--type", type=str.upper, choices=TRADE_TYPES, help="trade type")
+    parser.add_argument("--grade", type=str.upper, choices=GRADES, help="card grade")
+    parser.add_argument("--min-price", type=int, help="minimum asking price")
+    parser.add_argument("--max-price", type=int, help="maximum asking price")
+    parser.add_argument("--collection", help="collection ID")
+    parser.add_argument("--vehicle", help="vehicle ID")
+    parser.add_argument("--want-card", help="wanted card ID")
+    parser.add_argument("--sort", type=str.lower, choices=OPEN_SORTS, help="sort order")
+    parser.add_argument("--limit", type=positiveInt, default=5, help="number of trades to show (default 5)")
+    parsers["open"] = parser
+
+    parser = CommandParser(prog="cards", description="Browse cards, filtered and sorted by the server")
+    parser.add_argument("--grade", type=str.upper, choices=GRADES, help="card grade")
+    parser.add_argument("--min-value", type=int, help="minimum card value")
+    parser.add_argument("--max-value", type=int, help="maximum card value")
+    parser.add_argument("--collection", help="collection ID")
+    parser.add_argument("--vehicle", help="vehicle ID")
+    parser.add_argument("--user", help="owner user ID")
+    parser.add_argument("--sort", type=str.lower, choices=CARD_SORTS, help="sort order")
+    parser.add_argument("--limit", type=positiveInt, default=10, help="number of cards to show (default 10)")
+    parsers["cards"] = parser
+
+    parser = CommandParser(prog="garage", description="List every card you own, with vehicle details")
+    parser.add_argument("--grade", type=str.upper, choices=GRADES, help="card grade")
+    parser.add_argument("--collection", help="collection ID")
+    parser.add_argument("--user", help="another user's ID (default: you)")
+    parsers["garage"] = parser
+
+    parser = CommandParser(prog="packev", description="Simulate pack openings and estimate a pack's expected value")
+    parser.add_argument("collection", nargs="+", help="collection name (or the start of it) or ID")
+    parser.add_argument("--packs", type=positiveInt, default=pack_ev.DEFAULT_PACKS, help="packs to simulate (default 1,000,000)")
+    parser.add_argument("--odds", type=oddsArgument, help="grade odds, e.g. FACTORY=0.6,LIMITED_RUN=0.3,NISMO=0.1")
+    parser.add_argument("--seed", type=int, help="random seed, for repeatable results")
+    parsers["packev"] = parser
+
+    parser = CommandParser(prog="complete", description="Estimate the cost of completing collections")
+    parser.add_argument("collection", nargs="*", help="collection name or ID (default: every collection)")
+    parser.add_argument("--trials", type=positiveInt, default=completion.DEFAULT_TRIALS,
+                        help="simulated completions per collection (default 20,000)")
+    parser.add_argument("--seed", type=int, help="random seed, for repeatable results")
+    parsers["complete"] = parser
+
+    parser = CommandParser(prog="candles", description="Show a vehicle's price candles from completed trades")
+    parser.add_argument("vehicle", nargs="+", help="vehicle name (partial or misspelled is fine)")
+    parser.add_argument("--interval", choices=tuple(INTERVALS), default=DEFAULT_INTERVAL, help="bar width (default 1h)")
+    parser.add_argument("--grade", type=str.upper, choices=GRADES, help="card grade (default: all grades)")
+    parser.add_argument("--last", type=positiveInt, default=24, help="number of bars to show (default 24)")
+    parsers["candles"] = parser
+
+    parser = CommandParser(prog="audit", description="Check completed trades against who owns each card now")
+    parser.add_argument("--partitions", type=positiveInt, default=audit.PARTITIONS,
+                        help="spill files; more means less memory per worker (default 64)")
+    parser.add_argument("--workers", type=positiveInt, default=audit.FETCH_WORKERS,
+                        help="threads fetching users' cards (default 8)")
+    parsers["audit"] = parser
+
+    parser = CommandParser(prog="catalog", description="Look up cards in the local memory-mapped catalog")
+    parser.add_argument("card_id", nargs="?", help="card ID to look up (default: show the catalog's status)")
+    parser.add_argument("--sync", action="store_true", help="rebuild the catalog from the server now")
+    parsers["catalog"] = parser
+
+    return parsers
 
 
 class CLIClient:
@@ -16,11 +160,21 @@ class CLIClient:
     UNKNOWN_VEHICLE = "Unknown Vehicle"
     EXIT_MESSAGE = "\n\nExiting CarDex Live Market."
     
-    def __init__(self, api_client=None):
+    def __init__(self, api_client=None, profile=False, tracer=None):
 
-        """Initialize CLI with an API client"""
+        """Initialize CLI with an API client (profile=True runs every command under the profiler)"""
         self.api_client = api_client or APIClient()
+        self.tracer = tracer or Tracer()
         self.display = Display()
+        self.parsers = buildCommandParsers()
+        self.search_index = None
+        self.unindexed_cards = deque()  # cards stored since the search index last caught up
+        self.trade_history = None
+        self.candle_store = None
+        self.prefetcher = None
+        # A replayed session only has the responses that were recorded, so nothing is fetched in the background
+        self.replaying = isinstance(getattr(self.api_client, "cassette", None), CassettePlayer)
+        self.profile_all = profile
         self.running = False
         
         self.username = None
@@ -128,6 +282,83 @@ class CLIClient:
             "pack_price": collection.get("price", 0),
             "vehicle_count": collection.get("cardCount", 0)
         }
+
+    @staticmethod
+    def transformPackEV(collection: dict, result, values: dict, odds: dict, listing_counts: dict) -> dict:
+        """
+        Transform a pack EV simulation to display format
+
+        Display expects: name, pack_price, packs, mean, std, stderr, ev, expected, p_profit,
+                         p5, p50, p95, seconds, grades (grade, odds, avg_value, source)
+        """
+        return {
+            "name": collection.get("name", "Unknown Collection"),
+            "pack_price": result.pack_price,
+            "packs": result.packs,
+            "mean": result.mean,
+            "std": result.std,
+            "stderr": result.stderr,
+            "ev": result.ev,
+            "expected": result.expected,
+            "p_profit": result.p_profit,
+            "p5": result.percentiles[5],
+            "p50": result.percentiles[50],
+            "p95": result.percentiles[95],
+            "seconds": result.seconds,
+            "grades": [{
+                "grade": grade,
+                "odds": odds[grade],
+                "avg_value": sum(values[grade]) / len(values[grade]),
+                "source": f"{listing_counts[grade]} open listings" if listing_counts[grade] else "nominal (no listings)"
+            } for grade in pack_ev.GRADES]
+        }
+
+    @staticmethod
+    def transformCard(card: dict) -> dict:
+        """
+        Transform API card response to display format
+
+        API provides: id, name, grade, value
+        Display expects: grade, vehicle, value
+        """
+        return {
+            "grade": card.get("grade", "FACTORY").upper(),
+            "vehicle": card.get("name", CLIClient.UNKNOWN_VEHICLE),
+            "value": card.get("value", 0)
+        }
+
+    @staticmethod
+    def transformGarageCard(card: dict) -> dict:
+        """
+        Transform a card-with-vehicle row to display format
+
+        API provides: id, grade, value, year, make, model (vehicle joined by the server)
+        Display expects: grade, vehicle, value
+        """
+        vehicle = " ".join(str(card.get(field) or "") for field in ("year", "make", "model")).strip()
+        return {
+            "grade": card.get("grade", "FACTORY").upper(),
+            "vehicle": vehicle or CLIClient.UNKNOWN_VEHICLE,
+            "value": card.get("value", 0)
+        }
+
+    @staticmethod
+    def transformSearchResult(result: dict, listings: list) -> dict:
+        """
+        Transform a search hit and its open listings to display format
+
+        Index provides: id, name, score
+        Display expects: name, fuzzy, listings (seller_username, price, type)
+        """
+        return {
+            "name": result["name"],
+            "fuzzy": result["score"] < 1.0,
+            "listings": [{
+                "seller_username": trade.get("username", "Unknown"),
+                "price": trade.get("price") or 0,
+                "type": "FOR_CARD" if trade.get("wantCardId") else "FOR_PRICE"
+            } for trade in listings]
+        }
         
     def connect(self):
 
@@ -158,9 +389,28 @@ class CLIClient:
         help_text = """
 Available Commands:
   open        - Show the top 5 latest open trades
+                (filters: --grade, --type, --min-price, --max-price, --collection,
+                 --vehicle, --want-card, --sort, --limit; try 'open --help')
+  cards       - Browse cards (filters: --grade, --min-value, --max-value, --collection,
+                 --vehicle, --user, --sort, --limit; try 'cards --help')
+  garage      - List every card you own (filters: --grade, --collection, --user)
+  dashboard   - Full-screen live market view (q to quit)
+  search      - Find a car by (partial or misspelled) name, e.g. 'search skylin gtr'
   trades      - Show the top 5 latest completed trades
   shop        - View all available packs and their prices
+  packev      - Simulate opening a collection's packs, e.g. 'packev JDM Legends'
+                (options: --packs, --odds, --seed; needs NumPy)
+  complete    - Estimate packs and currency to complete your collections,
+                e.g. 'complete' or 'complete JDM Legends' (adds the buy-listings path)
+  candles     - Price candles for a vehicle from completed trades, e.g. 'candles skyline'
+                (options: --interval 1h|1d, --grade, --last)
+  sync        - Fetch completed trades newer than the local copy of the history
+  audit       - Check completed trades against current card ownership
+                (options: --partitions, --workers)
+  catalog     - Look up a card in the local catalog, e.g. 'catalog <card-id>'
+                (no ID: catalog status; --sync: rebuild it now)
   collections - View all available collections and their prices
+  profile     - Run a command under the profiler, e.g. 'profile trades'
   vroom       - Show a cool car (vroom vroom!)
   help        - Show this help message
   exit        - Log out of CarDex Live Market
@@ -170,8 +420,10 @@ Available Commands:
     def handleTrades(self):
         """Handle the 'trades' command - fetch and display completed trades"""
         try:
-            # Fetch completed trades WITH card details
-            trades = self.api_client.getCompletedTradesWithDetails(limit=5)
+            # Fetch completed trades WITH card details, unless already prefetched
+            trades = self.takePrefetched("trades")
+            if trades is None:
+                trades = self.api_client.getCompletedTradesWithDetails(limit=5)
             
             # Transform each trade to display format
             transformed_trades = [self.transformCompletedTrade(t) for t in trades]
@@ -182,26 +434,404 @@ Available Commands:
         except Exception as e:
             print(f"Error fetching completed trades: {e}")
     
-    def handleOpen(self):
+    def startPrefetcher(self):
+        """Start warming data for the likeliest next commands in the background (not when replaying)"""
+        if self.replaying:
+            return
+        self.prefetcher = prefetcher = Prefetcher({})
+        # Loads stop between requests once a command starts, rather than competing with it
+        prefetcher.tasks.update({
+            "open": lambda: self.api_client.getOpenTradesWithDetails(limit=5, checkpoint=prefetcher.checkpoint),
+            "trades": lambda: self.api_client.getCompletedTradesWithDetails(limit=5, checkpoint=prefetcher.checkpoint),
+            "collections": self.api_client.getCollections
+        })
+        prefetcher.start()
+
+    def stopPrefetcher(self):
+        """Stop background prefetching"""
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+
+    def takePrefetched(self, name: str):
+        """Return fresh prefetched data for a command, or None"""
+        if self.prefetcher is None:
+            return None
+        return self.prefetcher.take(name)
+
+    def parseArgs(self, command: str, args: str):
+        """
+        Parse a command's arguments
+
+        Returns:
+            argparse.Namespace, or None if the arguments were invalid (or --help was shown)
+        """
+        try:
+            return self.parsers[command].parse_args(shlex.split(args))
+        except (CommandArgumentError, ValueError) as e:
+            if str(e):
+                print(f"{e}\n")
+            return None
+
+    def handleOpen(self, args: str = ""):
         """Handle the 'open' command - fetch and display open trades"""
+        options = self.parseArgs("open", args)
+        if options is None:
+            return
+
         try:
-            # Fetch open trades WITH card details
-            trades = self.api_client.getOpenTradesWithDetails(limit=5)
+            # Only the default listing is prefetched
+            trades = None
+            if options == self.parsers["open"].parse_args([]):
+                trades = self.takePrefetched("open")
+
+            # Fetch open trades WITH card details, letting the server filter and sort
+            if trades is None:
+                trades = self.api_client.getOpenTradesWithDetails(
+                    limit=options.limit,
+                    type=options.type,
+                    grade=options.grade,
+                    minPrice=options.min_price,
+                    maxPrice=options.max_price,
+                    collectionId=options.collection,
+                    vehicleId=options.vehicle,
+                    wantCardId=options.want_card,
+                    sortBy=options.sort
+                )
             
             # Transform each trade to display format
             transformed_trades = [self.transformOpenTrade(t) for t in trades]
             
             # Display
-            self.display.showOpenTrades(transformed_trades)
+            self.display.showOpenTrades(transformed_trades, title=f"OPEN TRADES - Latest {options.limit}")
             
         except Exception as e:
             print(f"Error fetching open trades: {e}")
+
+    def handleCards(self, args: str = ""):
+        """Handle the 'cards' command - fetch and display cards"""
+        options = self.parseArgs("cards", args)
+        if options is None:
+            return
+
+        try:
+            cards = self.api_client.getCards(
+                limit=options.limit,
+                grade=options.grade,
+                minValue=options.min_value,
+                maxValue=options.max_value,
+                collectionId=options.collection,
+                vehicleId=options.vehicle,
+                userId=options.user,
+                sortBy=options.sort
+            )
+
+            transformed_cards = [self.transformCard(c) for c in cards]
+
+            self.display.showCards(transformed_cards)
+
+        except Exception as e:
+            print(f"Error fetching cards: {e}")
     
+    def handleGarage(self, args: str = ""):
+        """Handle the 'garage' command - stream the user's whole inventory"""
+        options = self.parseArgs("garage", args)
+        if options is None:
+            return
+        if not (options.user or self.api_client.user_id):
+            print("Log in to see your garage, or pass --user <id>.\n")
+            return
+
+        try:
+            # Rows are rendered as each page downloads, never holding the inventory in memory
+            cards = self.api_client.streamUserCardsWithVehicles(
+                user_id=options.user, collection_id=options.collection, grade=options.grade
+            )
+            self.display.showGarage(self.transformGarageCard(c) for c in cards)
+
+        except Exception as e:
+            print(f"Error fetching garage: {e}")
+
+    def getSearchIndex(self):
+        """
+        Return the local search index, building it on first use
+
+        Built from /cards/vehicles and the cards seen so far once per
+        session; cards stored after that are queued as they arrive and only
+        those are folded in on each call.
+        """
+        if self.search_index is None:
+            self.api_client.entities.listen(CARD, self.unindexed_cards.append)
+            self.search_index = buildSearchIndex(self.api_client.getVehicles(),
+                                                 list(self.api_client.card_cache.values()))
+        while self.unindexed_cards:
+            self.search_index.addCards([self.unindexed_cards.popleft()])
+        return self.search_index
+
+    def handleSearch(self, query: str = ""):
+        """Handle the 'search' command - find vehicles by name and show their open listings"""
+        if not query.strip():
+            print("Usage: search <text>\n")
+            return
+
+        try:
+            results = self.getSearchIndex().search(query)
+
+            # Link each hit to its open listings, filtered server-side by vehicle
+            listings = self.api_client.getOpenTradesForVehicles(r["id"] for r in results) if results else {}
+            transformed_results = [self.transformSearchResult(r, listings.get(r["id"], [])) for r in results]
+
+            self.display.showSearchResults(query, transformed_results)
+
+        except Exception as e:
+            print(f"Error searching: {e}")
+
+    def loadDashboardData(self) -> dict:
+        """Fetch and transform everything the dashboard shows"""
+        return {
+            "open_trades": [self.transformOpenTrade(t) for t in self.api_client.getOpenTradesWithDetails(limit=10)],
+            "completed_trades": [self.transformCompletedTrade(t) for t in self.api_client.getCompletedTradesWithDetails(limit=10)],
+            "collections": [self.transformCollection(c) for c in self.api_client.getCollections()]
+        }
+
+    def handleDashboard(self):
+        """Handle the 'dashboard' command - full-screen live market view"""
+        if not Dashboard.available():
+            print("The dashboard needs curses (on Windows: pip install windows-curses).\n")
+            return
+
+        try:
+            Dashboard(self.loadDashboardData, refresh=None if self.replaying else DASHBOARD_REFRESH).run()
+        except Exception as e:
+            print(f"Error running dashboard: {e}")
+
     def handleVroom(self):
 
         """Handle the 'vroom' command"""
         self.display.showCar()
     
+    def findCollection(self, query: str):
+        """
+        Find a collection by ID, exact name, or name prefix (case-insensitive)
+
+        Returns:
+            dict, or None if nothing (or more than one collection) matches
+        """
+        collections = self.api_client.getCollections()
+        query = query.strip().lower()
+        for collection in collections:
+            if str(collection.get("id", "")).lower() == query or collection.get("name", "").lower() == query:
+                return collection
+
+        matches = [c for c in collections if c.get("name", "").lower().startswith(query)]
+        if len(matches) > 1:
+            print(f"'{query}' matches several collections: {', '.join(c['name'] for c in matches)}")
+            return None
+        if not matches:
+            print(f"No collection matching '{query}'. Type 'collections' to list them.")
+            return None
+        return matches[0]
+
+    def handlePackEV(self, args: str = ""):
+        """Handle the 'packev <collection>' command - simulate pack openings and show expected value"""
+        options = self.parseArgs("packev", args)
+        if options is None:
+            return
+        if not pack_ev.available():
+            print("packev needs NumPy. Install it with: pip install numpy")
+            return
+
+        try:
+            collection = self.findCollection(" ".join(options.collection))
+            if collection is None:
+                return
+            pack_price = collection.get("price", 0)
+
+            # Resale values come from what sellers currently ask for each grade in this collection
+            listings = {
+                grade: self.api_client.getOpenTrades(
+                    limit=100, type="FOR_PRICE", collectionId=collection["id"], grade=grade
+                )
+                for grade in pack_ev.GRADES
+            }
+            values = pack_ev.marketValues(listings, pack_price)
+            odds = options.odds or pack_ev.GRADE_ODDS
+
+            result = pack_ev.simulate(pack_price, values, odds, packs=options.packs, seed=options.seed)
+            counts = {grade: sum(1 for trade in listings[grade] if trade.get("price")) for grade in pack_ev.GRADES}
+            self.display.showPackEV(self.transformPackEV(collection, result, values, odds, counts))
+
+        except Exception as e:
+            print(f"Error simulating packs: {e}")
+
+    def loadCompletionPlan(self, collection: dict, total: int, missing: int) -> dict:
+        """
+        Price the buy-listings path for one collection
+
+        Listings are matched to vehicles via their card details; vehicles the
+        user owns are dropped, leaving the cheapest listing per missing vehicle.
+        """
+        listings = self.api_client.getOpenTrades(
+            limit=100, type="FOR_PRICE", collectionId=collection["id"], sortBy="price_asc"
+        )
+        cards = self.api_client.getCardsById(trade.get("cardId") for trade in listings)
+        owned = {card.get("vehicleId") for card in self.api_client.getUserCards(collection_id=collection["id"], limit=1000)}
+        prices = [price for vehicle_id, price in completion.cheapestListings(listings, cards).items()
+                  if vehicle_id not in owned]
+
+        plan = {"listed": len(prices), "unlisted": max(0, missing - len(prices)), "buy_cost": sum(prices)}
+        if prices:
+            plan["mix_buy"], plan["mix_cost"] = completion.bestMix(total, missing, collection.get("price", 0), prices)
+        return plan
+
+    def handleComplete(self, args: str = ""):
+        """Handle the 'complete [collection]' command - estimate the cost of completing collections"""
+        options = self.parseArgs("complete", args)
+        if options is None:
+            return
+
+        try:
+            collections = self.api_client.getCollections()
+            if options.collection:
+                collection = self.findCollection(" ".join(options.collection))
+                if collection is None:
+                    return
+                collections = [collection]
+
+            owned = {p["collectionId"]: p.get("ownedVehicles", 0) for p in self.api_client.getCollectionProgress()}
+            sizes = [(c.get("cardCount", 0), max(0, c.get("cardCount", 0) - owned.get(c["id"], 0))) for c in collections]
+
+            # One vectorized run covers every collection; without NumPy only the closed form is shown
+            simulated = None
+            if completion.available() and any(missing for _, missing in sizes):
+                simulated = completion.summarize(completion.simulatePacks(sizes, options.trials, options.seed))
+
+            rows = []
+            for index, (collection, (total, missing)) in enumerate(zip(collections, sizes)):
+                price = collection.get("price", 0)
+                expected = completion.expectedPacks(total, missing)
+                rows.append({
+                    "name": collection.get("name", "Unknown Collection"),
+                    "owned": total - missing,
+                    "total": total,
+                    "pack_price": price,
+                    "packs": expected,
+                    "cost": expected * price,
+                    "sim_packs": simulated[index]["mean"] if simulated else None,
+                    "p90_cost": simulated[index]["p90"] * price if simulated else None
+                })
+
+            plan = None
+            if options.collection and sizes[0][1]:
+                plan = self.loadCompletionPlan(collections[0], *sizes[0])
+
+            self.display.showCompletion(rows, plan)
+
+        except Exception as e:
+            print(f"Error estimating completion cost: {e}")
+
+    def getTradeHistory(self):
+        """Open the local trade history on first use"""
+        if self.trade_history is None:
+            self.trade_history = TradeHistory(HISTORY_DIR)
+        return self.trade_history
+
+    def getCandleStore(self):
+        """Open the on-disk candle store on first use"""
+        if self.candle_store is None:
+            self.candle_store = CandleStore(CANDLE_DIR, self.getTradeHistory())
+        return self.candle_store
+
+    def handleSync(self):
+        """Handle the 'sync' command - bring the local trade history up to date"""
+        try:
+            history = self.getTradeHistory()
+            new_trades = history.sync(self.api_client)
+            print(f"Synced {len(new_trades)} new trades ({history.pages_fetched} pages fetched); "
+                  f"{len(history):,} trades stored locally.\n")
+        except Exception as e:
+            print(f"Error syncing trade history: {e}")
+
+    def handleCandles(self, args: str = ""):
+        """Handle the 'candles <vehicle>' command - OHLC price bars from completed trades"""
+        options = self.parseArgs("candles", args)
+        if options is None:
+            return
+
+        try:
+            query = " ".join(options.vehicle)
+            results = self.getSearchIndex().search(query, limit=1)
+            if not results:
+                print(f"No vehicle matching '{query}'.\n")
+                return
+            vehicle = results[0]
+
+            # Fold in only the trades completed since the last refresh
+            store = self.getCandleStore()
+            new_trades = store.refresh(self.api_client)
+            grade = options.grade or ALL_GRADES
+            candles = store.candles(vehicle["id"], grade, options.interval, options.last)
+
+            self.display.showCandles({
+                "name": vehicle["name"],
+                "grade": grade,
+                "interval": options.interval,
+                "candles": [candle.toDict() for candle in candles],
+                "new_trades": new_trades
+            })
+
+        except Exception as e:
+            print(f"Error building candles: {e}")
+
+    def handleAudit(self, args: str = ""):
+        """Handle the 'audit' command - cross-check the trade ledger against card ownership"""
+        options = self.parseArgs("audit", args)
+        if options is None:
+            return
+
+        try:
+            print("Auditing trade history against card ownership...")
+            report = audit.runAudit(self.api_client, self.getTradeHistory(),
+                                    partitions=options.partitions, fetch_workers=options.workers)
+            self.display.showAudit(report)
+        except Exception as e:
+            print(f"Error auditing trades: {e}")
+
+    def handleCatalog(self, args: str = ""):
+        """Handle the 'catalog [card-id]' command - local card lookups and catalog status"""
+        options = self.parseArgs("catalog", args)
+        if options is None:
+            return
+        catalog = self.api_client.catalog
+        if catalog is None:
+            print("The local card catalog is not enabled in this session.\n")
+            return
+
+        try:
+            if options.sync:
+                start = time.perf_counter()
+                count = catalog.sync(self.api_client)
+                print(f"Catalog rebuilt: {count:,} cards in {time.perf_counter() - start:.1f}s.\n")
+
+            if options.card_id:
+                start = time.perf_counter()
+                card = catalog.lookup(options.card_id)
+                elapsed = time.perf_counter() - start
+                if card is None:
+                    print(f"Card {options.card_id} is not in the local catalog.\n")
+                    return
+                self.display.showCards([self.transformCard(card)])
+                print(f"Found locally in {elapsed * 1e6:,.0f} µs.\n")
+            elif not options.sync:
+                self.display.showCatalog({
+                    "cards": len(catalog),
+                    "built_at": catalog.built_at,
+                    "path": catalog.path,
+                    "error": catalog.last_error,
+                    "missing": self.api_client.missing_cards.stats()
+                })
+        except Exception as e:
+            print(f"Error using the card catalog: {e}")
+
     def handleShop(self):
         """Handle the 'shop' command - fetch and display available packs"""
         try:
@@ -218,7 +848,9 @@ Available Commands:
     def handleCollections(self):
         """Handle the 'collections' command - fetch and display all collections"""
         try:
-            collections = self.api_client.getCollections()
+            collections = self.takePrefetched("collections")
+            if collections is None:
+                collections = self.api_client.getCollections()
             
             # Transform collections to display format
             transformed_collections = [self.transformCollection(c) for c in collections]
@@ -237,28 +869,97 @@ Available Commands:
     def processCommand(self, command):
 
         """Process a user command and return True to continue, False to exit"""
-        command = command.strip().lower()
+        parts = command.strip().split(maxsplit=1)
+        command = parts[0].lower() if parts else ''
+        args = parts[1] if len(parts) > 1 else ''
+
+        if command == 'profile':
+            return self.handleProfile(args)
+        if self.profile_all and command not in ('', 'exit'):
+            return self.handleProfile(' '.join(parts))
+
+        return self.dispatchCommand(command, args)
+
+    def dispatchCommand(self, command, args=''):
+
+        """Run a parsed command and return True to continue, False to exit"""
+        if self.prefetcher is not None and command:
+            self.prefetcher.recordCommand(command)
         
+        if command == '':
+            return True  # Ignore empty commands
         if command == 'exit':
             return False
-        elif command == 'help':
-            self.showHelp()
-        elif command == 'trades':
-            self.handleTrades()
-        elif command == 'open':
-            self.handleOpen()
-        elif command == 'vroom':
-            self.handleVroom()
-        elif command == 'shop':
-            self.handleShop()
-        elif command == 'collections':
-            self.handleCollections()
-        elif command == '':
-            pass  # Ignore empty commands
-        else:
-            print(f"Unknown command: '{command}'. Type 'help' for available commands.")
+
+        with self.tracer.span(f"command {command}", args=args):
+            if command == 'help':
+                self.showHelp()
+            elif command == 'trades':
+                self.handleTrades()
+            elif command == 'open':
+                self.handleOpen(args)
+            elif command == 'cards':
+                self.handleCards(args)
+            elif command == 'garage':
+                self.handleGarage(args)
+            elif command == 'search':
+                self.handleSearch(args)
+            elif command == 'dashboard':
+                self.handleDashboard()
+            elif command == 'vroom':
+                self.handleVroom()
+            elif command == 'packev':
+                self.handlePackEV(args)
+            elif command == 'complete':
+                self.handleComplete(args)
+            elif command == 'candles':
+                self.handleCandles(args)
+            elif command == 'sync':
+                self.handleSync()
+            elif command == 'audit':
+                self.handleAudit(args)
+            elif command == 'catalog':
+                self.handleCatalog(args)
+            elif command == 'shop':
+                self.handleShop()
+            elif command == 'collections':
+                self.handleCollections()
+            else:
+                print(f"Unknown command: '{command}'. Type 'help' for available commands.")
         
         return True
+
+    def handleProfile(self, command_line: str):
+        """
+        Handle 'profile <command>' - run a command under cProfile, tracemalloc and a stack sampler
+
+        Prefetched data is bypassed so the report reflects the command's real
+        network, transform and render cost.
+
+        Returns:
+            bool: The profiled command's continue flag
+        """
+        parts = command_line.strip().split(maxsplit=1)
+        if not parts or parts[0].lower() == 'profile':
+            print("Usage: profile <command> [args], e.g. 'profile trades'")
+            return True
+        command = parts[0].lower()
+        args = parts[1] if len(parts) > 1 else ''
+
+        prefetcher, self.prefetcher = self.prefetcher, None
+        try:
+            result = profileCall(lambda: self.dispatchCommand(command, args), PROFILE_DIR, label=command)
+        finally:
+            self.prefetcher = prefetcher
+        if prefetcher is not None:
+            prefetcher.recordCommand(command)
+
+        print(f"\nProfiled '{command}': {result.wall_time:.3f}s wall, "
+              f"{result.peak_bytes / 1024:,.1f} KiB peak traced memory")
+        for kind, path in result.paths.items():
+            print(f"  {kind:<9} {path}")
+        print(f"  {'missing':<9} {Display.formatMissingCards(self.api_client.missing_cards.stats())}")
+        return result.value
     
     def run(self):
         """Main CLI loop"""
@@ -286,18 +987,26 @@ Available Commands:
                 print(self.EXIT_MESSAGE)
                 return
         
-        # Main command loop
+        # Main command loop, prefetching likely data while waiting for input
+        self.startPrefetcher()
+        if self.api_client.catalog is not None:
+            # Full /cards scans run in their own slow lane, away from the limiter commands use
+            self.api_client.catalog.startSync(self.api_client.backgroundClient())
         self.running = True
-        while self.running:
-            try:
-                command = input("cardex> ").strip()
-                self.running = self.processCommand(command)
-            except KeyboardInterrupt:
-                print(self.EXIT_MESSAGE)
-                return
-            except EOFError:
-                print(self.EXIT_MESSAGE)
-                return
+        try:
+            while self.running:
+                try:
+                    command = input("cardex> ").strip()
+                    with self.prefetcher.foreground() if self.prefetcher is not None else nullcontext():
+                        self.running = self.processCommand(command)
+                except KeyboardInterrupt:
+                    print(self.EXIT_MESSAGE)
+                    return
+                except EOFError:
+                    print(self.EXIT_MESSAGE)
+                    return
+        finally:
+            self.stopPrefetcher()
         
         print("Goodbye!")
 
@@ -305,8 +1014,38 @@ Available Commands:
 # Run the app.
 def main():
 
-    cli = CLIClient()
-    cli.run()
+    parser = argparse.ArgumentParser(description="CarDex Live Market CLI")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"profile every command (reports are written to {PROFILE_DIR})")
+    parser.add_argument("--trace", metavar="FILE", default=TRACE_FILE,
+                        help="append request spans to FILE as JSON lines (default: $CARDEX_TRACE)")
+    parser.add_argument("--api", metavar="URL", action="append",
+                        help="API replica to use; repeat to balance over several (default: $CARDEX_API_URLS)")
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument("--record", metavar="FILE", help="record every request and response to a cassette")
+    recording.add_argument("--replay", metavar="FILE", help="serve responses from a cassette instead of the server")
+    parser.add_argument("--replay-speed", type=float, default=1.0, metavar="X",
+                        help="replay latency speed-up (1 = original timing, 0 = no waiting)")
+    options = parser.parse_args()
+
+    cassette = None
+    if options.record:
+        cassette = CassetteRecorder(options.record)
+    elif options.replay:
+        cassette = CassettePlayer(options.replay, speed=options.replay_speed)
+
+    # A cassette session skips the on-disk catalog cache and card catalog, so recording and replay see the same requests
+    tracer = Tracer(JsonLinesExporter(options.trace) if options.trace else None)
+    api_client = APIClient(cache_dir=None if cassette else CACHE_DIR, tracer=tracer, cassette=cassette,
+                           base_urls=None if options.replay else (options.api or API_URLS or None),
+                           catalog=None if cassette else CardCatalog(CATALOG_PATH))
+    cli = CLIClient(api_client=api_client, profile=options.profile, tracer=tracer)
+    try:
+        cli.run()
+    finally:
+        api_client.close()
+        if cassette is not None:
+            cassette.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+Live market dashboard for CarDex CLI
+Full-screen curses view that redraws only the cells that changed
+"""
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import curses
+except ImportError:  # e.g. Windows without windows-curses
+    curses = None
+
+from cli_display import Display
+
+# Seconds between market data refreshes
+DASHBOARD_REFRESH = 5.0
+# Seconds between screen updates / key polls
+DASHBOARD_TICK = 0.1
+# Unchanged gaps up to this many cells are rewritten rather than skipped with a cursor move
+MERGE_GAP = 3
+
+# (row, col, text) to write at that position
+Change = Tuple[int, int, str]
+
+
+def fit(text: str, width: int) -> str:
+    """Truncate or pad text to exactly width cells"""
+    return text[:width].ljust(width)
+
+
+def renderFrame(width: int, height: int, data: Dict, status: str = "") -> List[str]:
+    """
+    Lay out the dashboard as a list of exactly `height` lines of `width` cells
+
+    Args:
+        data: open_trades / completed_trades / collections, in Display format
+        status: Text for the bottom status bar
+
+    Returns:
+        List[str]: Screen lines
+    """
+    lines = [fit(" CARDEX LIVE MARKET ".center(width, "═"), width)]
+
+    def section(title: str, rows: List[str], empty: str):
+        lines.append(fit("", width))
+        lines.append(fit(f" {title} ".ljust(width, "─"), width))
+        for row in rows or [f"  {empty}"]:
+            lines.append(fit(row, width))
+
+    section("OPEN TRADES", [
+        f"  {Display.formatGrade(t['grade']):<6} {t['vehicle']:<28} {t['seller_username']:<18} "
+        + (f"©{t['price']:,}" if t['type'] == 'FOR_PRICE' else f"wants {t.get('want_vehicle') or 'Any Card'}")
+        for t in data.get("open_trades", [])
+    ], "No open trades")
+
+    section("RECENT TRADES", [
+        f"  {Display.formatGrade(t['grade']):<6} {t['vehicle']:<28} {t['buyer_username']:<18} "
+        f"©{t['price']:<9,} {Display.formatTimeAgo(t['executed_date'])}"
+        for t in data.get("completed_trades", [])
+    ], "No completed trades")
+
+    section("COLLECTIONS", [
+        f"  {c['name']:<36} ©{c['pack_price']:<10,} {c['vehicle_count']} vehicles"
+        for c in data.get("collections", [])
+    ], "No collections")
+
+    lines = lines[:height - 1]
+    lines += [fit("", width)] * (height - 1 - len(lines))
+    lines.append(fit(f" {status}", width))
+    return lines
+
+
+def diffFrames(old: List[str], new: List[str], gap: int = MERGE_GAP) -> List[Change]:
+    """
+    Compute the writes needed to turn the old screen into the new one
+
+    Changed cells on a row are grouped into runs; runs separated by at most
+    `gap` unchanged cells are merged, since rewriting a few cells is cheaper
+    than another cursor move.
+
+    Returns:
+        List[Change]: (row, col, text) writes, empty if nothing changed
+    """
+    changes = []
+    for row, line in enumerate(new):
+        prev = old[row] if row < len(old) else ""
+        if line == prev:
+            continue
+
+        width = max(len(line), len(prev))
+        line = line.ljust(width)
+        prev = prev.ljust(width)
+
+        start = last = None
+        for col in range(width):
+            if line[col] == prev[col]:
+                continue
+            if start is None:
+                start = col
+            elif col - last > gap + 1:
+                changes.append((row, start, line[start:last + 1]))
+                start = col
+            last = col
+        if start is not None:
+            changes.append((row, start, line[start:last + 1]))
+
+    for row in range(len(new), len(old)):
+        changes.append((row, 0, " " * len(old[row])))
+
+    return changes
+
+
+class Dashboard:
+    """
+    Full-screen market view refreshed in the background
+
+    Market data is loaded on a worker thread every `refresh` seconds, while
+    the screen loop re-renders the frame each tick and writes only the
+    cells that differ from what is already on screen. With refresh=None
+    (e.g. replaying a cassette) the data is loaded once up front and again
+    only when the user presses r, with no background thread.
+    """
+
+    def __init__(self, load_data: Callable[[], Dict], refresh: Optional[float] = DASHBOARD_REFRESH,
+                 tick: float = DASHBOARD_TICK):
+        self.load_data = load_data
+        self.refresh = refresh
+        self.tick = tick
+
+        self.data: Dict = {}
+        self.updated_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.frame: List[str] = []
+        self.cells_written = 0
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    @staticmethod
+    def available() -> bool:
+        """Whether curses is available on this platform"""
+        return curses is not None
+
+    def run(self):
+        """Run the dashboard until the user presses q"""
+        curses.wrapper(self._main)
+
+    def status(self) -> str:
+        """Status bar text"""
+        if self.error:
+            state = f"refresh failed: {self.error}"
+        elif self.updated_at:
+            state = f"updated {self.updated_at:%H:%M:%S}"
+        else:
+            state = "loading..."
+        if self.refresh is None:
+            return f"{state}  |  r = refresh, q = quit"
+        return f"{state}  |  refresh every {self.refresh:g}s  |  r = refresh now, q = quit"
+
+    def draw(self, screen, width: int, height: int):
+        """Render the current data and write only the changed cells"""
+        frame = renderFrame(width, height, self.data, self.status())
+        for row, col, text in diffFrames(self.frame, frame):
+            try:
+                screen.addstr(row, col, text)
+            except Exception:
+                # Writing the bottom-right cell moves the cursor off screen; the text is still drawn
+                pass
+            self.cells_written += len(text)
+        self.frame = frame
+        screen.noutrefresh()
+
+    def load(self):
+        """Load market data once, keeping the last good data if it fails"""
+        try:
+            self.data = self.load_data()
+            self.updated_at = datetime.now()
+            self.error = None
+        except Exception as e:
+            self.error = str(e)
+
+    def _loader(self):
+        while not self._stop.is_set():
+            self.load()
+            self._wake.wait(self.refresh)
+            self._wake.clear()
+
+    def _main(self, screen):
+        curses.curs_set(0)
+        screen.timeout(int(self.tick * 1000))
+
+        if self.refresh is None:
+            self.load()
+        else:
+            threading.Thread(target=self._loader, name="cardex-dashboard", daemon=True).start()
+        try:
+            while True:
+                height, width = screen.getmaxyx()
+                self.draw(screen, width, height)
+                curses.doupdate()
+
+                key = screen.getch()
+                if key in (ord("q"), ord("Q"), 27):
+                    break
+                if key in (ord("r"), ord("R")):
+                    if self.refresh is None:
+                        self.load()
+                    else:
+                        self._wake.set()
+                if key == curses.KEY_RESIZE:
+                    # Terminal contents are unknown after a resize, so repaint everything
+                    screen.erase()
+                    self.frame = []
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            self._wake.set()
@@ -1,8 +1,11 @@
 """
 Display module for CarDex CLI - Handles all output formatting and display
 """
-from typing import List, Dict
-from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime, timezone
+
+# Width of the price-range bar drawn next to each candle
+CANDLE_BAR_WIDTH = 30
 
 # Display helpers
 D_LOGO = """
@@ -120,14 +123,14 @@ class Display:
         
         print("=" * 80 + "\n")
 
-    def showOpenTrades(self, trades: List[Dict]):
+    def showOpenTrades(self, trades: List[Dict], title: str = "OPEN TRADES - Latest 5"):
         """Display open trades in a formatted table"""
         if not trades:
             print("No open trades found.\n")
             return
         
         print("\n" + "=" * 80)
-        print("OPEN TRADES - Latest 5".center(80))
+        print(title.center(80))
         print("=" * 80 + "\n")
         
         for i, trade in enumerate(trades, 1):
@@ -154,8 +157,227 @@ class Display:
         
         print("=" * 80 + "\n")
 
-        
-    
+    def showCards(self, cards: List[Dict]):
+        """Display cards in card-like box format"""
+        if not cards:
+            print("No cards found.\n")
+            return
+
+        print("\n" + "=" * 80)
+        print("CARDS".center(80))
+        print("=" * 80 + "\n")
+
+        for card in cards:
+            stars = self.formatGrade(card['grade'])
+            value = f"©{card['value']}"
+
+            print(f"┌────────────┐")
+            print(f"│ {stars:<10} │")
+            print(f"│            │  {card['vehicle']}")
+            print(f"│  C A R     │  {card['grade']}")
+            print(f"│     D E X  │")
+            print(f"│            │  VALUE")
+            print(f"│ {value:>10} │  ©{card['value']:,}")
+            print(f"└────────────┘")
+            print()
+
+        print("=" * 80 + "\n")
+
+    @staticmethod
+    def showGarage(cards: Iterable[Dict]):
+        """Display a user's cards one row at a time, as they are received"""
+        print("\n" + "=" * 80)
+        print("GARAGE".center(80))
+        print("=" * 80)
+        print(f"\n  {'GRADE':<8}{'VEHICLE':<46}{'':<14}{'VALUE':>10}")
+
+        count = 0
+        total = 0
+        for card in cards:
+            count += 1
+            total += card['value']
+            print(f"  {Display.formatGrade(card['grade']):<8}{card['vehicle'][:45]:<46}"
+                  f"{card['grade']:<14}{'©' + format(card['value'], ','):>10}")
+
+        print("\n" + "-" * 80)
+        if count:
+            print(f"  {count:,} cards, worth ©{total:,} in total")
+        else:
+            print("  No cards found.")
+        print("=" * 80 + "\n")
+
+    @staticmethod
+    def showSearchResults(query: str, results: List[Dict]):
+        """Display search hits with their open listings"""
+        if not results:
+            print(f"No cars matching '{query}'.\n")
+            return
+
+        print("\n" + "=" * 80)
+        print(f"SEARCH - '{query}'".center(80))
+        print("=" * 80)
+
+        for i, result in enumerate(results, 1):
+            match = "  (closest match)" if result['fuzzy'] else ""
+            print(f"\n[{i}] {result['name']}{match}")
+            print("-" * 80)
+
+            if not result['listings']:
+                print("  No open listings")
+            for listing in result['listings']:
+                if listing['type'] == 'FOR_PRICE':
+                    asking = f"©{listing['price']:,}"
+                else:
+                    asking = "a card trade"
+                print(f"  {listing['seller_username']:<20} asking for {asking}")
+
+        print("\n" + "=" * 80 + "\n")
+
+    @staticmethod
+    def showPackEV(report: Dict):
+        """Display a pack expected-value simulation"""
+        print("\n" + "=" * 80)
+        print(f"PACK EV - {report['name']}".center(80))
+        print("=" * 80)
+
+        print(f"\n  {'GRADE':<14}{'ODDS':>8}{'AVG VALUE':>14}   SOURCE")
+        for grade in report['grades']:
+            print(f"  {Display.formatGrade(grade['grade']):<6}{grade['grade']:<8}{grade['odds'] * 100:>7.1f}%"
+                  f"{'©' + format(round(grade['avg_value']), ','):>14}   {grade['source']}")
+
+        ev = report['ev']
+        print("\n" + "-" * 80)
+        print(f"  Pack price           ©{report['pack_price']:,}")
+        print(f"  Expected value       ©{report['mean']:,.0f}  (± ©{report['stderr']:,.0f}, exact ©{report['expected']:,.0f})")
+        print(f"  Expected profit      {'+' if ev >= 0 else '-'}©{abs(ev):,.0f} per pack")
+        print(f"  Std deviation        ©{report['std']:,.0f}")
+        print(f"  Chance of profit     {report['p_profit'] * 100:.1f}%")
+        print(f"  Pack value 5/50/95%  ©{report['p5']:,.0f} / ©{report['p50']:,.0f} / ©{report['p95']:,.0f}")
+        print("-" * 80)
+        print(f"  {report['packs']:,} packs simulated in {report['seconds'] * 1000:.0f} ms")
+        print("=" * 80 + "\n")
+
+    @staticmethod
+    def candleBar(candle: Dict, low: int, high: int, width: int = CANDLE_BAR_WIDTH) -> str:
+        """Low-high wick with an open-close body, scaled to [low, high]"""
+        def position(price):
+            return round((price - low) / (high - low) * (width - 1)) if high > low else width // 2
+
+        bar = [" "] * width
+        for i in range(position(candle['low']), position(candle['high']) + 1):
+            bar[i] = "─"
+        body = sorted((position(candle['open']), position(candle['close'])))
+        for i in range(body[0], body[1] + 1):
+            bar[i] = "█" if candle['close'] >= candle['open'] else "▒"
+        return "".join(bar)
+
+    @staticmethod
+    def showCandles(report: Dict):
+        """Display a vehicle's OHLC price candles, oldest first"""
+        print("\n" + "=" * 80)
+        print(f"{report['name']} - {report['grade']} - {report['interval']}".center(80))
+        print("=" * 80)
+
+        candles = report['candles']
+        if not candles:
+            print("\n  No completed trades for this vehicle yet.")
+        else:
+            low = min(c['low'] for c in candles)
+            high = max(c['high'] for c in candles)
+            date_format = "%Y-%m-%d %H:%M" if report['interval'].endswith("h") else "%Y-%m-%d"
+            print(f"\n  {'TIME (UTC)':<17}{'OPEN':>8}{'HIGH':>8}{'LOW':>8}{'CLOSE':>8}{'VOL':>5}  "
+                  f"©{low:,} .. ©{high:,}")
+            for candle in candles:
+                when = datetime.fromtimestamp(candle['start'], timezone.utc).strftime(date_format)
+                print(f"  {when:<17}{candle['open']:>8,}{candle['high']:>8,}{candle['low']:>8,}"
+                      f"{candle['close']:>8,}{candle['volume']:>5}  {Display.candleBar(candle, low, high)}")
+
+        print("\n" + "-" * 80)
+        print(f"  {report['new_trades']} new trades folded in since the last refresh")
+        print("=" * 80 + "\n")
+
+    @staticmethod
+    def showAudit(report: Dict):
+        """Display trade ledger audit totals and sample findings"""
+        print("\n" + "=" * 80)
+        print("TRADE LEDGER AUDIT".center(80))
+        print("=" * 80)
+        timings = report['timings']
+        print(f"\n  {report['trades']:,} trades by {report['users']:,} users, "
+              f"{report['owned']:,} cards held by them, {report['partitions']} partitions")
+        print(f"  trades {timings['trades']:.1f}s   ownership {timings['ownership']:.1f}s   "
+              f"check {timings['check']:.1f}s")
+
+        print(f"\n  {'FINDING':<18}{'COUNT':>8}")
+        for kind, count in report['counts'].items():
+            print(f"  {kind:<18}{count:>8,}")
+
+        if report['findings']:
+            print("\n" + "-" * 80)
+            for finding in report['findings']:
+                print(f"  {finding['kind']:<18}card {finding['cardId']}")
+                print(f"  {'':<18}{finding['detail']}")
+        print("\n" + "-" * 80)
+        total = sum(report['counts'].values())
+        print(f"  {report['cards']:,} cards checked - " + (f"{total:,} problems found" if total else "no problems found"))
+        print("=" * 80 + "\n")
+
+    @staticmethod
+    def showCatalog(status: Dict):
+        """Display the local card catalog's size and age"""
+        print("\n" + "=" * 80)
+        print("CARD CATALOG".center(80))
+        print("=" * 80)
+        if status['built_at'] is None:
+            print("\n  Not built yet - it builds in the background, or run 'catalog --sync'.")
+        else:
+            built = Display.formatTimeAgo(datetime.fromtimestamp(status['built_at']))
+            print(f"\n  {status['cards']:,} cards, built {built}")
+        print(f"  {status['path']}")
+        if status['error'] is not None:
+            print(f"  Last background sync failed: {status['error']}")
+        print(f"\n  {Display.formatMissingCards(status['missing'])}")
+        print("=" * 80 + "\n")
+
+    @staticmethod
+    def formatMissingCards(stats: Dict) -> str:
+        """One line summarising the negative cache of cards the server said do not exist"""
+        return (f"{stats['entries']:,} cards known to be missing; {stats['short_circuits']:,} of "
+                f"{stats['checks']:,} lookups answered without a request")
+
+    @staticmethod
+    def showCompletion(rows: List[Dict], plan: Optional[Dict] = None):
+        """Display estimated cost of completing collections, and for one collection the buy path"""
+        if not rows:
+            print("No collections available.\n")
+            return
+
+        print("\n" + "=" * 80)
+        print("COLLECTION COMPLETION COST".center(80))
+        print("=" * 80)
+        print(f"\n  {'COLLECTION':<26}{'OWNED':>9}{'PACKS':>9}{'SIMULATED':>11}{'EXP. COST':>12}{'90% WITHIN':>13}")
+
+        for row in rows:
+            owned = f"{row['owned']}/{row['total']}"
+            if row['owned'] >= row['total']:
+                print(f"  {row['name'][:25]:<26}{owned:>9}   complete!")
+                continue
+            simulated = f"{row['sim_packs']:,.1f}" if row['sim_packs'] is not None else "-"
+            p90 = f"©{row['p90_cost']:,.0f}" if row['p90_cost'] is not None else "-"
+            print(f"  {row['name'][:25]:<26}{owned:>9}{row['packs']:>9,.1f}{simulated:>11}"
+                  f"{'©' + format(round(row['cost']), ','):>12}{p90:>13}")
+
+        if plan is not None:
+            print("\n" + "-" * 80)
+            print(f"  Buying the cheapest open listings: ©{plan['buy_cost']:,} for {plan['listed']} vehicles")
+            if plan['unlisted']:
+                print(f"  {plan['unlisted']} missing vehicles have no open listing and must come from packs")
+            elif 'mix_buy' in plan:
+                print(f"  Cheapest mix: open packs until {plan['mix_buy']} missing, then buy them "
+                      f"(about ©{plan['mix_cost']:,.0f})")
+
+        print("\n" + "=" * 80 + "\n")
+
     @staticmethod
     def showPacks(packs: List[Dict]):
         """Display available packs"""
@@ -0,0 +1,135 @@
+"""
+Collection completion cost estimator for CarDex CLI
+Coupon-collector maths for finishing collections by opening packs, buying listings, or both
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from pack_ev import CARDS_PER_PACK
+
+DEFAULT_TRIALS = 20_000
+# Trials simulated per batch, bounding memory when many collections are evaluated at once
+BATCH_TRIALS = 2_000
+
+EULER_GAMMA = 0.5772156649015329
+
+
+def available() -> bool:
+    """Whether NumPy is installed (needed for simulation, not for the closed form)"""
+    return np is not None
+
+
+def harmonic(m: int) -> float:
+    """H_m = 1 + 1/2 + ... + 1/m, exact for small m and asymptotic for large m"""
+    if m <= 0:
+        return 0.0
+    if m <= 1000:
+        return math.fsum(1 / i for i in range(1, m + 1))
+    return math.log(m) + EULER_GAMMA + 1 / (2 * m) - 1 / (12 * m * m)
+
+
+def expectedDraws(total: int, missing: int, remaining: int = 0) -> float:
+    """
+    Expected cards to pull until only `remaining` of the `missing` vehicles are still missing
+
+    Each card is a uniform draw over `total` vehicles, so with i vehicles
+    missing the next new one takes total / i draws on average:
+    total * (H_missing - H_remaining).
+    """
+    return total * (harmonic(missing) - harmonic(remaining))
+
+
+def expectedPacks(total: int, missing: int, cards: int = CARDS_PER_PACK) -> float:
+    """Closed-form approximation of the packs needed to complete a collection"""
+    return expectedDraws(total, missing) / cards
+
+
+def simulatePacks(collections: Sequence[Tuple[int, int]], trials: int = DEFAULT_TRIALS,
+                  seed: Optional[int] = None, cards: int = CARDS_PER_PACK) -> "np.ndarray":
+    """
+    Simulate packs needed to complete several collections at once
+
+    The draws to finish a collection are a sum of independent geometric
+    variables (p = i/total for i = missing..1), so every collection's
+    variables sit side by side in one matrix and np.add.reduceat sums each
+    collection's block per trial.
+
+    Args:
+        collections: (total vehicles, missing vehicles) per collection
+
+    Returns:
+        np.ndarray: Packs per trial, shape (trials, len(collections)); 0 for complete collections
+    """
+    rng = np.random.default_rng(seed)
+    probs = np.concatenate([
+        np.arange(1, missing + 1, dtype=np.float64) / total
+        for total, missing in collections
+    ] or [np.empty(0)])
+    sizes = np.array([missing for _, missing in collections])
+    active = np.flatnonzero(sizes)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))[active]
+
+    packs = np.zeros((trials, len(collections)), dtype=np.int64)
+    if not len(active):
+        return packs
+    for offset in range(0, trials, BATCH_TRIALS):
+        count = min(BATCH_TRIALS, trials - offset)
+        draws = rng.geometric(probs, size=(count, len(probs)))
+        packs[offset:offset + count, active] = -(-np.add.reduceat(draws, starts, axis=1) // cards)
+    return packs
+
+
+def cheapestListings(listings: Sequence[Dict], cards: Dict[str, Dict]) -> Dict[str, int]:
+    """
+    Cheapest asking price per vehicle
+
+    Args:
+        listings: Open FOR_PRICE trades
+        cards: Card details keyed by card ID (for each listing's vehicleId)
+
+    Returns:
+        Dict[str, int]: Vehicle ID to lowest price
+    """
+    cheapest = {}
+    for trade in listings:
+        vehicle_id = (cards.get(trade.get("cardId")) or {}).get("vehicleId")
+        price = trade.get("price")
+        if vehicle_id and price and price < cheapest.get(vehicle_id, float("inf")):
+            cheapest[vehicle_id] = price
+    return cheapest
+
+
+def bestMix(total: int, missing: int, pack_price: int, listing_prices: Sequence[int],
+            cards: int = CARDS_PER_PACK) -> Tuple[int, float]:
+    """
+    Cheapest plan of the form "open packs until j vehicles are missing, then buy those j"
+
+    Which j vehicles are left is random, so each is assumed to cost the
+    average listing price of the missing vehicles.
+
+    Returns:
+        (j, expected cost): j = 0 means only packs, j = missing means only listings
+    """
+    average = sum(listing_prices) / len(listing_prices) if listing_prices else float("inf")
+    plans = [
+        (j, pack_price * expectedDraws(total, missing, j) / cards + j * average)
+        for j in range(missing + 1)
+    ]
+    return min(plans, key=lambda plan: plan[1])
+
+
+def summarize(packs: "np.ndarray") -> List[Dict[str, float]]:
+    """
+    Mean and percentiles of simulated packs per collection
+
+    Returns:
+        List[Dict]: mean, p50 and p90 packs per collection (same order as simulated)
+    """
+    means = packs.mean(axis=0)
+    p50, p90 = np.percentile(packs, (50, 90), axis=0)
+    return [{"mean": float(m), "p50": float(a), "p90": float(b)} for m, a, b in zip(means, p50, p90)]
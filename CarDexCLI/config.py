@@ -1,6 +1,7 @@
 """
 Global datatypes and configs.
 """
+import os
 
 USER_NAME   = "username"
 USER_GARAGE = "cards"
@@ -10,4 +11,25 @@ CARD_GRADE = "grade"
 CARD_NAME  = "name"
 
 TRADE_LIST_DATE = "createdAt"
-TRADE_EXEC_DATE = "executedDate"
\ No newline at end of file
+TRADE_EXEC_DATE = "executedDate"
+
+# Local state (catalog cache etc.), override with CARDEX_HOME
+CACHE_DIR = os.environ.get("CARDEX_HOME", os.path.join(os.path.expanduser("~"), ".cardex"))
+
+# Reports written by `profile <command>` / --profile
+PROFILE_DIR = os.path.join(CACHE_DIR, "profiles")
+
+# Local copy of the completed trade history, kept fresh by delta syncs
+HISTORY_DIR = os.path.join(CACHE_DIR, "history")
+
+# Price candles built by `candles`
+CANDLE_DIR = os.path.join(CACHE_DIR, "candles")
+
+# Memory-mapped catalog of every card, rebuilt in the background when stale
+CATALOG_PATH = os.path.join(CACHE_DIR, "cards.cat")
+
+# Comma-separated API replicas to balance requests over (unset = the default server)
+API_URLS = [url.strip() for url in os.environ.get("CARDEX_API_URLS", "").split(",") if url.strip()]
+
+# Append request spans to this JSON-lines file (unset = tracing not exported)
+TRACE_FILE = os.environ.get("CARDEX_TRACE")
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Full-catalog export of /cards
+Fetches the catalog in shards on a worker pool and merges them into one sorted file
+
+The catalog is split into offset ranges of /cards (optionally one set of
+ranges per grade or per collection). Workers fetch shards concurrently and
+write each one, sorted by card ID, to its own gzip file; the shards are
+then k-way merged into a single gzip JSON-lines file sorted by card ID.
+Finished shards are kept until the merge succeeds, so a rerun after a
+failure only fetches the shards that are missing. Shards are named by their
+filters and offset range, and the shard directory holds a manifest of the
+plan (sharding, counts and shard names): a rerun reuses shards only if it
+plans exactly the same export, and otherwise starts over.
+
+Usage:
+    python dump_cards.py                                        # 8 workers -> cards.jsonl.gz
+    python dump_cards.py --workers 32 --output snapshot.jsonl.gz
+    python dump_cards.py --by collection --shard-size 5000
+"""
+import argparse
+import getpass
+import gzip
+import heapq
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import json_codec
+from api_client import APIClient
+from cli_client import positiveInt
+
+GRADES = ("FACTORY", "LIMITED_RUN", "NISMO")
+
+DEFAULT_WORKERS = 8
+DEFAULT_OUTPUT = "cards.jsonl.gz"
+SHARD_SIZE = 10000  # cards per shard (one shard is sorted in memory)
+PAGE_SIZE = 1000    # cards per /cards request within a shard
+SHARD_RETRIES = 2   # extra attempts for a shard whose fetch fails
+GZIP_LEVEL = 5      # shard and output compression (1 fastest - 9 smallest)
+MANIFEST = "plan.json"  # plan of the export the shard directory belongs to
+
+
+class Shard:
+    """One offset range of /cards under a fixed set of filters"""
+
+    def __init__(self, index: int, filters: Dict[str, str], offset: int, limit: int):
+        self.index = index
+        self.filters = filters
+        self.offset = offset
+        self.limit = limit
+
+    @property
+    def name(self) -> str:
+        """File name naming the cards it holds, e.g. shard-grade=NISMO-000020000+10000.jsonl.gz"""
+        filters = "-".join(f"{key}={value}" for key, value in sorted(self.filters.items())) or "all"
+        return f"shard-{filters}-{self.offset:09d}+{self.limit}.jsonl.gz"
+
+
+class DumpStats:
+    """Counters for the throughput report"""
+
+    def __init__(self):
+        self.shards = 0
+        self.reused = 0
+        self.failed: List[Shard] = []
+        self.expected = 0
+        self.fetched = 0
+        self.written = 0
+        self.duplicates = 0
+        self.bytes = 0
+        self.fetch_seconds = 0.0
+        self.merge_seconds = 0.0
+
+
+def planShards(client, by: Optional[str] = None, shard_size: int = SHARD_SIZE) -> List[Shard]:
+    """
+    Split the catalog into shards
+
+    The server orders /cards by ID when no sort is given, so an offset range
+    names the same cards on every request as long as the catalog is not
+    changing underneath the export.
+
+    Args:
+        by: None for plain offset ranges, or "grade" / "collection" to split each filter value separately
+
+    Returns:
+        List[Shard]: Shards covering every card the server counted
+    """
+    if by == "grade":
+        groups = [{"grade": grade} for grade in GRADES]
+    elif by == "collection":
+        groups = [{"collectionId": collection["id"]} for collection in client.getCollections()]
+    elif by is None:
+        groups = [{}]
+    else:
+        raise ValueError(f"Cannot shard by '{by}' (choose grade or collection)")
+
+    shards = []
+    for filters in groups:
+        total = client.countCards(**filters)
+        for offset in range(0, total, shard_size):
+            shards.append(Shard(len(shards), filters, offset, min(shard_size, total - offset)))
+    return shards
+
+
+def preparePlan(directory: str, plan: Dict) -> bool:
+    """
+    Make directory hold shards of this plan only
+
+    Shards left by an earlier run are kept when its manifest matches the
+    plan; otherwise (a different sharding, or the catalog count changed)
+    the directory is emptied.
+
+    Returns:
+        bool: Whether existing shards may be reused
+    """
+    path = os.path.join(directory, MANIFEST)
+    try:
+        with open(path, "rb") as f:
+            if json_codec.loads(f.read()) == plan:
+                return True
+    except (OSError, ValueError):
+        pass
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    with open(path + ".tmp", "wb") as f:
+        f.write(json_codec.dumps(plan))
+    os.replace(path + ".tmp", path)
+    return False
+
+
+def fetchShard(client, shard: Shard, directory: str, page_size: int = PAGE_SIZE) -> Tuple[int, int]:
+    """
+    Download one shard and write it sorted by card ID
+
+    The file is written under a temporary name and renamed when complete,
+    so an existing shard file is always whole.
+
+    Returns:
+        (cards, bytes): Cards written and compressed file size
+    """
+    cards = []
+    offset, end = shard.offset, shard.offset + shard.limit
+    while offset < end:
+        limit = min(page_size, end - offset)
+        page = list(client.streamCards(limit=limit, offset=offset, **shard.filters))
+        cards.extend(page)
+        if len(page) < limit:
+            break  # catalog shrank since it was counted
+        offset += limit
+    cards.sort(key=lambda card: card["id"])
+
+    path = os.path.join(directory, shard.name)
+    with gzip.open(path + ".tmp", "wb", compresslevel=GZIP_LEVEL) as f:
+        f.write(b"".join(json_codec.dumps(card) + b"\n" for card in cards))
+    os.replace(path + ".tmp", path)
+    return len(cards), os.path.getsize(path)
+
+
+def readShard(path: str) -> Iterator[Tuple[str, bytes]]:
+    """Yield (card ID, JSON line) from a shard file"""
+    with gzip.open(path, "rb") as f:
+        for line in f:
+            yield json_codec.loads(line)["id"], line
+
+
+def mergeShards(paths: List[str], output: str) -> Tuple[int, int]:
+    """
+    Merge sorted shard files into one sorted output file
+
+    Only one line per shard is held in memory at a time. A card that appears
+    in two shards (the catalog shifted between pages) is written once.
+
+    Returns:
+        (written, duplicates)
+    """
+    written = duplicates = 0
+    previous = None
+    with gzip.open(output + ".tmp", "wb", compresslevel=GZIP_LEVEL) as out:
+        for card_id, line in heapq.merge(*(readShard(path) for path in paths), key=lambda pair: pair[0]):
+            if card_id == previous:
+                duplicates += 1
+                continue
+            out.write(line)
+            previous = card_id
+            written += 1
+    os.replace(output + ".tmp", output)
+    return written, duplicates
+
+
+def dumpCards(client, output: str = DEFAULT_OUTPUT, workers: int = DEFAULT_WORKERS,
+              shard_size: int = SHARD_SIZE, by: Optional[str] = None, page_size: int = PAGE_SIZE,
+              keep_shards: bool = False) -> DumpStats:
+    """
+    Export every card to output, fetching shards on `workers` threads
+
+    Workers share one API session; pass an unthrottled client (as main()
+    does) so the export scales with the worker count instead of the
+    interactive client's rate limit. Shards are kept next to the
+    output in '<output>.shards/' until they have been merged, and are reused
+    by a rerun only if it plans the same shards over the same counts.
+
+    Returns:
+        DumpStats: Counts and timings; stats.failed lists shards that could not be fetched (nothing is merged then)
+    """
+    stats = DumpStats()
+    directory = output + ".shards"
+
+    start = time.monotonic()
+    shards = planShards(client, by, shard_size)
+    stats.shards = len(shards)
+    stats.expected = sum(shard.limit for shard in shards)
+    preparePlan(directory, {"by": by, "shard_size": shard_size, "count": stats.expected,
+                            "shards": [shard.name for shard in shards]})
+
+    def attempt(shard: Shard) -> Tuple[int, int]:
+        for retry in range(SHARD_RETRIES + 1):
+            try:
+                return fetchShard(client, shard, directory, page_size)
+            except Exception:
+                if retry == SHARD_RETRIES:
+                    raise
+
+    pending = [shard for shard in shards if not os.path.exists(os.path.join(directory, shard.name))]
+    stats.reused = len(shards) - len(pending)
+    if pending:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cardex-dump") as pool:
+            futures = {pool.submit(attempt, shard): shard for shard in pending}
+            for future in as_completed(futures):
+                try:
+                    cards, size = future.result()
+                except Exception:
+                    stats.failed.append(futures[future])
+                    continue
+                stats.fetched += cards
+                stats.bytes += size
+    stats.fetch_seconds = time.monotonic() - start
+    if stats.failed:
+        return stats
+
+    start = time.monotonic()
+    stats.written, stats.duplicates = mergeShards([os.path.join(directory, shard.name) for shard in shards], output)
+    stats.merge_seconds = time.monotonic() - start
+    if not keep_shards:
+        shutil.rmtree(directory, ignore_errors=True)
+    return stats
+
+
+def printReport(stats: DumpStats, output: str, workers: int):
+    """Print shard counts, card counts and throughput"""
+    print("\n" + "=" * 80)
+    print(f"CARD EXPORT - {workers} workers".center(80))
+    print("=" * 80)
+    print(f"  shards      {stats.shards:>12,}   ({stats.reused:,} reused, {len(stats.failed):,} failed)")
+    print(f"  expected    {stats.expected:>12,}   cards counted by the server")
+    print(f"  fetched     {stats.fetched:>12,}   cards in {stats.fetch_seconds:.1f}s"
+          f"   {stats.fetched / max(stats.fetch_seconds, 1e-9):,.0f} cards/s"
+          f"   {stats.bytes / (1024 * 1024) / max(stats.fetch_seconds, 1e-9):.2f} MB/s compressed")
+    if stats.failed:
+        print(f"  failed      {', '.join(shard.name for shard in stats.failed[:5])}"
+              f"{' ...' if len(stats.failed) > 5 else ''}  (rerun to fetch only these)")
+    else:
+        print(f"  written     {stats.written:>12,}   cards to {output} in {stats.merge_seconds:.1f}s"
+              f"   ({stats.duplicates:,} duplicates dropped)")
+    print("=" * 80 + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the full CarDex card catalog")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=f"gzip JSON-lines file (default {DEFAULT_OUTPUT})")
+    parser.add_argument("--workers", type=positiveInt, default=DEFAULT_WORKERS, help=f"parallel shard fetches (default {DEFAULT_WORKERS})")
+    parser.add_argument("--shard-size", type=positiveInt, default=SHARD_SIZE, help=f"cards per shard (default {SHARD_SIZE})")
+    parser.add_argument("--page-size", type=positiveInt, default=PAGE_SIZE, help=f"cards per request (default {PAGE_SIZE})")
+    parser.add_argument("--by", choices=("grade", "collection"), help="shard each grade or collection separately")
+    parser.add_argument("--keep-shards", action="store_true", help="keep shard files after merging")
+    args = parser.parse_args()
+
+    # The worker count is the concurrency limit; the interactive client's limiter would cap it at 20 requests/s
+    client = APIClient(throttle=False)
+    if not client.connect():
+        raise SystemExit(1)
+    username = os.environ.get("CARDEX_USERNAME") or input("[Username]: ")
+    password = os.environ.get("CARDEX_PASSWORD") or getpass.getpass("[Password]: ")
+    if not client.login(username, password):
+        raise SystemExit(1)
+
+    try:
+        stats = dumpCards(client, args.output, args.workers, args.shard_size, args.by, args.page_size, args.keep_shards)
+    finally:
+        client.close()
+    printReport(stats, args.output, args.workers)
+    if stats.failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Normalized entity store for CarDex CLI
+One shared object per card, user and trade, looked up by ID
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Entity kinds
+CARD = "card"
+USER = "user"
+TRADE = "trade"                   # open listings
+COMPLETED_TRADE = "completed_trade"
+
+KINDS = (CARD, USER, TRADE, COMPLETED_TRADE)
+
+# Entities kept per kind (as many as the negative cache's IDs); past that, the least recently used is dropped
+ENTITY_CAPACITY = 100_000
+
+
+class EntityStore:
+    """
+    Identity map: at most one dict per (kind, ID)
+
+    put() returns the canonical object for an entity, updating it in place
+    when the ID is already known, so every trade that refers to a card holds
+    the same dict and sees fresh data as soon as the card is re-fetched.
+    Memory follows the number of distinct entities rather than the number of
+    references, and dropping a stale entity is a single invalidate() call.
+    Each kind holds at most `capacity` entities; the least recently used
+    one is dropped first. Objects already handed out stay valid, but a later
+    put() of a dropped ID starts a new canonical object.
+    """
+
+    def __init__(self, capacity: int = ENTITY_CAPACITY):
+        self.capacity = capacity
+        self.tables: Dict[str, "OrderedDict[str, Dict]"] = {kind: OrderedDict() for kind in KINDS}
+        self.listeners: Dict[str, List[Callable[[Dict], None]]] = {kind: [] for kind in KINDS}
+        self._lock = threading.Lock()
+
+    def table(self, kind: str) -> Dict[str, Dict]:
+        """Live ID -> entity mapping for one kind"""
+        return self.tables[kind]
+
+    def listen(self, kind: str, callback: Callable[[Dict], None]):
+        """Call callback(entity) for every new entity of a kind (from whichever thread stored it, so keep it quick)"""
+        self.listeners[kind].append(callback)
+
+    def get(self, kind: str, entity_id: Optional[str]) -> Optional[Dict]:
+        if not entity_id:
+            return None
+        with self._lock:
+            table = self.tables[kind]
+            entity = table.get(entity_id)
+            if entity is not None:
+                table.move_to_end(entity_id)
+            return entity
+
+    def put(self, kind: str, entity: Dict, entity_id: Optional[str] = None) -> Dict:
+        """
+        Store an entity, merging it into the existing object with the same ID
+
+        Args:
+            entity_id: ID to store under, when the entity has no "id" field
+
+        Returns:
+            Dict: The canonical object (entity itself if it has no ID)
+        """
+        entity_id = entity_id or entity.get("id")
+        if not entity_id:
+            return entity
+        with self._lock:
+            table = self.tables[kind]
+            existing = table.get(entity_id)
+            if existing is not None:
+                table.move_to_end(entity_id)
+                if existing is not entity:
+                    existing.update(entity)
+                return existing
+            table[entity_id] = entity
+            if len(table) > self.capacity:
+                table.popitem(last=False)
+        for callback in self.listeners[kind]:
+            callback(entity)
+        return entity
+
+    def putMany(self, kind: str, entities: Iterable[Dict]) -> List[Dict]:
+        return [self.put(kind, entity) for entity in entities]
+
+    def invalidate(self, kind: str, entity_id: Optional[str] = None):
+        """Forget one entity, or every entity of a kind"""
+        with self._lock:
+            if entity_id is None:
+                self.tables[kind].clear()
+            else:
+                self.tables[kind].pop(entity_id, None)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of distinct entities held per kind"""
+        return {kind: len(table) for kind, table in self.tables.items()}
@@ -0,0 +1,94 @@
+"""
+JSON codec layer for CarDex CLI
+Picks the fastest available JSON library at import time, falling back to stdlib json
+"""
+import importlib
+import json
+from typing import Any, Callable, List, Optional, Union
+
+
+class JSONCodec:
+    """A named pair of JSON decode/encode functions working on bytes"""
+
+    def __init__(self, name: str, loads: Callable[[Union[bytes, str]], Any], dumps: Callable[[Any], bytes]):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self):
+        return f"JSONCodec({self.name})"
+
+
+def _orjsonCodec() -> JSONCodec:
+    orjson = importlib.import_module("orjson")
+    return JSONCodec("orjson", orjson.loads, orjson.dumps)
+
+
+def _ujsonCodec() -> JSONCodec:
+    ujson = importlib.import_module("ujson")
+    return JSONCodec("ujson", ujson.loads, lambda obj: ujson.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+
+def _stdlibCodec() -> JSONCodec:
+    return JSONCodec(
+        "json",
+        json.loads,
+        lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    )
+
+
+# Fastest first; stdlib json is always available
+CODEC_FACTORIES = [_orjsonCodec, _ujsonCodec, _stdlibCodec]
+
+
+def availableCodecs() -> List[JSONCodec]:
+    """
+    Build every codec whose library is installed
+
+    Returns:
+        List[JSONCodec]: Available codecs, fastest first
+    """
+    codecs = []
+    for factory in CODEC_FACTORIES:
+        try:
+            codecs.append(factory())
+        except ImportError:
+            continue
+    return codecs
+
+
+def selectCodec(preferred: Optional[str] = None) -> JSONCodec:
+    """
+    Pick a codec by name, or the fastest available one
+
+    Args:
+        preferred: Codec name to force (e.g. "json"), if installed
+
+    Returns:
+        JSONCodec: Selected codec
+    """
+    codecs = availableCodecs()
+    if preferred:
+        for codec in codecs:
+            if codec.name == preferred:
+                return codec
+    return codecs[0]
+
+
+# Codec used by the whole CLI, chosen once at import time
+CODEC = selectCodec()
+
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """Decode JSON bytes or text with the active codec"""
+    return CODEC.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode an object as compact UTF-8 JSON bytes with the active codec"""
+    return CODEC.dumps(obj)
+
+
+def decodeResponse(response) -> Any:
+    """Decode an HTTP response body with the active codec"""
+    return CODEC.loads(response.content)
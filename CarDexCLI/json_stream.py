@@ -0,0 +1,150 @@
+"""
+Incremental JSON decoding for CarDex CLI
+Yields the items of a named array in a JSON object as the bytes arrive
+"""
+import re
+from typing import Any, Iterable, Iterator, List
+
+import json_codec
+
+# Bytes that change the scanner state outside / inside a string
+_STRUCTURAL = re.compile(rb'[\[\]{}",]')
+_STRING_END = re.compile(rb'["\\]')
+
+_OPENERS = b"[{"
+_CLOSERS = b"]}"
+
+
+class ArrayItemStream:
+    """
+    Incremental parser for one array inside a top-level JSON object
+
+    Feed it raw body chunks and it returns each complete item of the array
+    stored under `key` (e.g. "trades" or "cards") as soon as the item's
+    closing byte has arrived. Bytes of items already returned are discarded,
+    so memory stays proportional to a single item rather than the whole body.
+    """
+
+    def __init__(self, key: str):
+        self.key = key.encode("utf-8")
+        self.buf = bytearray()
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.string_start = None
+        self.last_string = None
+        self.in_array = False
+        self.item_start = None
+        self.finished = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """
+        Consume the next chunk of the body
+
+        Returns:
+            List[Any]: Array items completed by this chunk (possibly empty)
+        """
+        if self.finished or not chunk:
+            return []
+
+        self.buf += chunk
+        items = []
+
+        while not self.finished:
+            if self.in_string:
+                match = _STRING_END.search(self.buf, self.pos)
+                if match is None:
+                    self.pos = len(self.buf)
+                    break
+                if match.group() == b"\\":
+                    # Escape sequence, wait for the escaped byte if it has not arrived yet
+                    if match.end() >= len(self.buf):
+                        self.pos = match.start()
+                        break
+                    self.pos = match.end() + 1
+                    continue
+                self.in_string = False
+                self.pos = match.end()
+                if self.depth == 1:
+                    self.last_string = bytes(self.buf[self.string_start + 1:match.start()])
+                continue
+
+            match = _STRUCTURAL.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                break
+
+            byte = match.group()[0]
+            self.pos = match.end()
+
+            if byte == ord('"'):
+                self.in_string = True
+                self.string_start = match.start()
+            elif byte in _OPENERS:
+                if byte == ord("[") and self.depth == 1 and not self.in_array and self.last_string == self.key:
+                    self.in_array = True
+                    self.item_start = self.pos
+                self.depth += 1
+            elif byte in _CLOSERS:
+                self.depth -= 1
+                if self.in_array and self.depth == 1:
+                    self._emit(match.start(), items)
+                    self.finished = True
+            elif byte == ord(",") and self.in_array and self.depth == 2:
+                self._emit(match.start(), items)
+                self.item_start = self.pos
+
+        self._compact()
+        return items
+
+    def close(self):
+        """
+        Signal the end of the body
+
+        Raises:
+            ValueError: If the body ended before the array was complete
+        """
+        if not self.finished:
+            raise ValueError(f"Response ended before the '{self.key.decode()}' array was complete")
+
+    def _emit(self, end: int, items: List[Any]):
+        """Decode the item between item_start and end, skipping empty arrays"""
+        raw = bytes(self.buf[self.item_start:end]).strip()
+        if raw:
+            items.append(json_codec.loads(raw))
+
+    def _compact(self):
+        """Drop bytes that are no longer needed to finish the current token"""
+        if self.in_array:
+            keep = self.item_start
+        elif self.in_string:
+            keep = self.string_start
+        else:
+            keep = self.pos
+
+        if keep:
+            del self.buf[:keep]
+            self.pos -= keep
+            if self.item_start is not None:
+                self.item_start -= keep
+            if self.string_start is not None:
+                self.string_start -= keep
+
+
+def iterArrayItems(chunks: Iterable[bytes], key: str) -> Iterator[Any]:
+    """
+    Lazily yield the items of the array under `key` from a chunked JSON body
+
+    Args:
+        chunks: Raw body chunks, e.g. response.iter_content()
+        key: Name of the array field in the top-level object
+
+    Returns:
+        Iterator over decoded array items
+    """
+    stream = ArrayItemStream(key)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+        if stream.finished:
+            return
+    stream.close()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Load tool for the CarDex write paths
+Runs simulated players in separate processes, each with its own API session
+
+Every player registers a fresh account and then runs a weighted mix of
+flows (browse the market, buy a pack, open a pack, list a card, buy a
+listing) at a target arrival rate. Per-flow latency and error rates from
+all processes are merged into one report.
+
+Usage:
+    python load_players.py                                  # 4 players, 2 flows/s each, 60 s
+    python load_players.py --players 16 --rate 5 --duration 300
+    python load_players.py --mix browse=1,buy_pack=1,open_pack=1,list_card=2,execute_trade=2
+"""
+import argparse
+import random
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from api_client import APIClient
+from cli_client import positiveFloat, positiveInt
+
+# Relative weight of each flow in the default scenario mix
+DEFAULT_MIX = {
+    "browse": 50,
+    "buy_pack": 15,
+    "open_pack": 15,
+    "list_card": 10,
+    "execute_trade": 10
+}
+
+LOADTEST_PASSWORD = "LoadTest!2345"
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """pct-th percentile of an already sorted list (0 if empty)"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def parseMix(text: str) -> Dict[str, int]:
+    """
+    Parse 'flow=weight,...' into a scenario mix
+
+    Raises:
+        ValueError: On unknown flows or malformed weights
+    """
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown flow '{name}' (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = int(weight)
+    return mix
+
+
+def errorKind(error: Exception) -> str:
+    """Short label for an error, e.g. 'HTTP 409' or 'Timeout'"""
+    response = getattr(error, "response", None)
+    if isinstance(error, requests.exceptions.HTTPError) and response is not None:
+        return f"HTTP {response.status_code}"
+    return type(error).__name__
+
+
+class FlowStats:
+    """Latencies and errors of one flow, mergeable across processes"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+        self.skipped = 0
+
+    def merge(self, other: "FlowStats"):
+        self.latencies.extend(other.latencies)
+        self.errors.update(other.errors)
+        self.skipped += other.skipped
+
+
+class SimulatedPlayer:
+    """
+    One player session driving the market through an APIClient
+
+    The player remembers its unopened packs and unlisted cards, so buying,
+    opening and listing chain together like they would for a real user.
+    """
+
+    def __init__(self, client: APIClient, rng: random.Random, mix: Dict[str, int]):
+        self.client = client
+        self.rng = rng
+        self.flows = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.flows]
+        self.collection_ids: List[str] = []
+        self.packs: List[str] = []
+        self.cards: List[Dict] = []
+        self.actions = {
+            "browse": self.browse,
+            "buy_pack": self.buyPack,
+            "open_pack": self.openPack,
+            "list_card": self.listCard,
+            "execute_trade": self.executeTrade
+        }
+
+    def setup(self):
+        """Load what the player needs to pick targets (collections and its own cards)"""
+        self.collection_ids = [c["id"] for c in self.client.getCollections()]
+        self.cards = self.client.getUserCards(limit=100)
+
+    def pick(self) -> str:
+        """Choose the next flow according to the scenario mix"""
+        return self.rng.choices(self.flows, self.weights)[0]
+
+    def browse(self) -> bool:
+        self.client.getOpenTrades(limit=20)
+        self.client.getCompletedTrades(limit=10)
+        return True
+
+    def buyPack(self) -> bool:
+        if not self.collection_ids:
+            return False
+        result = self.client.purchasePack(self.rng.choice(self.collection_ids))
+        self.packs.append(result["pack"]["id"])
+        return True
+
+    def openPack(self) -> bool:
+        if not self.packs:
+            return False
+        result = self.client.openPack(self.packs.pop())
+        self.cards.extend(result.get("cards", []))
+        return True
+
+    def listCard(self) -> bool:
+        if not self.cards:
+            return False
+        card = self.cards.pop(self.rng.randrange(len(self.cards)))
+        price = max(1, int(card.get("value", 100) * self.rng.uniform(0.8, 1.2)))
+        self.client.createTrade(card["id"], price=price)
+        return True
+
+    def executeTrade(self) -> bool:
+        # Several players racing for the same cheap listings is the contention we want to see
+        trades = [t for t in self.client.getOpenTrades(limit=20, type="FOR_PRICE", sortBy="price_asc")
+                  if t.get("userId") != self.client.user_id]
+        if not trades:
+            return False
+        self.client.executeTrade(self.rng.choice(trades[:5])["id"])
+        return True
+
+    def run(self, name: str, stats: Dict[str, FlowStats], started_at: float):
+        """
+        Run one flow and record it
+
+        Latency is measured from the flow's scheduled start, so a player that
+        falls behind its arrival rate shows up as higher latency rather than
+        silently sending less load.
+        """
+        flow_stats = stats.setdefault(name, FlowStats())
+        try:
+            ran = self.actions[name]()
+        except Exception as e:
+            flow_stats.errors[errorKind(e)] += 1
+            return
+        if ran:
+            flow_stats.latencies.append(time.monotonic() - started_at)
+        else:
+            flow_stats.skipped += 1
+
+
+def runPlayer(index: int, run_id: str, rate: float, duration: float, mix: Dict[str, int],
+              seed: Optional[int] = None) -> Dict[str, FlowStats]:
+    """
+    Body of one worker process: register, then run flows at `rate` per second
+
+    Arrivals are Poisson (exponential gaps) so players do not march in lockstep.
+
+    Returns:
+        Dict[str, FlowStats]: Stats per flow, plus 'setup' for registration
+    """
+    rng = random.Random(seed if seed is not None else f"{run_id}-{index}")
+    # No client-side pacing, retries or breakers: the report should show what the server does under load
+    client = APIClient(throttle=False)
+    player = SimulatedPlayer(client, rng, mix)
+    stats: Dict[str, FlowStats] = {}
+
+    start = time.monotonic()
+    setup = stats.setdefault("setup", FlowStats())
+    try:
+        if not client.register(f"load_{run_id}_{index}", LOADTEST_PASSWORD):
+            setup.errors["register"] += 1
+            return stats
+        player.setup()
+        setup.latencies.append(time.monotonic() - start)
+    except Exception as e:
+        setup.errors[errorKind(e)] += 1
+        return stats
+
+    deadline = time.monotonic() + duration
+    next_at = time.monotonic()
+    while True:
+        next_at += rng.expovariate(rate)
+        if next_at >= deadline:
+            break
+        time.sleep(max(0.0, next_at - time.monotonic()))
+        player.run(player.pick(), stats, next_at)
+
+    return stats
+
+
+def mergeStats(results: List[Dict[str, FlowStats]]) -> Dict[str, FlowStats]:
+    """Combine per-process stats into one FlowStats per flow"""
+    merged: Dict[str, FlowStats] = {}
+    for result in results:
+        for name, flow_stats in result.items():
+            merged.setdefault(name, FlowStats()).merge(flow_stats)
+    return merged
+
+
+def printReport(stats: Dict[str, FlowStats], elapsed: float, players: int):
+    """Print per-flow throughput, latency percentiles and errors"""
+    print("\n" + "=" * 100)
+    print(f"LOAD TEST - {players} players, {elapsed:.1f}s".center(100))
+    print("=" * 100)
+    print(f"{'flow':<14}{'ok':>7}{'err':>6}{'err%':>7}{'skip':>6}{'/s':>8}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}  errors")
+    print("-" * 100)
+    for name, flow_stats in stats.items():
+        ordered = sorted(flow_stats.latencies)
+        ok = len(ordered)
+        failed = sum(flow_stats.errors.values())
+        error_rate = failed / (ok + failed) * 100 if ok + failed else 0.0
+        errors = ", ".join(f"{kind} x{count}" for kind, count in flow_stats.errors.most_common(3))
+        print(f"{name:<14}{ok:>7}{failed:>6}{error_rate:>6.1f}%{flow_stats.skipped:>6}{ok / elapsed:>8.2f}"
+              f"{percentile(ordered, 50) * 1000:>9.1f}{percentile(ordered, 95) * 1000:>9.1f}"
+              f"{percentile(ordered, 99) * 1000:>9.1f}{(ordered[-1] if ordered else 0) * 1000:>9.1f}  {errors}")
+    print("=" * 100 + "\n")
+
+
+def runLoad(players: int, rate: float, duration: float, mix: Dict[str, int],
+            runner: Callable = runPlayer) -> Dict[str, FlowStats]:
+    """
+    Run `players` simulated players in parallel processes and merge their stats
+
+    Returns:
+        Dict[str, FlowStats]: Merged stats per flow
+    """
+    run_id = uuid.uuid4().hex[:8]
+    with ProcessPoolExecutor(max_workers=players) as pool:
+        futures = [pool.submit(runner, index, run_id, rate, duration, mix) for index in range(players)]
+        return mergeStats([future.result() for future in futures])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated-player load test for the CarDex API")
+    parser.add_argument("--players", type=positiveInt, default=4, help="player processes (default 4)")
+    parser.add_argument("--rate", type=positiveFloat, default=2.0, help="flows per second per player (default 2)")
+    parser.add_argument("--duration", type=positiveFloat, default=60.0, help="seconds to run (default 60)")
+    parser.add_argument("--mix", type=parseMix, default=DEFAULT_MIX,
+                        help="flow weights, e.g. browse=5,buy_pack=1 (default: %(default)s)")
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    stats = runLoad(args.players, args.rate, args.duration, args.mix)
+    printReport(stats, time.monotonic() - start, args.players)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Negative-lookup cache for CarDex CLI
+Remembers IDs the server said do not exist, so they are not requested again for a while
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict
+
+# How long a 404 is trusted before the ID may be requested again (seconds)
+NEGATIVE_TTL = 10 * 60
+# IDs remembered at once; the oldest is forgotten first
+NEGATIVE_CAPACITY = 100_000
+# Bloom filter false-positive rate at full capacity
+BLOOM_ERROR_RATE = 0.01
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string keys
+
+    Sized for `capacity` keys at `error_rate` false positives; never gives a
+    false negative. Bit positions come from one blake2b digest split into
+    two hashes (double hashing).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+
+class NegativeCache:
+    """
+    IDs known to be missing, each trusted for `ttl` seconds
+
+    A Bloom filter answers the common case - an ID that was never missing -
+    without touching the exact table; the filter is hashed outside the lock,
+    which is held only to count the check. Only IDs that pass the filter are
+    checked against the table, which holds each ID's expiry.
+    Bloom filters cannot forget, so the filter is rebuilt from the table
+    once as many IDs have expired or been evicted as the table holds.
+    """
+
+    def __init__(self, ttl: float = NEGATIVE_TTL, capacity: int = NEGATIVE_CAPACITY,
+                 error_rate: float = BLOOM_ERROR_RATE, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.clock = clock
+        self.entries: "OrderedDict[str, float]" = OrderedDict()
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.checks = 0
+        self.short_circuits = 0
+        self.false_positives = 0
+        self._forgotten = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, key: str):
+        """Remember that key does not exist"""
+        with self._lock:
+            self.entries[key] = self.clock() + self.ttl
+            self.entries.move_to_end(key)
+            self.bloom.add(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self._forgotten += 1
+            self._compact()
+
+    def discard(self, key: str):
+        """Forget key (e.g. it turned out to exist after all)"""
+        if key not in self.bloom:
+            return
+        with self._lock:
+            if self.entries.pop(key, None) is not None:
+                self._forgotten += 1
+                self._compact()
+
+    def __contains__(self, key: str) -> bool:
+        """Whether key is known to be missing; counts a short-circuit when it is"""
+        maybe = key in self.bloom
+        with self._lock:
+            self.checks += 1
+            if not maybe:
+                return False
+            expires = self.entries.get(key)
+            if expires is None:
+                self.false_positives += 1
+                return False
+            if expires <= self.clock():
+                del self.entries[key]
+                self._forgotten += 1
+                self._compact()
+                return False
+            self.short_circuits += 1
+            return True
+
+    def _compact(self):
+        """Rebuild the filter without forgotten keys once they are as many as the live ones"""
+        if self._forgotten and self._forgotten >= len(self.entries):
+            self.bloom = BloomFilter(self.capacity, self.error_rate)
+            for key in self.entries:
+                self.bloom.add(key)
+            self._forgotten = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Entries held, lookups checked, requests skipped and filter false positives"""
+        return {
+            "entries": len(self.entries),
+            "checks": self.checks,
+            "short_circuits": self.short_circuits,
+            "false_positives": self.false_positives
+        }
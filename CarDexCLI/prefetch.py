@@ -0,0 +1,216 @@
+"""
+Predictive prefetching for CarDex CLI
+Warms data for the likeliest next commands while the user sits at the prompt
+"""
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+# Prefetched data older than this is not used to answer a command
+PREFETCH_MAX_AGE = 30
+# Refresh a prefetched result once it is this old
+PREFETCH_REFRESH_AFTER = 20
+# At most this many prefetch loads per minute
+PREFETCH_BUDGET = 12
+# How often the scheduler wakes up to look for work
+PREFETCH_POLL = 0.5
+# Stop prefetching once no command has run for this long (seconds); the next command resumes it
+PREFETCH_IDLE_LIMIT = 10 * 60
+# Recent commands the predictions are drawn from
+PREFETCH_HISTORY = 200
+
+
+class PrefetchCancelled(Exception):
+    """Raised from Prefetcher.checkpoint() once a foreground command has started"""
+
+
+class Prefetcher:
+    """
+    Background scheduler that preloads command data while the CLI is idle
+
+    Tasks are ranked by how often each command followed the previous one
+    (falling back to overall frequency, then registration order), counted
+    over the last `window` commands. Loads run only while no foreground
+    command is executing, stay within a per-minute budget, pause once no
+    command has run for `idle_limit` seconds, and stop as soon as stop() is
+    called. A load already running when a command starts is cancelled at its
+    next checkpoint(), so it stops competing with the command for requests.
+    A prefetched result answers one command only.
+    """
+
+    def __init__(self, tasks: Dict[str, Callable[[], Any]], max_age: float = PREFETCH_MAX_AGE,
+                 refresh_after: float = PREFETCH_REFRESH_AFTER, budget: int = PREFETCH_BUDGET,
+                 poll: float = PREFETCH_POLL, idle_limit: float = PREFETCH_IDLE_LIMIT,
+                 window: int = PREFETCH_HISTORY, clock: Callable[[], float] = time.monotonic):
+        self.tasks = tasks
+        self.max_age = max_age
+        self.refresh_after = refresh_after
+        self.budget = budget
+        self.poll = poll
+        self.idle_limit = idle_limit
+        self.clock = clock
+
+        self.results: Dict[str, tuple] = {}
+        self.history: "deque[str]" = deque(maxlen=window)
+        self.counts: Counter = Counter()
+        self.transitions: Dict[str, Counter] = {}
+        self.last_command = clock()
+        self.load_times: List[float] = []
+        self.hits = 0
+        self.errors = 0
+        self.cancelled = 0
+
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._busy = 0
+        self._cancel = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the background scheduler thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cardex-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """Stop the scheduler; an in-flight load is abandoned rather than awaited past timeout"""
+        self._stop.set()
+        self._idle.set()  # wake the scheduler if it is waiting for the foreground
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @contextmanager
+    def foreground(self):
+        """Pause prefetching while a foreground command runs, cancelling any load in progress"""
+        with self._lock:
+            self._busy += 1
+            self._idle.clear()
+            self._cancel.set()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._busy -= 1
+                if self._busy == 0:
+                    self._idle.set()
+
+    def checkpoint(self):
+        """
+        Give up the running load if a foreground command has started
+
+        Tasks call this between their requests (e.g. between a listing and
+        the card lookups for it).
+
+        Raises:
+            PrefetchCancelled: A foreground command started, or stop() was called, since the load began
+        """
+        if self._cancel.is_set() or self._stop.is_set():
+            raise PrefetchCancelled()
+
+    def recordCommand(self, name: str):
+        """Record a command the user ran, to improve the next prediction"""
+        with self._lock:
+            self.last_command = self.clock()
+            if len(self.history) == self.history.maxlen:
+                # The oldest command and the transition out of it leave the window
+                oldest = self.history.popleft()
+                self._forget(self.counts, oldest)
+                if self.history:
+                    self._forget(self.transitions[oldest], self.history[0])
+                    if not self.transitions[oldest]:
+                        del self.transitions[oldest]
+            if self.history:
+                self.transitions.setdefault(self.history[-1], Counter())[name] += 1
+            self.history.append(name)
+            self.counts[name] += 1
+
+    @staticmethod
+    def _forget(counts: Counter, name: str):
+        counts[name] -= 1
+        if counts[name] <= 0:
+            del counts[name]
+
+    def predict(self) -> List[str]:
+        """
+        Rank prefetchable commands by how likely they are to run next
+
+        Returns:
+            List[str]: Task names, most likely first
+        """
+        order = list(self.tasks)
+        with self._lock:
+            following = dict(self.transitions.get(self.history[-1], {})) if self.history else {}
+            overall = {name: self.counts[name] for name in order}
+        return sorted(order, key=lambda name: (-following.get(name, 0), -overall[name], order.index(name)))
+
+    def take(self, name: str) -> Optional[Any]:
+        """
+        Hand over prefetched data for a command if it is fresh enough
+
+        The result is removed, so a repeated command fetches for itself
+        rather than being shown the same data again.
+
+        Returns:
+            The prefetched value, or None if there is none or it is too old
+        """
+        with self._lock:
+            entry = self.results.pop(name, None)
+        if entry is None or self.clock() - entry[0] > self.max_age:
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def runOnce(self) -> Optional[str]:
+        """
+        Load the likeliest task that needs refreshing, if the budget allows
+
+        Returns:
+            str: Name of the task that was loaded, or None if there was nothing to do
+        """
+        now = self.clock()
+        if now - self.last_command > self.idle_limit:
+            return None
+        self.load_times = [t for t in self.load_times if now - t < 60]
+        if len(self.load_times) >= self.budget:
+            return None
+
+        for name in self.predict():
+            with self._lock:
+                entry = self.results.get(name)
+            if entry is not None and now - entry[0] < self.refresh_after:
+                continue
+
+            with self._lock:
+                if self._busy:
+                    return None
+                self._cancel.clear()
+            self.load_times.append(now)
+            try:
+                value = self.tasks[name]()
+            except PrefetchCancelled:
+                self.cancelled += 1
+                return None
+            except Exception:
+                # Prefetching is best-effort; the foreground command will fetch for itself
+                self.errors += 1
+                return None
+            with self._lock:
+                self.results[name] = (self.clock(), value)
+            return name
+
+        return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._idle.wait()
+            if self._stop.is_set():
+                break
+            self.runOnce()
+            self._stop.wait(self.poll)
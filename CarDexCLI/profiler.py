@@ -0,0 +1,157 @@
+"""
+Built-in profiling for CarDex CLI
+Runs a command under cProfile, tracemalloc and a stack sampler and writes reports
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+# Functions listed in the hotspot report
+PROFILE_TOP = 25
+# Allocation sites listed in the memory report
+MEMORY_TOP = 10
+# Seconds between stack samples for the collapsed-stack (flamegraph) file
+SAMPLE_INTERVAL = 0.005
+
+
+class StackSampler:
+    """
+    Samples the stacks of every thread at a fixed interval
+
+    cProfile only sees the thread that started it, while enrichment and
+    prefetching run on worker threads; sampling catches those too, including
+    time spent blocked in socket reads. Stacks are counted in the collapsed
+    format used by flamegraph.pl and speedscope ("thread;outer;inner count").
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cardex-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def sample(self):
+        """Record the current stack of every thread except the sampler itself"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Counted stacks, one per line, heaviest first"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+
+class ProfileResult:
+    """Outcome of a profiled call: its return value, timings and report paths"""
+
+    def __init__(self, value: Any, wall_time: float, peak_bytes: int, paths: Dict[str, str]):
+        self.value = value
+        self.wall_time = wall_time
+        self.peak_bytes = peak_bytes
+        self.paths = paths
+
+
+def hotspotReport(profile: cProfile.Profile, top: int = PROFILE_TOP) -> str:
+    """Functions sorted by cumulative time, then by own time"""
+    out = io.StringIO()
+    stats = pstats.Stats(profile, stream=out).strip_dirs()
+    out.write("=== By cumulative time ===\n")
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+    out.write("=== By own time ===\n")
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+    return out.getvalue()
+
+
+def memoryReport(snapshot: tracemalloc.Snapshot, peak_bytes: int, top: int = MEMORY_TOP) -> str:
+    """Peak traced memory plus the largest live allocation sites"""
+    lines = [f"Peak traced memory: {peak_bytes / 1024:,.1f} KiB", "", f"Top {top} allocation sites:"]
+    for stat in snapshot.statistics("lineno")[:top]:
+        frame = stat.traceback[0]
+        lines.append(f"  {stat.size / 1024:10,.1f} KiB  {stat.count:7,} blocks  "
+                     f"{os.path.basename(frame.filename)}:{frame.lineno}")
+    return "\n".join(lines) + "\n"
+
+
+def profileCall(fn: Callable[[], Any], output_dir: str, label: str = "command",
+                collapsed: bool = True) -> ProfileResult:
+    """
+    Run fn under cProfile and tracemalloc (and optionally a stack sampler)
+
+    Writes <label>-<timestamp>.prof.txt (hotspots), .mem.txt (allocations)
+    and, if collapsed is set, .collapsed (flamegraph input) to output_dir.
+
+    Returns:
+        ProfileResult: fn's return value, wall time, peak memory and report paths
+    """
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+
+    sampler = StackSampler() if collapsed else None
+    if sampler:
+        sampler.start()
+
+    profile = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        value = profile.runcall(fn)
+    finally:
+        wall_time = time.perf_counter() - start
+        if sampler:
+            sampler.stop()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if not already_tracing:
+            tracemalloc.stop()
+
+    os.makedirs(output_dir, exist_ok=True)
+    safe_label = "".join(c if c.isalnum() else "_" for c in label) or "command"
+    base = os.path.join(output_dir, f"{safe_label}-{datetime.now():%Y%m%d-%H%M%S}")
+
+    paths = {"hotspots": f"{base}.prof.txt", "memory": f"{base}.mem.txt"}
+    with open(paths["hotspots"], "w") as f:
+        f.write(f"Wall time: {wall_time:.3f}s\n\n")
+        f.write(hotspotReport(profile))
+    with open(paths["memory"], "w") as f:
+        f.write(memoryReport(snapshot, peak_bytes))
+    if sampler:
+        paths["collapsed"] = f"{base}.collapsed"
+        with open(paths["collapsed"], "w") as f:
+            f.write(sampler.collapsed())
+
+    return ProfileResult(value, wall_time, peak_bytes, paths)
@@ -0,0 +1,188 @@
+"""
+Adaptive client-side rate limiting for CarDex CLI
+Token bucket for request rate plus AIMD control of request concurrency
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from email.utils import parsedate_to_datetime
+from typing import Callable, Hashable, Optional
+
+# Steady request rate and burst size allowed by the token bucket
+DEFAULT_RATE  = 20.0
+DEFAULT_BURST = 40
+
+# AIMD concurrency window
+DEFAULT_CONCURRENCY = 8
+MIN_CONCURRENCY     = 1
+MAX_CONCURRENCY     = 32
+BACKOFF_FACTOR      = 0.5   # multiplicative decrease on congestion
+LATENCY_TOLERANCE   = 2.0   # congested when latency exceeds this multiple of the recent best
+LATENCY_FLOOR       = 0.05  # ...and exceeds this many seconds, so jitter on fast calls is ignored
+LATENCY_WINDOW      = 100   # samples used to estimate the recent best latency
+LATENCY_BASELINES   = 64    # request kinds (endpoint, page size) with their own best latency; least recent dropped
+DECREASE_COOLDOWN   = 1.0   # seconds between decreases, so one burst of errors halves the window once
+
+# Statuses meaning "the server is overloaded, slow down"
+THROTTLE_STATUSES = (429, 503)
+
+
+def parseRetryAfter(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parse a Retry-After header (delta-seconds or HTTP-date)
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or malformed
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (now if now is not None else time.time()))
+
+
+class TokenBucket:
+    """Classic token bucket; acquire() blocks until a token is available"""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, waiting for a refill or the end of a pause if necessary"""
+        while True:
+            with self._lock:
+                now = self.clock()
+                wait = self.paused_until - now
+                if wait <= 0:
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for the given time (e.g. from a Retry-After header)"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+
+class AIMDController:
+    """
+    Concurrency limit tuned by additive increase / multiplicative decrease
+
+    Each healthy response grows the limit by 1/limit (about +1 per round
+    trip); a throttling status, a timeout or a latency well above the recent
+    best shrinks it by BACKOFF_FACTOR. The recent best is kept per request
+    kind (e.g. endpoint and page size), so a 1000-card page is not judged
+    slow against a single-card lookup.
+    """
+
+    def __init__(self, initial: int = DEFAULT_CONCURRENCY, minimum: int = MIN_CONCURRENCY,
+                 maximum: int = MAX_CONCURRENCY, clock: Callable[[], float] = time.monotonic):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.clock = clock
+        self.in_flight = 0
+        self.samples: "OrderedDict[Hashable, deque]" = OrderedDict()
+        self.last_decrease = float("-inf")
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Wait for a free concurrency slot"""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def observe(self, latency: float, overloaded: bool = False, key: Hashable = None):
+        """
+        Adjust the limit from a request's outcome
+
+        Args:
+            latency: Seconds until the response arrived
+            overloaded: The server signalled overload
+            key: Request kind whose recent best latency this one is compared against
+        """
+        with self._cond:
+            samples = self.samples.get(key)
+            if samples is None:
+                samples = self.samples[key] = deque(maxlen=LATENCY_WINDOW)
+                if len(self.samples) > LATENCY_BASELINES:
+                    self.samples.popitem(last=False)
+            self.samples.move_to_end(key)
+            samples.append(latency)
+            slow = latency > max(LATENCY_TOLERANCE * min(samples), LATENCY_FLOOR)
+
+            if overloaded or slow:
+                now = self.clock()
+                if now - self.last_decrease >= DECREASE_COOLDOWN:
+                    self.limit = max(self.minimum, self.limit * BACKOFF_FACTOR)
+                    self.last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def free(self):
+        """Free a slot"""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def release(self, latency: float, overloaded: bool = False, key: Hashable = None):
+        """Free a slot and adjust the limit from the request's outcome"""
+        self.observe(latency, overloaded, key)
+        self.free()
+
+
+class AdaptiveLimiter:
+    """Rate and concurrency gate that every API request passes through"""
+
+    def __init__(self, bucket: Optional[TokenBucket] = None, concurrency: Optional[AIMDController] = None):
+        self.bucket = bucket or TokenBucket()
+        self.concurrency = concurrency or AIMDController()
+        self.throttled = 0
+
+    def acquire(self):
+        """Wait for a token and a concurrency slot"""
+        self.bucket.acquire()
+        self.concurrency.acquire()
+
+    def release(self, latency: float, overloaded: bool = False, retry_after: Optional[float] = None,
+                key: Hashable = None, free: bool = True):
+        """
+        Report a finished request
+
+        Args:
+            latency: Seconds the request took
+            overloaded: The server signalled overload (throttling status, 5xx, timeout)
+            retry_after: Seconds the server asked us to wait before the next request
+            key: Request kind, for comparing latency against like requests
+            free: Free the concurrency slot now (False while a streamed body is still being read; call free() later)
+        """
+        if free:
+            self.concurrency.release(latency, overloaded, key)
+        else:
+            self.concurrency.observe(latency, overloaded, key)
+        if retry_after is not None:
+            self.throttled += 1
+            self.bucket.pause(retry_after)
+
+    def free(self):
+        """Free the concurrency slot of a request reported with free=False"""
+        self.concurrency.free()
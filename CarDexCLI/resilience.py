@@ -0,0 +1,240 @@
+"""
+Tail-latency and failure handling for CarDex CLI
+Hedged GETs and per-endpoint circuit breakers
+"""
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from tracing import propagate
+
+# Send a duplicate GET once the first has outlived this percentile of recent latency
+HEDGE_PERCENTILE  = 95
+HEDGE_MIN_SAMPLES = 20     # no hedging until an endpoint has this many samples
+HEDGE_MIN_DELAY   = 0.05   # never hedge sooner than this many seconds
+HEDGE_BUDGET      = 0.1    # at most this fraction of requests may be hedged
+HEDGE_WORKERS     = 16
+LATENCY_WINDOW    = 200
+
+# Open a breaker after this many consecutive failures, and probe again after RESET_TIMEOUT seconds
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT     = 30.0
+
+# Path segments that identify a single resource (UUIDs and numeric IDs)
+_ID_SEGMENT = re.compile(r"^([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|\d+)$")
+
+
+def endpointKey(url: str) -> str:
+    """
+    Group a URL with the others that hit the same server route
+
+    e.g. http://host/cards/<uuid>?x=1 -> /cards/{id}
+    """
+    segments = urlsplit(url).path.split("/")
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in segments) or "/"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to an endpoint whose breaker is open"""
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies for one endpoint"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.samples)
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        Returns:
+            float: The pct-th percentile latency, or None with no samples
+        """
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Hedger:
+    """
+    Runs idempotent calls with a backup request for the slow tail
+
+    If a call has not finished after the endpoint's HEDGE_PERCENTILE latency,
+    an identical call is started and whichever succeeds first is returned.
+    Hedges are capped at HEDGE_BUDGET of all calls so a slow server never
+    sees double the load.
+    """
+
+    def __init__(self, percentile: float = HEDGE_PERCENTILE, min_samples: int = HEDGE_MIN_SAMPLES,
+                 min_delay: float = HEDGE_MIN_DELAY, budget: float = HEDGE_BUDGET):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.budget = budget
+        self.trackers: Dict[str, LatencyTracker] = {}
+
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="cardex-hedge")
+
+    def tracker(self, endpoint: str) -> LatencyTracker:
+        with self._lock:
+            return self.trackers.setdefault(endpoint, LatencyTracker())
+
+    def delay(self, endpoint: str) -> Optional[float]:
+        """
+        Returns:
+            float: Seconds to wait before hedging, or None if there is too little data
+        """
+        tracker = self.tracker(endpoint)
+        if len(tracker) < self.min_samples:
+            return None
+        return max(self.min_delay, tracker.percentile(self.percentile))
+
+    def close(self):
+        """Drop queued hedges and let running ones finish on their own; the pool's threads are not daemons"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def call(self, endpoint: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn, hedging it if it is slower than usual for the endpoint
+
+        Returns:
+            The first successful result
+
+        Raises:
+            The first attempt's exception if every attempt fails
+        """
+        tracker = self.tracker(endpoint)
+
+        def timed():
+            start = time.monotonic()
+            result = fn()
+            tracker.record(time.monotonic() - start)
+            return result
+
+        with self._lock:
+            self.calls += 1
+            within_budget = self.hedges < self.budget * self.calls
+        delay = self.delay(endpoint)
+        if delay is None or not within_budget:
+            return timed()
+
+        timed = propagate(timed)
+        first = self._pool.submit(timed)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        with self._lock:
+            self.hedges += 1
+        second = self._pool.submit(timed)
+
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in (f for f in (first, second) if f in done):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                if future is second:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return result
+        raise error
+
+
+class CircuitBreaker:
+    """
+    Stops calling an endpoint that keeps failing
+
+    CLOSED: requests flow, consecutive failures are counted.
+    OPEN: requests fail fast with CircuitOpenError for reset_timeout seconds.
+    HALF_OPEN: one probe request is let through; success closes the
+    breaker, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (claims the probe slot when half-open)"""
+        with self._lock:
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def retryIn(self) -> float:
+        """Seconds until the next probe is allowed"""
+        return max(0.0, self.opened_at + self.reset_timeout - self.clock())
+
+    def recordSuccess(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probing = False
+
+    def recordFailure(self):
+        with self._lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+
+class CircuitBreakers:
+    """One circuit breaker per endpoint, created on first use"""
+
+    def __init__(self, threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self.breakers.get(endpoint)
+            if breaker is None:
+                breaker = self.breakers[endpoint] = CircuitBreaker(self.threshold, self.reset_timeout, self.clock)
+            return breaker
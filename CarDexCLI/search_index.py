@@ -0,0 +1,176 @@
+"""
+Local search index for CarDex CLI
+Prefix trie plus trigram index over card and vehicle names
+"""
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+
+# Minimum fraction of a query's trigrams a name must contain to count as a fuzzy match
+FUZZY_THRESHOLD = 0.5
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, drop punctuation (so 'GT-R' matches 'gtr') and split into words"""
+    return _NON_WORD.sub("", str(text).lower()).split()
+
+
+def trigrams(token: str) -> Set[str]:
+    """Trigrams of a single word, padded so short words and word edges still match"""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Trie:
+    """Prefix tree mapping word prefixes to the documents containing them"""
+
+    def __init__(self):
+        self.root = {}
+        self.ids_key = object()  # sentinel key holding the doc ids at a node
+
+    def insert(self, word: str, doc_id: str):
+        """Index every prefix of word for doc_id"""
+        node = self.root
+        for char in word:
+            node = node.setdefault(char, {})
+            node.setdefault(self.ids_key, set()).add(doc_id)
+
+    def prefix(self, prefix: str) -> Set[str]:
+        """
+        Look up documents with a word starting with prefix
+
+        Returns:
+            Set[str]: Matching doc ids (empty if none)
+        """
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return set()
+        return node.get(self.ids_key, set())
+
+
+class TrigramIndex:
+    """Inverted index from word trigrams to documents, for misspelled queries"""
+
+    def __init__(self):
+        self.postings: Dict[str, Set[str]] = {}
+        self.doc_grams: Dict[str, Set[str]] = {}
+
+    def insert(self, word: str, doc_id: str):
+        """Index the trigrams of word for doc_id"""
+        grams = trigrams(word)
+        self.doc_grams.setdefault(doc_id, set()).update(grams)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(doc_id)
+
+    def scores(self, words: Iterable[str], threshold: float = FUZZY_THRESHOLD) -> Dict[str, float]:
+        """
+        Score documents by the fraction of the query's trigrams they contain
+
+        A document reaching the threshold must contain at least one of the
+        query's rarest (n - needed + 1) trigrams, so only those posting lists
+        are scanned for candidates; common trigrams are just checked per candidate.
+
+        Returns:
+            Dict[str, float]: Doc id to score, for documents at or above threshold
+        """
+        query = set()
+        for word in words:
+            query |= trigrams(word)
+        if not query:
+            return {}
+
+        needed = max(1, math.ceil(threshold * len(query)))
+        rarest = sorted(query, key=lambda gram: len(self.postings.get(gram, ())))
+        candidates = set()
+        for gram in rarest[:len(query) - needed + 1]:
+            candidates |= self.postings.get(gram, set())
+
+        results = {}
+        for doc_id in candidates:
+            score = len(query & self.doc_grams[doc_id]) / len(query)
+            if score >= threshold:
+                results[doc_id] = score
+        return results
+
+
+class SearchIndex:
+    """
+    Name search over vehicles and cards
+
+    Each document is a vehicle (cards share their vehicle's name), so results
+    can be linked straight to open listings via the vehicleId trade filter.
+    Names where every query word prefix-matches a word are returned first;
+    only if there are none are names ranked by trigram overlap, which
+    tolerates typos.
+    """
+
+    def __init__(self):
+        self.trie = Trie()
+        self.trigrams = TrigramIndex()
+        self.names: Dict[str, str] = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, doc_id: str):
+        return doc_id in self.names
+
+    def add(self, doc_id: str, name: str):
+        """Index a name under doc_id (re-adding an existing id is ignored)"""
+        if not doc_id or doc_id in self.names:
+            return
+        self.names[doc_id] = name
+        for word in tokenize(name):
+            self.trie.insert(word, doc_id)
+            self.trigrams.insert(word, doc_id)
+
+    def addVehicles(self, vehicles: Iterable[Dict]):
+        """Index vehicles from /cards/vehicles"""
+        for vehicle in vehicles:
+            name = " ".join(str(vehicle.get(field, "")) for field in ("year", "make", "model")).strip()
+            self.add(vehicle.get("id"), name)
+
+    def addCards(self, cards: Iterable[Dict]):
+        """Index card details, keyed by their vehicle so duplicates collapse"""
+        for card in cards:
+            self.add(card.get("vehicleId") or card.get("id"), card.get("name", ""))
+
+    def search(self, query: str, limit: int = 5) -> List[Dict]:
+        """
+        Find names matching a partial or misspelled query
+
+        Returns:
+            List[Dict]: Up to limit results with id, name and score (1.0 = prefix match)
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+
+        # Intersect smallest posting set first so common words cost nothing
+        postings = sorted((self.trie.prefix(word) for word in words), key=len)
+        matches = postings[0].intersection(*postings[1:])
+
+        if matches:
+            results = [{"id": doc_id, "name": self.names[doc_id], "score": 1.0} for doc_id in matches]
+            results.sort(key=lambda r: r["name"])
+            return results[:limit]
+
+        # Nothing starts with the query words, so assume a typo
+        results = [
+            {"id": doc_id, "name": self.names[doc_id], "score": round(score, 3)}
+            for doc_id, score in self.trigrams.scores(words).items()
+        ]
+        results.sort(key=lambda r: (-r["score"], r["name"]))
+        return results[:limit]
+
+
+def buildSearchIndex(vehicles: Iterable[Dict], cards: Optional[Iterable[Dict]] = None) -> SearchIndex:
+    """Build an index from /cards/vehicles and any cached card details"""
+    index = SearchIndex()
+    index.addVehicles(vehicles)
+    index.addCards(cards or [])
+    return index
@@ -0,0 +1,75 @@
+"""
+Single-flight request coalescing for CarDex CLI
+Merges identical in-flight calls into one execution and shares the outcome
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    """A single in-flight execution that any number of callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers using the same key
+
+        The first caller executes fn; callers arriving while it is still
+        running block until it finishes and receive the same result, or
+        have the same exception re-raised.
+
+        Args:
+            key: Identity of the call (e.g. method, URL and query params)
+            fn: Zero-argument callable performing the actual work
+
+        Returns:
+            Any: Whatever fn returned
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Forget the call before waking waiters, so later callers start a fresh request
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def inFlight(self) -> int:
+        """Number of distinct calls currently executing"""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,157 @@
+"""
+Stale-while-revalidate cache for CarDex CLI
+Serves catalog data (collections, vehicles) instantly and refreshes it in the background
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import json_codec
+
+# Catalog data rarely changes: serve it as-is for 5 minutes, then revalidate in the background
+DEFAULT_SOFT_TTL = 5 * 60
+# Past this age a cached copy is too old to show, so the next read blocks on a refresh
+DEFAULT_HARD_TTL = 24 * 60 * 60
+
+
+class CacheEntry:
+    """A cached value plus the validators needed to revalidate it cheaply"""
+
+    def __init__(self, value: Any, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                 fetched_at: Optional[float] = None):
+        self.value = value
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    def toDict(self) -> Dict:
+        return {
+            "value": self.value,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "fetched_at": self.fetched_at
+        }
+
+    @staticmethod
+    def fromDict(data: Dict) -> "CacheEntry":
+        return CacheEntry(data["value"], data.get("etag"), data.get("last_modified"), data.get("fetched_at", 0))
+
+
+# fetch(previous entry or None) -> fresh entry; may reuse previous.value on 304 Not Modified
+Fetcher = Callable[[Optional[CacheEntry]], CacheEntry]
+
+
+class StaleWhileRevalidateCache:
+    """
+    Keyed cache that never blocks on a refresh once it holds a usable copy
+
+    - No copy (or older than hard_ttl): fetch synchronously
+    - Younger than soft_ttl: serve from memory
+    - Older than soft_ttl: serve from memory and refresh in a background thread
+
+    The fetcher receives the previous entry so it can send conditional
+    requests (If-None-Match / If-Modified-Since). Entries are optionally
+    persisted to disk, so later sessions also start warm.
+    """
+
+    def __init__(self, soft_ttl: float = DEFAULT_SOFT_TTL, hard_ttl: float = DEFAULT_HARD_TTL,
+                 path: Optional[str] = None, clock: Callable[[], float] = time.time):
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.path = path
+        self.clock = clock
+        self.entries: Dict[Hashable, CacheEntry] = {}
+        self.refreshing = set()
+        self.last_error: Optional[Exception] = None
+        self._lock = threading.Lock()
+        self._threads = []
+        self.load()
+
+    def get(self, key: Hashable, fetch: Fetcher) -> Any:
+        """
+        Return the cached value for key, fetching or revalidating as needed
+
+        Returns:
+            Any: Cached (possibly stale) or freshly fetched value
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+
+        if entry is None or self.age(entry) >= self.hard_ttl:
+            return self._refresh(key, fetch, entry).value
+
+        if self.age(entry) >= self.soft_ttl:
+            self._refreshInBackground(key, fetch, entry)
+
+        return entry.value
+
+    def age(self, entry: CacheEntry) -> float:
+        """Seconds since the entry was fetched or last revalidated"""
+        return self.clock() - entry.fetched_at
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or every entry when key is None"""
+        with self._lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+        self.save()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until background refreshes started so far have finished"""
+        for thread in list(self._threads):
+            thread.join(timeout)
+
+    def _refresh(self, key: Hashable, fetch: Fetcher, previous: Optional[CacheEntry]) -> CacheEntry:
+        entry = fetch(previous)
+        entry.fetched_at = self.clock()
+        with self._lock:
+            self.entries[key] = entry
+        self.save()
+        return entry
+
+    def _refreshInBackground(self, key: Hashable, fetch: Fetcher, previous: CacheEntry):
+        with self._lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def run():
+            try:
+                self._refresh(key, fetch, previous)
+            except Exception as e:
+                # Keep serving the stale copy; the next read will try again
+                self.last_error = e
+            finally:
+                with self._lock:
+                    self.refreshing.discard(key)
+
+        thread = threading.Thread(target=run, name=f"swr-refresh-{key}", daemon=True)
+        self._threads = [t for t in self._threads if t.is_alive()] + [thread]
+        thread.start()
+
+    def load(self):
+        """Load persisted entries, ignoring a missing or unreadable cache file"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                data = json_codec.loads(f.read())
+            self.entries = {key: CacheEntry.fromDict(entry) for key, entry in data.items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            self.entries = {}
+
+    def save(self):
+        """Persist entries atomically, if a cache path was given"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {str(key): entry.toDict() for key, entry in self.entries.items()}
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json_codec.dumps(data))
+        os.replace(tmp_path, self.path)
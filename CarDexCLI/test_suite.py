@@ -8,13 +8,47 @@ Test Suite Organization:
 - CLIClient: Command processing, transformations, and application flow tests
 """
 import pytest
+import gzip
+import heapq
+import os
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch
 import requests
 
 from cli_client import CLIClient
-from api_client import APIClient
+from api_client import BACKGROUND_CONCURRENCY, APIClient
 from cli_display import Display
+import json_codec
+from json_stream import ArrayItemStream, iterArrayItems
+from negative_cache import BloomFilter, NegativeCache
+import audit
+import completion
+from balancer import FAILURE_LIMIT, ReplicaPool, canFailOver
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from cassette import RECORD_HEADER, CassetteMiss, CassettePlayer, CassetteRecorder
+import catalog
+from entity_store import CARD, COMPLETED_TRADE, TRADE, USER, EntityStore
+from candles import PENDING_ATTEMPTS, RECORD, CandleStore
+from trade_sync import TradeHistory
+import dump_cards
+import pack_ev
+import load_players
+from load_players import DEFAULT_MIX, FlowStats, SimulatedPlayer, mergeStats, parseMix, percentile, runPlayer
+from search_index import buildSearchIndex
+from prefetch import PrefetchCancelled, Prefetcher
+from profiler import StackSampler, profileCall
+from cli_dashboard import Dashboard, diffFrames, renderFrame
+from rate_limit import AdaptiveLimiter, AIMDController, TokenBucket, parseRetryAfter
+from resilience import CircuitBreaker, CircuitOpenError, Hedger, endpointKey
+from single_flight import SingleFlight
+from swr_cache import CacheEntry, StaleWhileRevalidateCache
+from tracing import InMemoryExporter, JsonLinesExporter, Tracer, currentSpan, propagate
 
 
 # ============================================================================
@@ -106,7 +140,7 @@ class TestApiClient:
         def test_successful_login_stores_token(self, mock_post):
             """Test successful authentication and token storage"""
             mock_response = Mock()
-            mock_response.json.return_value = {"accessToken": "test-token-123"}
+            mock_response.content = json_codec.dumps({"accessToken": "test-token-123"})
             mock_response.raise_for_status = Mock()
             mock_post.return_value = mock_response
             
@@ -189,12 +223,12 @@ class TestApiClient:
         def test_retrieves_completed_trades_successfully(self, mock_get):
             """Test fetching completed trades from history endpoint"""
             mock_response = Mock()
-            mock_response.json.return_value = {
+            mock_response.content = json_codec.dumps({
                 "trades": [
                     {"id": "1", "type": "FOR_PRICE", "price": 5000},
                     {"id": "2", "type": "FOR_CARD", "price": 0}
                 ]
-            }
+            })
             mock_response.raise_for_status = Mock()
             mock_get.return_value = mock_response
             
@@ -210,7 +244,7 @@ class TestApiClient:
         def test_respects_completed_trades_limit_parameter(self, mock_get):
             """Test limit parameter is properly passed to API"""
             mock_response = Mock()
-            mock_response.json.return_value = {"trades": [{"id": str(i)} for i in range(3)]}
+            mock_response.content = json_codec.dumps({"trades": [{"id": str(i)} for i in range(3)]})
             mock_response.raise_for_status = Mock()
             mock_get.return_value = mock_response
             
@@ -226,12 +260,12 @@ class TestApiClient:
         def test_retrieves_open_trades_successfully(self, mock_get):
             """Test fetching open trades from marketplace"""
             mock_response = Mock()
-            mock_response.json.return_value = {
+            mock_response.content = json_codec.dumps({
                 "trades": [
                     {"id": "1", "cardId": "card-1"},
                     {"id": "2", "cardId": "card-2"}
                 ]
-            }
+            })
             mock_response.raise_for_status = Mock()
             mock_get.return_value = mock_response
             
@@ -246,7 +280,7 @@ class TestApiClient:
         def test_respects_open_trades_limit_parameter(self, mock_get):
             """Test open trades respects limit and includes sort parameter"""
             mock_response = Mock()
-            mock_response.json.return_value = {"trades": [{"id": str(i)} for i in range(2)]}
+            mock_response.content = json_codec.dumps({"trades": [{"id": str(i)} for i in range(2)]})
             mock_response.raise_for_status = Mock()
             mock_get.return_value = mock_response
             
@@ -262,7 +296,7 @@ class TestApiClient:
         def test_returns_empty_list_when_no_completed_trades(self, mock_get):
             """Test handling of empty completed trades response"""
             mock_response = Mock()
-            mock_response.json.return_value = {"trades": []}
+            mock_response.content = json_codec.dumps({"trades": []})
             mock_response.raise_for_status = Mock()
             mock_get.return_value = mock_response
             
@@ -276,7 +310,7 @@ class TestApiClient:
         def test_returns_empty_list_when_no_open_trades(self, mock_get):
             """Test handling of empty open trades response"""
             mock_response = Mock()
-            mock_response.json.return_value = {}
+            mock_response.content = json_codec.dumps({})
             mock_response.raise_for_status = Mock()
             mock_get.return_value = mock_response
             
@@ -293,12 +327,12 @@ class TestApiClient:
         def test_retrieves_available_packs_successfully(self, mock_get):
             """Test fetching available packs from collections endpoint"""
             mock_response = Mock()
-            mock_response.json.return_value = {
+            mock_response.content = json_codec.dumps({
                 "collections": [
                     {"id": "1", "name": "JDM Legends", "cardCount": 6},
                     {"id": "2", "name": "Muscle Cars", "cardCount": 8}
                 ]
-            }
+            })
             mock_response.raise_for_status = Mock()
             mock_get.return_value = mock_response
             
@@ -314,12 +348,12 @@ class TestApiClient:
         def test_retrieves_collections_successfully(self, mock_get):
             """Test fetching all collections"""
             mock_response = Mock()
-            mock_response.json.return_value = {
+            mock_response.content = json_codec.dumps({
                 "collections": [
                     {"id": "1", "name": "Collection 1", "cardCount": 10},
                     {"id": "2", "name": "Collection 2", "cardCount": 15}
                 ]
-            }
+            })
             mock_response.raise_for_status = Mock()
             mock_get.return_value = mock_response
             
@@ -334,7 +368,7 @@ class TestApiClient:
         def test_handles_empty_collections_response(self, mock_get):
             """Test handling when no collections exist"""
             mock_response = Mock()
-            mock_response.json.return_value = {}
+            mock_response.content = json_codec.dumps({})
             mock_response.raise_for_status = Mock()
             mock_get.return_value = mock_response
             
@@ -351,12 +385,12 @@ class TestApiClient:
         def test_retrieves_card_details_successfully(self, mock_get):
             """Test fetching card by ID"""
             mock_response = Mock()
-            mock_response.json.return_value = {
+            mock_response.content = json_codec.dumps({
                 "id": "card-123",
                 "name": "2019 Subaru WRX STI",
                 "grade": "LIMITED_RUN",
                 "value": 9000
-            }
+            })
             mock_response.raise_for_status = Mock()
             mock_get.return_value = mock_response
             
@@ -394,6 +428,42 @@ class TestApiClient:
             
             with pytest.raises(requests.exceptions.HTTPError):
                 client.getCard("card-123")
+
+        @patch('requests.get')
+        def test_known_missing_card_is_not_requested_again(self, mock_get):
+            """Test a 404 is remembered, so the next lookup of that card skips the server"""
+            mock_get.side_effect = requests.exceptions.HTTPError(response=Mock(status_code=404))
+
+            client = APIClient()
+            client.access_token = "test-token"
+
+            assert client.getCardsById(["deleted", "deleted"]) == {}
+            assert client.getCard("deleted") is None
+            assert client.getCard("deleted") is None
+            assert mock_get.call_count == 1
+            assert client.missing_cards.stats()["short_circuits"] == 2
+
+        @patch('requests.post')
+        def test_traded_card_is_no_longer_known_missing(self, mock_post):
+            """Test a card that changes hands in a trade is forgotten by the negative cache"""
+            mock_post.return_value = Mock(status_code=200, content=json_codec.dumps({"completed_trade": {"id": "t1"}}))
+            client = APIClient()
+            client.access_token = "test-token"
+            client.missing_cards.add("mine")
+
+            client.executeTrade("t1", buyer_card_id="mine")
+            assert "mine" not in client.missing_cards
+
+        @patch('requests.get')
+        def test_counts_cards_with_filters(self, mock_get):
+            """Test countCards reads the server total from a one-card page"""
+            mock_get.return_value = Mock(status_code=200, content=json_codec.dumps({"cards": [{}], "total": 4321}))
+
+            client = APIClient()
+            client.access_token = "test-token"
+
+            assert client.countCards(grade="NISMO") == 4321
+            assert mock_get.call_args[1]["params"] == {"limit": 1, "offset": 0, "grade": "NISMO"}
     
     class TestEnrichedTradeRetrieval:
         """Fetching trades with full card details"""
@@ -406,18 +476,18 @@ class TestApiClient:
                 mock_response.raise_for_status = Mock()
                 
                 if "trades" in url and "history" not in url:
-                    mock_response.json.return_value = {
+                    mock_response.content = json_codec.dumps({
                         "trades": [
                             {"id": "trade-1", "cardId": "card-1", "wantCardId": None, "price": 5000}
                         ]
-                    }
+                    })
                 elif "cards/card-1" in url:
-                    mock_response.json.return_value = {
+                    mock_response.content = json_codec.dumps({
                         "id": "card-1",
                         "name": "Test Car",
                         "grade": "FACTORY",
                         "value": 5000
-                    }
+                    })
                 return mock_response
             
             mock_get.side_effect = side_effect
@@ -438,15 +508,15 @@ class TestApiClient:
                 mock_response.raise_for_status = Mock()
                 
                 if "trades" in url and "history" not in url:
-                    mock_response.json.return_value = {
+                    mock_response.content = json_codec.dumps({
                         "trades": [
                             {"id": "trade-1", "cardId": "card-1", "wantCardId": "card-2", "price": 0}
                         ]
-                    }
+                    })
                 elif "cards/card-1" in url:
-                    mock_response.json.return_value = {"id": "card-1", "name": "Car A", "grade": "FACTORY"}
+                    mock_response.content = json_codec.dumps({"id": "card-1", "name": "Car A", "grade": "FACTORY"})
                 elif "cards/card-2" in url:
-                    mock_response.json.return_value = {"id": "card-2", "name": "Car B", "grade": "NISMO"}
+                    mock_response.content = json_codec.dumps({"id": "card-2", "name": "Car B", "grade": "NISMO"})
                 return mock_response
             
             mock_get.side_effect = side_effect
@@ -466,7 +536,7 @@ class TestApiClient:
                 mock_response.raise_for_status = Mock()
                 
                 if "history" in url:
-                    mock_response.json.return_value = {
+                    mock_response.content = json_codec.dumps({
                         "trades": [
                             {
                                 "id": "trade-1",
@@ -475,11 +545,11 @@ class TestApiClient:
                                 "price": 0
                             }
                         ]
-                    }
+                    })
                 elif "cards/card-1" in url:
-                    mock_response.json.return_value = {"id": "card-1", "name": "Seller Car", "grade": "LIMITED_RUN"}
+                    mock_response.content = json_codec.dumps({"id": "card-1", "name": "Seller Car", "grade": "LIMITED_RUN"})
                 elif "cards/card-2" in url:
-                    mock_response.json.return_value = {"id": "card-2", "name": "Buyer Car", "grade": "NISMO"}
+                    mock_response.content = json_codec.dumps({"id": "card-2", "name": "Buyer Car", "grade": "NISMO"})
                 return mock_response
             
             mock_get.side_effect = side_effect
@@ -501,11 +571,11 @@ class TestApiClient:
                 mock_response.raise_for_status = Mock()
                 
                 if "trades" in url and "history" not in url:
-                    mock_response.json.return_value = {
+                    mock_response.content = json_codec.dumps({
                         "trades": [
                             {"id": "trade-1", "cardId": "missing-card"}
                         ]
-                    }
+                    })
                 elif "cards/missing-card" in url:
                     mock_response.status_code = 404
                     raise requests.exceptions.HTTPError(response=mock_response)
@@ -528,7 +598,7 @@ class TestApiClient:
                 mock_response.raise_for_status = Mock()
                 
                 if "history" in url:
-                    mock_response.json.return_value = {
+                    mock_response.content = json_codec.dumps({
                         "trades": [
                             {
                                 "id": "trade-1",
@@ -537,9 +607,9 @@ class TestApiClient:
                                 "price": 10000
                             }
                         ]
-                    }
+                    })
                 elif "cards/card-1" in url:
-                    mock_response.json.return_value = {"id": "card-1", "name": "Seller Car"}
+                    mock_response.content = json_codec.dumps({"id": "card-1", "name": "Seller Car"})
                 return mock_response
             
             mock_get.side_effect = side_effect
@@ -551,243 +621,1257 @@ class TestApiClient:
             assert "sellerCardDetails" in trades[0]
             assert "buyerCardDetails" not in trades[0]
 
+    class TestRequestCoalescing:
+        """Single-flight merging of identical in-flight requests"""
 
-# ============================================================================
-# DISPLAY TESTS
-# ============================================================================
+        def test_concurrent_callers_share_one_execution(self):
+            """Test callers with the same key wait for and share the leader's result"""
+            flight = SingleFlight()
+            release = threading.Event()
+            calls = []
 
-class TestDisplay:
-    """Tests for Display module - visual formatting and output rendering"""
-    
-    class TestUtilityFormatters:
-        """Formatting utilities for time, grades, and values"""
-        
-        class TestTimeFormatting:
-            """Relative time formatting (e.g., '5 minutes ago')"""
-            
-            def test_formats_current_time_as_just_now(self):
-                """Test immediate time shows as 'just now'"""
-                now = datetime.now()
-                result = Display.formatTimeAgo(now)
-                assert result == "just now"
-            
-            def test_formats_30_seconds_ago_as_just_now(self):
-                """Test times under 60 seconds show as 'just now'"""
-                past = datetime.now() - timedelta(seconds=30)
-                result = Display.formatTimeAgo(past)
-                assert result == "just now"
-            
-            def test_formats_59_seconds_ago_as_just_now(self):
-                """Test boundary case at 59 seconds"""
-                past = datetime.now() - timedelta(seconds=59)
-                result = Display.formatTimeAgo(past)
-                assert result == "just now"
-            
-            def test_formats_minutes_ago_correctly(self):
-                """Test minute formatting"""
-                past = datetime.now() - timedelta(minutes=5)
-                result = Display.formatTimeAgo(past)
-                assert "5 minutes ago" in result
-            
-            def test_formats_single_minute_without_plural(self):
-                """Test singular 'minute' without 's'"""
-                past = datetime.now() - timedelta(minutes=1)
-                result = Display.formatTimeAgo(past)
-                assert "1 minute ago" in result
-            
-            def test_formats_59_minutes_with_plural(self):
-                """Test boundary case at 59 minutes"""
-                past = datetime.now() - timedelta(minutes=59)
-                result = Display.formatTimeAgo(past)
-                assert "59 minutes ago" in result
-            
-            def test_formats_hours_ago_correctly(self):
-                """Test hour formatting"""
-                past = datetime.now() - timedelta(hours=3)
-                result = Display.formatTimeAgo(past)
-                assert "3 hours ago" in result
-            
-            def test_formats_single_hour_without_plural(self):
-                """Test singular 'hour' without 's'"""
-                past = datetime.now() - timedelta(hours=1)
-                result = Display.formatTimeAgo(past)
-                assert "1 hour ago" in result
-            
-            def test_formats_23_hours_with_plural(self):
-                """Test boundary case at 23 hours"""
-                past = datetime.now() - timedelta(hours=23)
-                result = Display.formatTimeAgo(past)
-                assert "23 hours ago" in result
-            
-            def test_formats_days_ago_correctly(self):
-                """Test day formatting"""
-                past = datetime.now() - timedelta(days=2)
-                result = Display.formatTimeAgo(past)
-                assert "2 days ago" in result
-            
-            def test_formats_single_day_without_plural(self):
-                """Test singular 'day' without 's'"""
-                past = datetime.now() - timedelta(days=1)
-                result = Display.formatTimeAgo(past)
-                assert "1 day ago" in result
-            
-            def test_formats_many_days_ago(self):
-                """Test larger day values"""
-                past = datetime.now() - timedelta(days=30)
-                result = Display.formatTimeAgo(past)
-                assert "30 days ago" in result
-        
-        class TestGradeFormatting:
-            """Card grade formatting with star symbols"""
-            
-            def test_formats_factory_grade(self):
-                """Test FACTORY grade formatting"""
-                result = Display.formatGrade("FACTORY")
-                # Check it returns the star character (could be different encodings)
-                assert "★" in result or len(result) == 1
-            
-            def test_formats_lowercase_factory_grade(self):
-                """Test case-insensitive factory grade"""
-                result = Display.formatGrade("factory")
-                assert "★" in result or len(result) == 1
-            
-            def test_formats_limited_run_grade(self):
-                """Test LIMITED_RUN grade formatting"""
-                result = Display.formatGrade("LIMITED_RUN")
-                # Should have 2 stars
-                assert result.count("★") == 2 or len(result) >= 3
-            
-            def test_formats_limited_grade(self):
-                """Test LIMITED grade formatting"""
-                result = Display.formatGrade("LIMITED")
-                assert result.count("★") == 2 or len(result) >= 3
-            
-            def test_formats_nismo_grade(self):
-                """Test NISMO grade formatting"""
-                result = Display.formatGrade("NISMO")
-                # Should have 3 stars
-                assert result.count("★") == 3 or len(result) >= 5
-            
-            def test_formats_unknown_grade(self):
-                """Test unknown grades show placeholder"""
-                result = Display.formatGrade("UNKNOWN")
-                # Should return placeholder of some sort
-                assert len(result) >= 3
-            
-            def test_handles_none_grade(self):
-                """Test None grade shows placeholder"""
-                result = Display.formatGrade("UNKNOWN")
-                assert len(result) >= 3
-    
-    class TestCompletedTradesDisplay:
-        """Rendering completed trade cards"""
-        
-        def test_displays_message_when_no_trades_available(self, capsys):
-            """Test empty trades list shows appropriate message"""
-            display = Display()
-            display.showCompletedTrades([])
-            
-            captured = capsys.readouterr()
-            assert "No completed trades found" in captured.out
-        
-        def test_renders_price_trade_card(self, capsys):
-            """Test rendering of price-based trade"""
-            display = Display()
-            trades = [
-                {
-                    "type": "FOR_PRICE",
-                    "buyer_username": "TestBuyer",
-                    "vehicle": "Test Car",
-                    "grade": "FACTORY",
-                    "price": 5000,
-                    "executed_date": datetime.now() - timedelta(minutes=10),
-                    "seller_vehicle": "Test Car"
-                }
-            ]
-            display.showCompletedTrades(trades)
-            
-            captured = capsys.readouterr()
-            assert "COMPLETED TRADES" in captured.out
-            assert "TestBuyer" in captured.out
-            assert "Test Car" in captured.out
-            assert "C A R" in captured.out
-            assert "D E X" in captured.out
-            # Check for currency symbol and amount
-            assert "5,000" in captured.out
-        
-        def test_renders_card_trade(self, capsys):
-            """Test rendering of card-for-card trade"""
-            display = Display()
-            trades = [
-                {
-                    "type": "FOR_CARD",
-                    "buyer_username": "Buyer1",
-                    "seller_vehicle": "Car A",
-                    "buyer_vehicle": "Car B",
-                    "grade": "NISMO",
-                    "price": 0,
-                    "executed_date": datetime.now(),
-                    "vehicle": "Car A"
-                }
-            ]
-            display.showCompletedTrades(trades)
-            
-            captured = capsys.readouterr()
-            assert "Buyer1" in captured.out
-            assert "Car B" in captured.out and "Car A" in captured.out
-    
-    class TestOpenTradesDisplay:
-        """Rendering open trade listings"""
-        
-        def test_displays_message_when_no_open_trades_available(self, capsys):
-            """Test empty open trades shows message"""
-            display = Display()
-            display.showOpenTrades([])
-            
-            captured = capsys.readouterr()
-            assert "No open trades found" in captured.out
-        
-        def test_renders_price_based_open_trade(self, capsys):
-            """Test rendering of price-based open trade"""
-            display = Display()
-            trades = [
-                {
-                    "type": "FOR_PRICE",
-                    "seller_username": "OpenSeller",
-                    "vehicle": "Open Car",
-                    "grade": "LIMITED_RUN",
-                    "price": 10000,
-                    "want_vehicle": None
-                }
-            ]
-            display.showOpenTrades(trades)
-            
-            captured = capsys.readouterr()
-            assert "OPEN TRADES" in captured.out
-            assert "OpenSeller" in captured.out
-            assert "Open Car" in captured.out
-            assert "ASKING FOR" in captured.out
-            assert "10,000" in captured.out
-        
-        def test_renders_card_based_open_trade(self, capsys):
-            """Test rendering of card-for-card open trade"""
-            display = Display()
-            trades = [
-                {
-                    "type": "FOR_CARD",
-                    "seller_username": "CardTrader",
-                    "vehicle": "Trade Car",
-                    "grade": "NISMO",
-                    "price": 0,
-                    "want_vehicle": "Desired Car"
-                }
-            ]
-            display.showOpenTrades(trades)
-            
-            captured = capsys.readouterr()
-            assert "Desired Car" in captured.out
-            assert "ASKING FOR" in captured.out
+            def work():
+                calls.append(1)
+                release.wait(timeout=2)
+                return {"id": "card-1"}
+
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(flight.do("k", work))) for _ in range(5)]
+            for t in threads:
+                t.start()
+            while flight.coalesced < 4:
+                time.sleep(0.001)
+            release.set()
+            for t in threads:
+                t.join()
+
+            assert len(calls) == 1
+            assert len(results) == 5
+            assert all(r is results[0] for r in results)
+
+        def test_exception_is_shared_with_waiters(self):
+            """Test every waiter sees the leader's exception"""
+            flight = SingleFlight()
+            release = threading.Event()
+            errors = []
+
+            def work():
+                release.wait(timeout=2)
+                raise ValueError("boom")
+
+            def caller():
+                try:
+                    flight.do("k", work)
+                except ValueError as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=caller) for _ in range(3)]
+            for t in threads:
+                t.start()
+            while flight.coalesced < 2:
+                time.sleep(0.001)
+            release.set()
+            for t in threads:
+                t.join()
+
+            assert len(errors) == 3
+            assert flight.inFlight() == 0
+
+        def test_sequential_calls_are_not_coalesced(self):
+            """Test a finished call does not serve later callers"""
+            flight = SingleFlight()
+            counter = iter(range(10))
+
+            assert flight.do("k", lambda: next(counter)) == 0
+            assert flight.do("k", lambda: next(counter)) == 1
+
+        @patch('requests.get')
+        def test_concurrent_get_card_hits_server_once(self, mock_get):
+            """Test identical concurrent card lookups make a single request"""
+            release = threading.Event()
+
+            def side_effect(url, **kwargs):
+                release.wait(timeout=2)
+                mock_response = Mock()
+                mock_response.raise_for_status = Mock()
+                mock_response.content = json_codec.dumps({"id": "card-1", "name": "Hot Car"})
+                return mock_response
+
+            mock_get.side_effect = side_effect
+            client = APIClient()
+            client.access_token = "test-token"
+
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(client.getCard("card-1"))) for _ in range(4)]
+            for t in threads:
+                t.start()
+            while client.inflight.coalesced < 3:
+                time.sleep(0.001)
+            release.set()
+            for t in threads:
+                t.join()
+
+            assert mock_get.call_count == 1
+            assert all(r["name"] == "Hot Car" for r in results)
+
+        @patch('requests.get')
+        def test_enrichment_fetches_shared_cards_once(self, mock_get):
+            """Test a card referenced by several trades is fetched once"""
+            def side_effect(url, **kwargs):
+                mock_response = Mock()
+                mock_response.raise_for_status = Mock()
+                if "trades" in url:
+                    mock_response.content = json_codec.dumps({
+                        "trades": [{"id": str(i), "cardId": "card-1"} for i in range(3)]
+                    })
+                else:
+                    mock_response.content = json_codec.dumps({"id": "card-1", "name": "Hot Car"})
+                return mock_response
+
+            mock_get.side_effect = side_effect
+            client = APIClient()
+            client.access_token = "test-token"
+            trades = client.getOpenTradesWithDetails(limit=3)
+
+            card_calls = [c for c in mock_get.call_args_list if "cards/" in c[0][0]]
+            assert len(card_calls) == 1
+            assert all(t["cardDetails"]["name"] == "Hot Car" for t in trades)
+
+    class TestStreamingDecode:
+        """Incremental decoding of large list pages"""
+
+        BODY = (
+            b'{"total": 3, "meta": {"trades": [9]}, "trades": ['
+            b'{"id": "1", "note": "a ] tricky \\" string {"}, '
+            b'{"id": "2", "tags": [1, [2, 3]]}, '
+            b'{"id": "3", "name": "Caf\xc3\xa9 Racer"}'
+            b'], "limit": 3}'
+        )
+
+        def test_decodes_items_across_single_byte_chunks(self):
+            """Test items are recovered no matter where chunks are split"""
+            chunks = [self.BODY[i:i + 1] for i in range(len(self.BODY))]
+            items = list(iterArrayItems(chunks, "trades"))
+
+            assert [item["id"] for item in items] == ["1", "2", "3"]
+            assert items[0]["note"] == 'a ] tricky " string {'
+            assert items[1]["tags"] == [1, [2, 3]]
+            assert items[2]["name"] == "Caf\u00e9 Racer"
+
+        def test_yields_items_before_body_is_complete(self):
+            """Test the first item is available before later bytes arrive"""
+            stream = ArrayItemStream("cards")
+            first = stream.feed(b'{"cards": [{"id": "a"}, {"id": "b"')
+
+            assert first == [{"id": "a"}]
+            assert stream.feed(b'}]}') == [{"id": "b"}]
+            assert stream.finished
+
+        def test_discards_consumed_bytes(self):
+            """Test buffered bytes stay bounded by the current item"""
+            stream = ArrayItemStream("cards")
+            stream.feed(b'{"cards": [')
+            for i in range(1000):
+                stream.feed(b'{"id": "%d", "name": "Car"},' % i)
+            assert len(stream.buf) < 64
+
+        def test_handles_empty_array(self):
+            """Test an empty array yields nothing"""
+            assert list(iterArrayItems([b'{"trades": [], "total": 0}'], "trades")) == []
+
+        def test_raises_on_truncated_body(self):
+            """Test a body that ends mid-array is reported"""
+            with pytest.raises(ValueError):
+                list(iterArrayItems([b'{"trades": [{"id": "1"}, '], "trades"))
+
+        @patch('requests.get')
+        def test_stream_completed_trades_requests_compressed_stream(self, mock_get):
+            """Test streaming requests a compressed, chunked response"""
+            mock_response = Mock()
+            mock_response.raise_for_status = Mock()
+            mock_response.iter_content.return_value = iter([b'{"trades": [{"id": "1"},', b' {"id": "2"}]}'])
+            mock_get.return_value = mock_response
+
+            client = APIClient()
+            client.access_token = "test-token"
+            trades = list(client.streamCompletedTrades(limit=500))
+
+            assert [t["id"] for t in trades] == ["1", "2"]
+            kwargs = mock_get.call_args[1]
+            assert kwargs['stream'] is True
+            assert "gzip" in kwargs['headers']['Accept-Encoding']
+            assert kwargs['params']['limit'] == 500
+            mock_response.close.assert_called_once()
+
+        @patch('requests.get')
+        def test_garage_pages_through_cards_with_vehicles(self, mock_get):
+            """Test the inventory is pulled in full pages until a short one, with filters"""
+            def page(url, params=None, **kwargs):
+                start = params["offset"]
+                count = min(params["limit"], 5 - start)
+                body = json_codec.dumps({"cards": [{"id": str(start + i), "make": "Nissan"} for i in range(count)]})
+                response = Mock()
+                response.iter_content.return_value = iter([body])
+                return response
+            mock_get.side_effect = page
+
+            client = APIClient()
+            client.access_token = "test-token"
+            client.user_id = "user-1"
+            cards = list(client.streamUserCardsWithVehicles(grade="NISMO", page_size=2))
+
+            assert [c["id"] for c in cards] == ["0", "1", "2", "3", "4"]
+            assert mock_get.call_count == 3
+            assert mock_get.call_args[0][0].endswith("/users/user-1/cards/with-vehicles")
+            assert mock_get.call_args[1]["params"] == {"limit": 2, "offset": 4, "grade": "NISMO"}
+
+    class TestJsonCodec:
+        """Pluggable JSON codec selection and response decoding"""
+
+        def test_stdlib_codec_is_always_available(self):
+            """Test the stdlib fallback is always among the candidates"""
+            names = [codec.name for codec in json_codec.availableCodecs()]
+            assert names[-1] == "json"
+            assert json_codec.selectCodec("json").name == "json"
+
+        def test_unknown_preference_falls_back_to_fastest(self):
+            """Test an unavailable codec name selects the default"""
+            assert json_codec.selectCodec("missing").name == json_codec.availableCodecs()[0].name
+
+        def test_every_codec_round_trips_bytes(self):
+            """Test each codec encodes to bytes and decodes its own output"""
+            payload = {"trades": [{"id": "1", "price": 5000, "name": "Caf\u00e9"}]}
+            for codec in json_codec.availableCodecs():
+                encoded = codec.dumps(payload)
+                assert isinstance(encoded, bytes)
+                assert codec.loads(encoded) == payload
+
+        def test_decodes_raw_response_body(self):
+            """Test the raw body is decoded without requests' json path"""
+            response = Mock()
+            response.content = b'{"collections": []}'
+
+            assert json_codec.decodeResponse(response) == {"collections": []}
+            response.json.assert_not_called()
+
+    class TestServerSideFilters:
+        """Filters and sorting passed through to list endpoints"""
+
+        @patch('requests.get')
+        def test_open_trade_filters_are_sent_as_query_params(self, mock_get):
+            """Test set filters are forwarded and unset ones dropped"""
+            mock_response = Mock()
+            mock_response.content = json_codec.dumps({"trades": []})
+            mock_response.raise_for_status = Mock()
+            mock_get.return_value = mock_response
+
+            client = APIClient()
+            client.access_token = "test-token"
+            client.getOpenTrades(limit=5, grade="NISMO", maxPrice=5000, sortBy="price_asc", vehicleId=None)
+
+            params = mock_get.call_args[1]['params']
+            assert params['grade'] == "NISMO"
+            assert params['maxPrice'] == 5000
+            assert params['sortBy'] == "price_asc"
+            assert 'vehicleId' not in params
+
+        def test_rejects_unsupported_filters(self):
+            """Test filters the endpoint does not accept are reported"""
+            client = APIClient()
+            client.access_token = "test-token"
+
+            with pytest.raises(ValueError, match="minValue"):
+                client.getOpenTrades(minValue=10)
+
+        @patch('requests.get')
+        def test_retrieves_filtered_cards(self, mock_get):
+            """Test /cards filters and paging are forwarded"""
+            mock_response = Mock()
+            mock_response.content = json_codec.dumps({"cards": [{"id": "card-1"}]})
+            mock_response.raise_for_status = Mock()
+            mock_get.return_value = mock_response
+
+            client = APIClient()
+            client.access_token = "test-token"
+            cards = client.getCards(limit=20, offset=40, grade="FACTORY", minValue=100, sortBy="value_desc")
+
+            assert cards == [{"id": "card-1"}]
+            assert mock_get.call_args[0][0].endswith("/cards")
+            params = mock_get.call_args[1]['params']
+            assert params == {"limit": 20, "offset": 40, "grade": "FACTORY", "minValue": 100, "sortBy": "value_desc"}
+
+    class TestVehicleRetrieval:
+        """Vehicle catalog and card cache used by search"""
+
+        @patch('requests.get')
+        def test_retrieves_vehicles(self, mock_get):
+            """Test fetching all vehicles"""
+            mock_response = Mock()
+            mock_response.content = json_codec.dumps({"vehicles": [{"id": "v1", "make": "Nissan"}]})
+            mock_response.raise_for_status = Mock()
+            mock_get.return_value = mock_response
+
+            client = APIClient()
+            client.access_token = "test-token"
+
+            assert client.getVehicles() == [{"id": "v1", "make": "Nissan"}]
+            assert mock_get.call_args[0][0].endswith("/cards/vehicles")
+
+        @patch('requests.get')
+        def test_fetched_cards_are_cached(self, mock_get):
+            """Test card details are remembered for the search index"""
+            mock_response = Mock()
+            mock_response.content = json_codec.dumps({"id": "card-1", "name": "Test Car", "vehicleId": "v1"})
+            mock_response.raise_for_status = Mock()
+            mock_get.return_value = mock_response
+
+            client = APIClient()
+            client.access_token = "test-token"
+            client.getCard("card-1")
+
+            assert client.card_cache["card-1"]["vehicleId"] == "v1"
+
+    class TestCatalogCache:
+        """Stale-while-revalidate caching of collections and vehicles"""
+
+        @staticmethod
+        def makeClock(start=1000.0):
+            now = [start]
+            return now, (lambda: now[0])
+
+        def test_fresh_entry_is_served_without_fetching(self):
+            """Test reads within the soft TTL never fetch"""
+            now, clock = self.makeClock()
+            cache = StaleWhileRevalidateCache(soft_ttl=60, clock=clock)
+            fetch = Mock(return_value=CacheEntry(["a"]))
+
+            assert cache.get("k", fetch) == ["a"]
+            now[0] += 30
+            assert cache.get("k", fetch) == ["a"]
+            fetch.assert_called_once_with(None)
+
+        def test_stale_entry_is_served_while_refreshing(self):
+            """Test stale reads return at once and refresh in the background"""
+            now, clock = self.makeClock()
+            cache = StaleWhileRevalidateCache(soft_ttl=60, clock=clock)
+            cache.get("k", lambda previous: CacheEntry(["old"], etag='"v1"'))
+
+            release = threading.Event()
+            seen = []
+
+            def refresh(previous):
+                seen.append(previous.etag)
+                release.wait(timeout=2)
+                return CacheEntry(["new"])
+
+            now[0] += 120
+            assert cache.get("k", refresh) == ["old"]
+            release.set()
+            cache.wait(timeout=2)
+
+            assert seen == ['"v1"']
+            assert cache.get("k", refresh) == ["new"]
+
+        def test_failed_refresh_keeps_stale_copy(self):
+            """Test background errors do not drop the cached value"""
+            now, clock = self.makeClock()
+            cache = StaleWhileRevalidateCache(soft_ttl=60, clock=clock)
+            cache.get("k", lambda previous: CacheEntry(["old"]))
+
+            now[0] += 120
+            cache.get("k", Mock(side_effect=requests.exceptions.ConnectionError()))
+            cache.wait(timeout=2)
+
+            assert cache.get("k", lambda previous: CacheEntry(["x"])) == ["old"]
+            assert isinstance(cache.last_error, requests.exceptions.ConnectionError)
+
+        def test_entries_persist_across_instances(self, tmp_path):
+            """Test a later session starts warm from disk"""
+            path = str(tmp_path / "catalog.json")
+            StaleWhileRevalidateCache(path=path).get("k", lambda previous: CacheEntry({"collections": [1]}, etag="abc"))
+
+            fetch = Mock()
+            cache = StaleWhileRevalidateCache(path=path)
+            assert cache.get("k", fetch) == {"collections": [1]}
+            assert cache.entries["k"].etag == "abc"
+            fetch.assert_not_called()
+
+        @patch('requests.get')
+        def test_shop_and_collections_share_cached_catalog(self, mock_get):
+            """Test packs and collections reuse one /collections response"""
+            mock_response = Mock()
+            mock_response.content = json_codec.dumps({"collections": [{"id": "1", "name": "JDM Legends"}]})
+            mock_response.raise_for_status = Mock()
+            mock_get.return_value = mock_response
+
+            client = APIClient()
+            client.access_token = "test-token"
+            packs = client.getAvailablePacks()
+            collections = client.getCollections()
+
+            assert packs == collections
+            assert mock_get.call_count == 1
+
+        @patch('requests.get')
+        def test_revalidation_sends_validators_and_handles_304(self, mock_get):
+            """Test refreshes are conditional and 304 keeps the cached body"""
+            first = Mock()
+            first.status_code = 200
+            first.headers = {"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"}
+            first.content = json_codec.dumps({"collections": [{"id": "1"}]})
+            not_modified = Mock()
+            not_modified.status_code = 304
+            mock_get.side_effect = [first, not_modified]
+
+            client = APIClient()
+            client.access_token = "test-token"
+            client.getCollections()
+
+            url = mock_get.call_args[0][0]
+            client.catalog_cache.entries[url].fetched_at -= 3600
+            assert client.getCollections() == [{"id": "1"}]
+            client.catalog_cache.wait(timeout=2)
+
+            headers = mock_get.call_args[1]['headers']
+            assert headers['If-None-Match'] == '"v1"'
+            assert headers['If-Modified-Since'] == "Wed, 01 Jan 2025 00:00:00 GMT"
+            refreshed = client.catalog_cache.entries[url]
+            assert refreshed.value == {"collections": [{"id": "1"}]}
+            assert refreshed.etag == '"v1"'
+            assert client.catalog_cache.age(refreshed) < 60
+
+    class TestRateLimiting:
+        """Token bucket, AIMD concurrency and Retry-After handling"""
+
+        @staticmethod
+        def makeClock(start=1000.0):
+            now = [start]
+
+            def sleep(seconds):
+                now[0] += seconds
+
+            return now, (lambda: now[0]), sleep
+
+        def test_bucket_allows_burst_then_paces(self):
+            """Test a drained bucket waits for refills at the configured rate"""
+            now, clock, sleep = self.makeClock()
+            bucket = TokenBucket(rate=10, burst=3, clock=clock, sleep=sleep)
+
+            for _ in range(3):
+                bucket.acquire()
+            assert now[0] == 1000.0
+
+            bucket.acquire()
+            assert now[0] == pytest.approx(1000.1)
+
+        def test_bucket_pause_blocks_until_deadline(self):
+            """Test a Retry-After pause holds back every token"""
+            now, clock, sleep = self.makeClock()
+            bucket = TokenBucket(rate=10, burst=3, clock=clock, sleep=sleep)
+
+            bucket.pause(5)
+            bucket.acquire()
+            assert now[0] >= 1005.0
+
+        def test_aimd_grows_on_healthy_latency(self):
+            """Test fast responses add about one slot per window"""
+            controller = AIMDController(initial=4, maximum=32)
+            for _ in range(4):
+                controller.acquire()
+                controller.release(0.01)
+            assert 4.9 < controller.limit < 5.1
+
+        def test_aimd_halves_on_overload_once_per_cooldown(self):
+            """Test a burst of errors shrinks the window once, not to the floor"""
+            now, clock, _ = self.makeClock()
+            controller = AIMDController(initial=8, clock=clock)
+            for _ in range(5):
+                controller.acquire()
+                controller.release(0.01, overloaded=True)
+            assert controller.limit == 4
+
+            now[0] += 2
+            controller.acquire()
+            controller.release(0.01, overloaded=True)
+            assert controller.limit == 2
+
+        def test_aimd_shrinks_when_latency_rises(self):
+            """Test latency far above the recent best counts as congestion"""
+            controller = AIMDController(initial=8)
+            controller.acquire()
+            controller.release(0.02)
+            controller.acquire()
+            controller.release(0.5)
+            assert controller.limit < 8
+
+        def test_aimd_judges_latency_per_request_kind(self):
+            """Test a big page is not slow next to single-card lookups, only next to pages like it"""
+            controller = AIMDController(initial=8)
+            for latency, kind in ((0.02, ("/cards/{id}", None)), (0.5, ("/cards", 1000))):
+                controller.acquire()
+                controller.release(latency, key=kind)
+            assert controller.limit > 8
+
+            controller.acquire()
+            controller.release(1.5, key=("/cards", 1000))
+            assert controller.limit < 8
+
+        @patch('requests.get')
+        def test_streamed_request_holds_its_slot_until_read(self, mock_get):
+            """Test a streamed page counts against concurrency until its body is consumed"""
+            streamed = Mock(status_code=200, headers={})
+            streamed.iter_content.return_value = iter([b'{"cards": [{"id": "c1"}, ', b'{"id": "c2"}]}'])
+            mock_get.return_value = streamed
+            client = APIClient()
+            client.access_token = "test-token"
+
+            cards = client.streamCards(limit=2)
+            assert next(cards) == {"id": "c1"}
+            assert client.limiter.concurrency.in_flight == 1
+            assert list(cards) == [{"id": "c2"}]
+            assert client.limiter.concurrency.in_flight == 0
+
+        def test_aimd_caps_in_flight_requests(self):
+            """Test acquire blocks once the concurrency limit is reached"""
+            controller = AIMDController(initial=1)
+            controller.acquire()
+            acquired = threading.Event()
+
+            def second():
+                controller.acquire()
+                acquired.set()
+
+            thread = threading.Thread(target=second)
+            thread.start()
+            assert not acquired.wait(timeout=0.1)
+            controller.release(0.01)
+            assert acquired.wait(timeout=2)
+            thread.join()
+
+        def test_parses_retry_after_formats(self):
+            """Test delta-seconds, HTTP-date and junk Retry-After values"""
+            assert parseRetryAfter("3") == 3.0
+            assert parseRetryAfter("Wed, 01 Jan 2025 00:00:10 GMT", now=1735689600.0) == 10.0
+            assert parseRetryAfter("soon") is None
+            assert parseRetryAfter(None) is None
+
+        @patch('requests.get')
+        def test_429_is_retried_after_retry_after(self, mock_get):
+            """Test the client waits out Retry-After and then retries"""
+            throttled = Mock()
+            throttled.status_code = 429
+            throttled.headers = {"Retry-After": "2"}
+            ok = Mock()
+            ok.status_code = 200
+            ok.content = json_codec.dumps({"trades": [{"id": "t1"}]})
+            mock_get.side_effect = [throttled, ok]
+
+            now, clock, sleep = self.makeClock()
+            client = APIClient()
+            client.access_token = "test-token"
+            client.limiter = AdaptiveLimiter(TokenBucket(clock=clock, sleep=sleep), AIMDController(clock=clock))
+
+            assert client.getOpenTrades() == [{"id": "t1"}]
+            assert mock_get.call_count == 2
+            assert now[0] >= 1002.0
+            assert client.limiter.throttled == 1
+            assert client.limiter.concurrency.limit < 8
+
+        @patch('requests.get')
+        def test_gives_up_after_max_retries(self, mock_get):
+            """Test persistent 503s surface as an HTTP error"""
+            unavailable = Mock()
+            unavailable.status_code = 503
+            unavailable.headers = {"Retry-After": "0"}
+            unavailable.raise_for_status.side_effect = requests.exceptions.HTTPError(response=unavailable)
+            mock_get.return_value = unavailable
+
+            client = APIClient()
+            client.access_token = "test-token"
+
+            with pytest.raises(requests.exceptions.HTTPError):
+                client.getOpenTrades()
+            assert mock_get.call_count == 3
+
+        @patch('requests.post')
+        def test_throttled_write_is_not_resent(self, mock_post):
+            """Test a 503 on a POST is surfaced instead of risking a second purchase"""
+            unavailable = Mock(status_code=503, headers={"Retry-After": "0"})
+            unavailable.raise_for_status.side_effect = requests.exceptions.HTTPError(response=unavailable)
+            mock_post.return_value = unavailable
+
+            client = APIClient()
+            client.access_token = "test-token"
+
+            with pytest.raises(requests.exceptions.HTTPError):
+                client.purchasePack("col-1")
+            assert mock_post.call_count == 1
+
+        @patch('requests.get')
+        def test_unthrottled_client_reaches_the_server(self, mock_get):
+            """Test throttle=False sends every request once, with no breaker or retries in the way"""
+            mock_get.side_effect = requests.exceptions.ConnectionError("refused")
+            client = APIClient(throttle=False)
+            client.access_token = "test-token"
+
+            for _ in range(8):
+                with pytest.raises(requests.exceptions.ConnectionError):
+                    client.getOpenTrades()
+            assert mock_get.call_count == 8
+
+            throttled = Mock(status_code=429, headers={})
+            throttled.raise_for_status.side_effect = requests.exceptions.HTTPError(response=throttled)
+            mock_get.side_effect = None
+            mock_get.return_value = throttled
+            with pytest.raises(requests.exceptions.HTTPError):
+                client.getCompletedTrades()
+            assert mock_get.call_count == 9
+
+    class TestResilience:
+        """Hedged GETs and per-endpoint circuit breakers"""
+
+        @staticmethod
+        def warmHedger(hedger, endpoint, latency=0.01):
+            for _ in range(hedger.min_samples):
+                hedger.tracker(endpoint).record(latency)
+
+        def test_endpoint_key_collapses_ids(self):
+            """Test requests for different cards share one endpoint"""
+            card = "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+            assert endpointKey(f"http://localhost:8080/cards/{card}") == "/cards/{id}"
+            assert endpointKey("http://localhost:8080/trades?limit=5") == "/trades"
+            assert endpointKey("http://localhost:8080/users/42/cards") == "/users/{id}/cards"
+
+        def test_no_hedge_without_latency_history(self):
+            """Test calls run inline until the endpoint has enough samples"""
+            hedger = Hedger()
+            assert hedger.call("/trades", lambda: "ok") == "ok"
+            assert hedger.hedges == 0
+
+        def test_slow_call_is_hedged_and_fastest_wins(self):
+            """Test a duplicate is sent after the p95 and its answer is used"""
+            hedger = Hedger(min_delay=0.01)
+            self.warmHedger(hedger, "/cards/{id}")
+            release = threading.Event()
+            attempts = []
+
+            def fetch():
+                attempts.append(1)
+                if len(attempts) == 1:
+                    release.wait(timeout=2)
+                    return "slow"
+                return "fast"
+
+            assert hedger.call("/cards/{id}", fetch) == "fast"
+            release.set()
+            assert hedger.hedges == 1
+            assert hedger.hedge_wins == 1
+
+        def test_hedging_respects_budget(self):
+            """Test hedges stop once they exceed the budgeted fraction"""
+            hedger = Hedger(min_delay=0.001, budget=0.1)
+            self.warmHedger(hedger, "/trades", latency=0.0)
+            for _ in range(5):
+                hedger.call("/trades", lambda: time.sleep(0.01))
+            assert hedger.hedges == 1
+
+        def test_hedge_raises_when_every_attempt_fails(self):
+            """Test the first error surfaces if both attempts fail"""
+            hedger = Hedger(min_delay=0.01)
+            self.warmHedger(hedger, "/trades")
+
+            def fetch():
+                time.sleep(0.05)
+                raise requests.exceptions.ConnectionError("down")
+
+            with pytest.raises(requests.exceptions.ConnectionError):
+                hedger.call("/trades", fetch)
+
+        def test_close_does_not_wait_for_running_hedges(self):
+            """Test closing the client returns at once and no more hedges can be started"""
+            client = APIClient()
+            release = threading.Event()
+            running = client.hedger._pool.submit(release.wait, 2)
+
+            start = time.monotonic()
+            client.close()
+            assert time.monotonic() - start < 0.5
+            release.set()
+            assert running.result(timeout=2) is True
+            with pytest.raises(RuntimeError):
+                client.hedger._pool.submit(lambda: None)
+
+        def test_breaker_opens_then_probes(self):
+            """Test fail-fast after repeated failures and recovery via one probe"""
+            now = [0.0]
+            breaker = CircuitBreaker(threshold=3, reset_timeout=10, clock=lambda: now[0])
+            for _ in range(3):
+                assert breaker.allow()
+                breaker.recordFailure()
+            assert breaker.state == CircuitBreaker.OPEN
+            assert not breaker.allow()
+
+            now[0] += 10
+            assert breaker.allow()
+            assert not breaker.allow()  # only one probe at a time
+            breaker.recordSuccess()
+            assert breaker.state == CircuitBreaker.CLOSED
+
+        def test_failed_probe_reopens_breaker(self):
+            """Test a failing probe restarts the open period"""
+            now = [0.0]
+            breaker = CircuitBreaker(threshold=1, reset_timeout=10, clock=lambda: now[0])
+            breaker.recordFailure()
+            now[0] += 10
+            assert breaker.allow()
+            breaker.recordFailure()
+            assert breaker.state == CircuitBreaker.OPEN
+            assert breaker.retryIn() == 10
+
+        @patch('requests.get')
+        def test_client_fails_fast_on_open_breaker(self, mock_get):
+            """Test a failing endpoint stops being called"""
+            mock_get.side_effect = requests.exceptions.ConnectionError("refused")
+            client = APIClient()
+            client.access_token = "test-token"
+
+            for _ in range(5):
+                with pytest.raises(requests.exceptions.ConnectionError):
+                    client.getOpenTrades()
+            with pytest.raises(CircuitOpenError):
+                client.getOpenTrades()
+            assert mock_get.call_count == 5
+
+            # Other endpoints are unaffected
+            mock_get.side_effect = None
+            mock_get.return_value = Mock(status_code=200, content=json_codec.dumps({"trades": []}))
+            assert client.getCompletedTrades() == []
+
+    class TestWriteOperations:
+        """Account, pack and trade write endpoints"""
+
+        @staticmethod
+        def makeClient(mock_post, body):
+            mock_response = Mock(status_code=200)
+            mock_response.content = json_codec.dumps(body)
+            mock_post.return_value = mock_response
+            client = APIClient()
+            client.access_token = "test-token"
+            client.user_id = "user-1"
+            return client
+
+        @patch('requests.post')
+        def test_login_stores_user_id(self, mock_post):
+            """Test the logged-in user's ID is kept for /users/{id} calls"""
+            client = self.makeClient(mock_post, {"accessToken": "tok", "user": {"id": "user-9"}})
+            assert client.login("player", "secret")
+            assert client.user_id == "user-9"
+
+        @patch('requests.post')
+        def test_register_logs_new_user_in(self, mock_post):
+            """Test registration stores the returned token and user"""
+            client = APIClient()
+            mock_post.return_value = Mock(status_code=200, content=json_codec.dumps({"accessToken": "tok", "user": {"id": "u2"}}))
+            assert client.register("newbie", "secret")
+            assert (client.access_token, client.user_id) == ("tok", "u2")
+            assert mock_post.call_args[0][0].endswith("/auth/register")
+            assert "Authorization" not in mock_post.call_args[1]["headers"]
+
+        @patch('requests.post')
+        def test_register_reports_taken_username(self, mock_post, capsys):
+            """Test a 409 explains the username is taken"""
+            mock_post.side_effect = requests.exceptions.HTTPError(response=Mock(status_code=409))
+            assert not APIClient().register("taken", "secret")
+            assert "already taken" in capsys.readouterr().out
+
+        @patch('requests.post')
+        def test_purchase_and_open_pack(self, mock_post):
+            """Test pack endpoints and request bodies"""
+            client = self.makeClient(mock_post, {"pack": {"id": "p1"}, "userCurrency": 100})
+            assert client.purchasePack("col-1")["pack"]["id"] == "p1"
+            assert mock_post.call_args[0][0].endswith("/packs/purchase")
+            assert mock_post.call_args[1]["json"] == {"collectionId": "col-1"}
+
+            client.openPack("p1")
+            assert mock_post.call_args[0][0].endswith("/packs/p1/open")
+
+        @patch('requests.post')
+        def test_create_trade_infers_type(self, mock_post):
+            """Test price listings and card swaps send the right trade type"""
+            client = self.makeClient(mock_post, {"id": "t1"})
+            client.createTrade("card-1", price=500)
+            assert mock_post.call_args[1]["json"] == {"type": "FOR_PRICE", "cardId": "card-1", "price": 500}
+
+            client.createTrade("card-1", want_card_id="card-2")
+            assert mock_post.call_args[1]["json"] == {"type": "FOR_CARD", "cardId": "card-1", "wantCardId": "card-2"}
+
+        @patch('requests.post')
+        def test_execute_trade(self, mock_post):
+            """Test buying a listing posts to the trade's execute endpoint"""
+            client = self.makeClient(mock_post, {"completed_trade": {"id": "t1"}})
+            client.executeTrade("t1")
+            assert mock_post.call_args[0][0].endswith("/trades/t1/execute")
+            assert mock_post.call_args[1]["json"] == {}
+
+        @patch('requests.get')
+        def test_get_user_cards_defaults_to_current_user(self, mock_get):
+            """Test /users/{id}/cards uses the logged-in user and drops unset filters"""
+            mock_get.return_value = Mock(status_code=200, content=json_codec.dumps({"cards": [{"id": "c1"}]}))
+            client = APIClient()
+            client.access_token = "test-token"
+            client.user_id = "user-1"
+
+            assert client.getUserCards(grade="NISMO") == [{"id": "c1"}]
+            assert mock_get.call_args[0][0].endswith("/users/user-1/cards")
+            assert mock_get.call_args[1]["params"] == {"limit": 50, "offset": 0, "grade": "NISMO"}
+
+    class TestTracing:
+        """Spans, traceparent propagation and exporters"""
+
+        def test_spans_nest_and_share_a_trace(self):
+            """Test a span opened inside another becomes its child"""
+            exporter = InMemoryExporter()
+            tracer = Tracer(exporter)
+            with tracer.span("outer") as outer:
+                with tracer.span("inner", card="c1") as inner:
+                    assert currentSpan() is inner
+            assert currentSpan() is None
+
+            assert inner.trace_id == outer.trace_id
+            assert inner.parent_id == outer.span_id
+            assert outer.parent_id is None
+            assert [span.name for span in exporter.spans] == ["inner", "outer"]
+            assert inner.attributes == {"card": "c1"}
+
+        def test_traceparent_follows_w3c_format(self):
+            """Test version-traceid-spanid-flags with the right widths"""
+            with Tracer().span("request") as span:
+                version, trace_id, span_id, flags = span.traceparent.split("-")
+            assert (version, flags) == ("00", "01")
+            assert len(trace_id) == 32 and len(span_id) == 16
+            assert set(trace_id + span_id) <= set("0123456789abcdef")
+
+        def test_errors_are_recorded_on_the_span(self):
+            """Test an exception marks the span failed and still exports it"""
+            exporter = InMemoryExporter()
+            with pytest.raises(ValueError):
+                with Tracer(exporter).span("boom"):
+                    raise ValueError("bad")
+            assert exporter.spans[0].status == "error"
+            assert "ValueError: bad" in exporter.spans[0].attributes["error"]
+
+        def test_propagate_carries_parent_into_threads(self):
+            """Test spans opened by pool workers join the submitting span"""
+            exporter = InMemoryExporter()
+            tracer = Tracer(exporter)
+
+            def work(i):
+                with tracer.span("child", i=i):
+                    pass
+
+            with tracer.span("parent") as parent, ThreadPoolExecutor(max_workers=2) as pool:
+                list(pool.map(propagate(work), range(3)))
+
+            children = exporter.byName("child")
+            assert len(children) == 3
+            assert all(child.parent_id == parent.span_id for child in children)
+
+        def test_json_lines_exporter_appends_spans(self, tmp_path):
+            """Test each finished span is one JSON line"""
+            path = str(tmp_path / "trace" / "spans.jsonl")
+            tracer = Tracer(JsonLinesExporter(path))
+            with tracer.span("a"):
+                with tracer.span("b", limit=5):
+                    pass
+
+            rows = [json_codec.loads(line) for line in open(path, "rb")]
+            assert [row["name"] for row in rows] == ["b", "a"]
+            assert rows[0]["parent_id"] == rows[1]["span_id"]
+            assert rows[0]["attributes"] == {"limit": 5}
+            assert rows[0]["duration_ms"] >= 0
+
+        @patch('requests.get')
+        def test_enrichment_fan_out_is_traced(self, mock_get):
+            """Test list call and per-card fetches form one trace with traceparent headers"""
+            def side_effect(url, **kwargs):
+                mock_response = Mock(status_code=200)
+                if "trades" in url:
+                    mock_response.content = json_codec.dumps({"trades": [{"id": "t1", "cardId": "c1"}, {"id": "t2", "cardId": "c2"}]})
+                else:
+                    mock_response.content = json_codec.dumps({"id": url.rsplit("/", 1)[1], "name": "Hot Car"})
+                return mock_response
+
+            mock_get.side_effect = side_effect
+            exporter = InMemoryExporter()
+            client = APIClient(tracer=Tracer(exporter))
+            client.access_token = "test-token"
+            client.getOpenTradesWithDetails(limit=2)
+
+            root, = exporter.byName("getOpenTradesWithDetails")
+            list_call, = exporter.byName("GET /trades")
+            fan_out, = exporter.byName("getCardsById")
+            card_calls = exporter.byName("GET /cards/c1") + exporter.byName("GET /cards/c2")
+            http_spans = [span for span in exporter.spans if span.name.startswith("HTTP GET")]
+
+            assert {span.trace_id for span in exporter.spans} == {root.trace_id}
+            assert list_call.parent_id == root.span_id
+            assert fan_out.parent_id == root.span_id
+            assert {span.parent_id for span in card_calls} == {fan_out.span_id}
+            assert all(span.attributes["status"] == 200 for span in http_spans)
+
+            sent = {c[1]["headers"]["traceparent"] for c in mock_get.call_args_list}
+            assert sent == {span.traceparent for span in http_spans}
+
+
+# ============================================================================
+# DISPLAY TESTS
+# ============================================================================
+
+class TestDisplay:
+    """Tests for Display module - visual formatting and output rendering"""
+    
+    class TestUtilityFormatters:
+        """Formatting utilities for time, grades, and values"""
+        
+        class TestTimeFormatting:
+            """Relative time formatting (e.g., '5 minutes ago')"""
+            
+            def test_formats_current_time_as_just_now(self):
+                """Test immediate time shows as 'just now'"""
+                now = datetime.now()
+                result = Display.formatTimeAgo(now)
+                assert result == "just now"
+            
+            def test_formats_30_seconds_ago_as_just_now(self):
+                """Test times under 60 seconds show as 'just now'"""
+                past = datetime.now() - timedelta(seconds=30)
+                result = Display.formatTimeAgo(past)
+                assert result == "just now"
+            
+            def test_formats_59_seconds_ago_as_just_now(self):
+                """Test boundary case at 59 seconds"""
+                past = datetime.now() - timedelta(seconds=59)
+                result = Display.formatTimeAgo(past)
+                assert result == "just now"
+            
+            def test_formats_minutes_ago_correctly(self):
+                """Test minute formatting"""
+                past = datetime.now() - timedelta(minutes=5)
+                result = Display.formatTimeAgo(past)
+                assert "5 minutes ago" in result
+            
+            def test_formats_single_minute_without_plural(self):
+                """Test singular 'minute' without 's'"""
+                past = datetime.now() - timedelta(minutes=1)
+                result = Display.formatTimeAgo(past)
+                assert "1 minute ago" in result
+            
+            def test_formats_59_minutes_with_plural(self):
+                """Test boundary case at 59 minutes"""
+                past = datetime.now() - timedelta(minutes=59)
+                result = Display.formatTimeAgo(past)
+                assert "59 minutes ago" in result
+            
+            def test_formats_hours_ago_correctly(self):
+                """Test hour formatting"""
+                past = datetime.now() - timedelta(hours=3)
+                result = Display.formatTimeAgo(past)
+                assert "3 hours ago" in result
+            
+            def test_formats_single_hour_without_plural(self):
+                """Test singular 'hour' without 's'"""
+                past = datetime.now() - timedelta(hours=1)
+                result = Display.formatTimeAgo(past)
+                assert "1 hour ago" in result
+            
+            def test_formats_23_hours_with_plural(self):
+                """Test boundary case at 23 hours"""
+                past = datetime.now() - timedelta(hours=23)
+                result = Display.formatTimeAgo(past)
+                assert "23 hours ago" in result
+            
+            def test_formats_days_ago_correctly(self):
+                """Test day formatting"""
+                past = datetime.now() - timedelta(days=2)
+                result = Display.formatTimeAgo(past)
+                assert "2 days ago" in result
+            
+            def test_formats_single_day_without_plural(self):
+                """Test singular 'day' without 's'"""
+                past = datetime.now() - timedelta(days=1)
+                result = Display.formatTimeAgo(past)
+                assert "1 day ago" in result
+            
+            def test_formats_many_days_ago(self):
+                """Test larger day values"""
+                past = datetime.now() - timedelta(days=30)
+                result = Display.formatTimeAgo(past)
+                assert "30 days ago" in result
+        
+        class TestGradeFormatting:
+            """Card grade formatting with star symbols"""
+            
+            def test_formats_factory_grade(self):
+                """Test FACTORY grade formatting"""
+                result = Display.formatGrade("FACTORY")
+                # Check it returns the star character (could be different encodings)
+                assert "★" in result or len(result) == 1
+            
+            def test_formats_lowercase_factory_grade(self):
+                """Test case-insensitive factory grade"""
+                result = Display.formatGrade("factory")
+                assert "★" in result or len(result) == 1
+            
+            def test_formats_limited_run_grade(self):
+                """Test LIMITED_RUN grade formatting"""
+                result = Display.formatGrade("LIMITED_RUN")
+                # Should have 2 stars
+                assert result.count("★") == 2 or len(result) >= 3
+            
+            def test_formats_limited_grade(self):
+                """Test LIMITED grade formatting"""
+                result = Display.formatGrade("LIMITED")
+                assert result.count("★") == 2 or len(result) >= 3
+            
+            def test_formats_nismo_grade(self):
+                """Test NISMO grade formatting"""
+                result = Display.formatGrade("NISMO")
+                # Should have 3 stars
+                assert result.count("★") == 3 or len(result) >= 5
+            
+            def test_formats_unknown_grade(self):
+                """Test unknown grades show placeholder"""
+                result = Display.formatGrade("UNKNOWN")
+                # Should return placeholder of some sort
+                assert len(result) >= 3
+            
+            def test_handles_none_grade(self):
+                """Test None grade shows placeholder"""
+                result = Display.formatGrade("UNKNOWN")
+                assert len(result) >= 3
+    
+    class TestCompletedTradesDisplay:
+        """Rendering completed trade cards"""
+        
+        def test_displays_message_when_no_trades_available(self, capsys):
+            """Test empty trades list shows appropriate message"""
+            display = Display()
+            display.showCompletedTrades([])
+            
+            captured = capsys.readouterr()
+            assert "No completed trades found" in captured.out
+        
+        def test_renders_price_trade_card(self, capsys):
+            """Test rendering of price-based trade"""
+            display = Display()
+            trades = [
+                {
+                    "type": "FOR_PRICE",
+                    "buyer_username": "TestBuyer",
+                    "vehicle": "Test Car",
+                    "grade": "FACTORY",
+                    "price": 5000,
+                    "executed_date": datetime.now() - timedelta(minutes=10),
+                    "seller_vehicle": "Test Car"
+                }
+            ]
+            display.showCompletedTrades(trades)
+            
+            captured = capsys.readouterr()
+            assert "COMPLETED TRADES" in captured.out
+            assert "TestBuyer" in captured.out
+            assert "Test Car" in captured.out
+            assert "C A R" in captured.out
+            assert "D E X" in captured.out
+            # Check for currency symbol and amount
+            assert "5,000" in captured.out
+        
+        def test_renders_card_trade(self, capsys):
+            """Test rendering of card-for-card trade"""
+            display = Display()
+            trades = [
+                {
+                    "type": "FOR_CARD",
+                    "buyer_username": "Buyer1",
+                    "seller_vehicle": "Car A",
+                    "buyer_vehicle": "Car B",
+                    "grade": "NISMO",
+                    "price": 0,
+                    "executed_date": datetime.now(),
+                    "vehicle": "Car A"
+                }
+            ]
+            display.showCompletedTrades(trades)
+            
+            captured = capsys.readouterr()
+            assert "Buyer1" in captured.out
+            assert "Car B" in captured.out and "Car A" in captured.out
+    
+    class TestOpenTradesDisplay:
+        """Rendering open trade listings"""
+        
+        def test_displays_message_when_no_open_trades_available(self, capsys):
+            """Test empty open trades shows message"""
+            display = Display()
+            display.showOpenTrades([])
+            
+            captured = capsys.readouterr()
+            assert "No open trades found" in captured.out
+        
+        def test_renders_price_based_open_trade(self, capsys):
+            """Test rendering of price-based open trade"""
+            display = Display()
+            trades = [
+                {
+                    "type": "FOR_PRICE",
+                    "seller_username": "OpenSeller",
+                    "vehicle": "Open Car",
+                    "grade": "LIMITED_RUN",
+                    "price": 10000,
+                    "want_vehicle": None
+                }
+            ]
+            display.showOpenTrades(trades)
+            
+            captured = capsys.readouterr()
+            assert "OPEN TRADES" in captured.out
+            assert "OpenSeller" in captured.out
+            assert "Open Car" in captured.out
+            assert "ASKING FOR" in captured.out
+            assert "10,000" in captured.out
+        
+        def test_renders_card_based_open_trade(self, capsys):
+            """Test rendering of card-for-card open trade"""
+            display = Display()
+            trades = [
+                {
+                    "type": "FOR_CARD",
+                    "seller_username": "CardTrader",
+                    "vehicle": "Trade Car",
+                    "grade": "NISMO",
+                    "price": 0,
+                    "want_vehicle": "Desired Car"
+                }
+            ]
+            display.showOpenTrades(trades)
+            
+            captured = capsys.readouterr()
+            assert "Desired Car" in captured.out
+            assert "ASKING FOR" in captured.out
     
+    class TestCardsDisplay:
+        """Card listing display tests"""
+
+        def test_displays_message_when_no_cards_available(self, capsys):
+            """Test empty card list message"""
+            Display().showCards([])
+            captured = capsys.readouterr()
+            assert "No cards found" in captured.out
+
+        def test_renders_card(self, capsys):
+            """Test card box rendering"""
+            Display().showCards([{"grade": "NISMO", "vehicle": "1999 Nissan Skyline GT-R", "value": 12000}])
+            captured = capsys.readouterr()
+            assert "1999 Nissan Skyline GT-R" in captured.out
+            assert "★ ★ ★" in captured.out
+            assert "©12,000" in captured.out
+
+    class TestGarageDisplay:
+        """Streamed inventory listing"""
+
+        def test_renders_rows_as_they_arrive(self, capsys):
+            """Test rows print before the source is exhausted, then a total"""
+            def cards():
+                yield {"grade": "NISMO", "vehicle": "1999 Nissan Skyline GT-R", "value": 12000}
+                assert "Skyline" in capsys.readouterr().out
+                yield {"grade": "FACTORY", "vehicle": "1995 Mazda RX-7", "value": 800}
+
+            Display.showGarage(cards())
+            out = capsys.readouterr().out
+            assert "1995 Mazda RX-7" in out
+            assert "2 cards, worth ©12,800 in total" in out
+
+        def test_empty_garage(self, capsys):
+            """Test an empty inventory says so"""
+            Display.showGarage(iter([]))
+            assert "No cards found." in capsys.readouterr().out
+
+    class TestPackEVDisplay:
+        """Pack expected-value report"""
+
+        def test_renders_summary(self, capsys):
+            """Test odds, EV and chance of profit are shown"""
+            Display.showPackEV({
+                "name": "JDM Legends", "pack_price": 5000, "packs": 1000000,
+                "mean": 6200.0, "std": 1500.0, "stderr": 1.5, "ev": 1200.0, "expected": 6190.0,
+                "p_profit": 0.71, "p5": 5000.0, "p50": 6000.0, "p95": 9000.0, "seconds": 0.2,
+                "grades": [{"grade": "NISMO", "odds": 0.1, "avg_value": 3000.0, "source": "4 open listings"}]
+            })
+            out = capsys.readouterr().out
+            assert "PACK EV - JDM Legends" in out
+            assert "+©1,200 per pack" in out
+            assert "71.0%" in out
+            assert "4 open listings" in out
+            assert "1,000,000 packs" in out
+
+    class TestCompletionDisplay:
+        """Collection completion cost table"""
+
+        def test_renders_rows_and_plan(self, capsys):
+            """Test estimates, complete collections and the buy path are shown"""
+            Display.showCompletion([
+                {"name": "JDM Legends", "owned": 12, "total": 20, "pack_price": 5000,
+                 "packs": 10.4, "cost": 52000.0, "sim_packs": 10.9, "p90_cost": 80000.0},
+                {"name": "Euro Classics", "owned": 8, "total": 8, "pack_price": 8000,
+                 "packs": 0.0, "cost": 0.0, "sim_packs": None, "p90_cost": None}
+            ], {"listed": 6, "unlisted": 2, "buy_cost": 30000})
+            out = capsys.readouterr().out
+            assert "12/20" in out
+            assert "©52,000" in out and "©80,000" in out
+            assert "complete!" in out
+            assert "©30,000 for 6 vehicles" in out
+            assert "2 missing vehicles have no open listing" in out
+
+    class TestCandleDisplay:
+        """Price candle chart"""
+
+        def test_renders_bars(self, capsys):
+            """Test each bar shows OHLCV and a scaled range"""
+            Display.showCandles({
+                "name": "1999 Nissan Skyline GT-R", "grade": "ALL", "interval": "1h", "new_trades": 3,
+                "candles": [
+                    {"start": 1767261600, "open": 1000, "high": 1500, "low": 900, "close": 1400, "volume": 4},
+                    {"start": 1767265200, "open": 1400, "high": 1400, "low": 1100, "close": 1100, "volume": 2}
+                ]
+            })
+            out = capsys.readouterr().out
+            assert "1999 Nissan Skyline GT-R - ALL - 1h" in out
+            assert "2026-01-01 10:00" in out
+            assert "█" in out and "▒" in out
+            assert "3 new trades" in out
+
+        def test_renders_empty_history(self, capsys):
+            """Test a vehicle with no trades says so"""
+            Display.showCandles({"name": "Civic", "grade": "NISMO", "interval": "1d", "new_trades": 0, "candles": []})
+            assert "No completed trades" in capsys.readouterr().out
+
+    class TestAuditDisplay:
+        """Trade ledger audit report"""
+
+        def test_renders_counts_and_findings(self, capsys):
+            """Test each finding kind is counted and samples are listed"""
+            Display.showAudit({
+                "trades": 1200, "users": 40, "owned": 900, "partitions": 64, "cards": 950,
+                "timings": {"trades": 0.5, "ownership": 2.0, "check": 0.25},
+                "counts": {"double_sale": 1, "wrong_owner": 0, "missing": 0, "multiple_owners": 0},
+                "findings": [{"kind": "double_sale", "cardId": "c2", "tradeId": "t4",
+                              "detail": "sold by A after trade t3 gave it to B"}]
+            })
+            out = capsys.readouterr().out
+            assert "1,200 trades by 40 users" in out
+            assert "card c2" in out and "sold by A after trade t3" in out
+            assert "950 cards checked - 1 problems found" in out
+
     class TestShopDisplay:
         """Rendering boost pack cards in shop"""
         
@@ -859,6 +1943,1549 @@ class TestDisplay:
             assert "beep beep" in captured.out
 
 
+# ============================================================================
+# ENTITY STORE TESTS
+# ============================================================================
+
+class TestEntityStore:
+    """Identity map of cards, users and trades"""
+
+    def test_put_returns_one_object_per_id(self):
+        """Test a re-put entity updates the existing object in place"""
+        store = EntityStore()
+        first = store.put(CARD, {"id": "c1", "value": 100})
+        second = store.put(CARD, {"id": "c1", "value": 250})
+
+        assert second is first
+        assert first["value"] == 250
+        assert store.get(CARD, "c1") is first
+        assert store.counts()[CARD] == 1
+        assert store.put(CARD, {"value": 1}) == {"value": 1}  # no ID, not stored
+
+    def test_least_recently_used_entity_is_dropped_at_capacity(self):
+        """Test each kind is capped, and reading or re-putting an entity keeps it"""
+        store = EntityStore(capacity=3)
+        first = store.put(CARD, {"id": "c1"})
+        store.putMany(CARD, [{"id": "c2"}, {"id": "c3"}])
+        assert store.get(CARD, "c1") is first
+        store.put(CARD, {"id": "c4"})
+
+        assert store.get(CARD, "c2") is None
+        assert list(store.table(CARD)) == ["c3", "c1", "c4"]
+        store.putMany(USER, [{"id": f"u{index}"} for index in range(5)])
+        assert store.counts() == {CARD: 3, USER: 3, TRADE: 0, COMPLETED_TRADE: 0}
+
+    def test_invalidate_one_or_all(self):
+        """Test invalidation drops a single entity or a whole kind"""
+        store = EntityStore()
+        store.putMany(TRADE, [{"id": "t1"}, {"id": "t2"}])
+        store.invalidate(TRADE, "t1")
+        assert store.get(TRADE, "t1") is None and store.get(TRADE, "t2")
+        store.invalidate(TRADE)
+        assert store.counts()[TRADE] == 0
+
+    @patch('requests.get')
+    def test_trades_share_card_entities(self, mock_get):
+        """Test trades listing the same card reference one object that later fetches refresh"""
+        values = iter([1000, 1500])
+
+        def side_effect(url, **kwargs):
+            response = Mock(status_code=200)
+            if url.endswith("/trades"):
+                response.content = json_codec.dumps({"trades": [
+                    {"id": "t1", "cardId": "c1", "userId": "u1", "username": "alice"},
+                    {"id": "t2", "cardId": "c2", "wantCardId": "c1", "userId": "u2", "username": "bob"}
+                ]})
+            else:
+                card_id = url.rsplit("/", 1)[-1]
+                response.content = json_codec.dumps({"id": card_id, "value": next(values) if card_id == "c1" else 5})
+            return response
+        mock_get.side_effect = side_effect
+
+        client = APIClient()
+        client.access_token = "test-token"
+        first = client.getOpenTradesWithDetails(limit=5)
+        assert first[0]["cardDetails"] is first[1]["wantCardDetails"]
+        assert client.entities.get(USER, "u2")["username"] == "bob"
+
+        second = client.getOpenTradesWithDetails(limit=5)
+        assert second[0] is first[0]
+        assert first[1]["wantCardDetails"]["value"] == 1500
+        assert client.card_cache["c1"] is first[0]["cardDetails"]
+
+    @patch('requests.post')
+    def test_execute_invalidates_trade_and_cards(self, mock_post):
+        """Test an executed trade and the cards that changed hands are forgotten"""
+        mock_post.return_value = Mock(status_code=200, content=json_codec.dumps({}))
+        client = APIClient()
+        client.access_token = "test-token"
+        client.entities.put(TRADE, {"id": "t1", "cardId": "c1"})
+        client.entities.putMany(CARD, [{"id": "c1"}, {"id": "c2"}, {"id": "c3"}])
+
+        client.executeTrade("t1", buyer_card_id="c2")
+
+        assert client.entities.get(TRADE, "t1") is None
+        assert list(client.card_cache) == ["c3"]
+
+
+# ============================================================================
+# NEGATIVE CACHE TESTS
+# ============================================================================
+
+class TestNegativeCache:
+    """Known-missing IDs with a Bloom filter in front"""
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        """Test every added key is found and few others are"""
+        bloom = BloomFilter(1000, 0.01)
+        for index in range(1000):
+            bloom.add(f"card-{index}")
+        assert all(f"card-{index}" in bloom for index in range(1000))
+        assert sum(f"other-{index}" in bloom for index in range(10000)) < 300
+
+    def test_short_circuits_until_expiry(self):
+        """Test a missing ID is answered locally until its TTL runs out"""
+        now = [0.0]
+        cache = NegativeCache(ttl=60, clock=lambda: now[0])
+        cache.add("gone")
+
+        assert "gone" in cache and "here" not in cache
+        now[0] = 61
+        assert "gone" not in cache
+        assert len(cache) == 0
+        assert cache.stats() == {"entries": 0, "checks": 3, "short_circuits": 1, "false_positives": 0}
+
+    def test_capacity_evicts_oldest_and_filter_is_rebuilt(self):
+        """Test the table stays bounded and forgotten keys leave the filter"""
+        cache = NegativeCache(capacity=100)
+        for index in range(300):
+            cache.add(f"card-{index}")
+
+        assert len(cache) == 100
+        assert "card-299" in cache and "card-0" not in cache
+        assert sum(f"card-{index}" in cache.bloom for index in range(200)) < 20
+
+        cache.discard("card-299")
+        assert "card-299" not in cache
+
+
+# ============================================================================
+# SEARCH INDEX TESTS
+# ============================================================================
+
+class TestSearchIndex:
+    """Tests for the local prefix/trigram search index"""
+
+    VEHICLES = [
+        {"id": "v1", "year": "1999", "make": "Nissan", "model": "Skyline GT-R"},
+        {"id": "v2", "year": "1993", "make": "Mazda", "model": "RX-7 FD"},
+        {"id": "v3", "year": "2002", "make": "Acura", "model": "NSX"},
+        {"id": "v4", "year": "2019", "make": "Nissan", "model": "GT-R Nismo"},
+    ]
+
+    def test_prefix_query_matches_word_starts(self):
+        """Test partial words match by prefix"""
+        index = buildSearchIndex(self.VEHICLES)
+        results = index.search("sky")
+        assert results[0]["id"] == "v1"
+        assert results[0]["score"] == 1.0
+
+    def test_every_query_word_must_prefix_match(self):
+        """Test multi-word prefix queries intersect"""
+        index = buildSearchIndex(self.VEHICLES)
+        exact = [r["id"] for r in index.search("nis gt") if r["score"] == 1.0]
+        assert sorted(exact) == ["v1", "v4"]
+        exact = [r["id"] for r in index.search("nissan sky") if r["score"] == 1.0]
+        assert exact == ["v1"]
+
+    def test_misspelled_query_matches_fuzzily(self):
+        """Test typos fall back to trigram similarity"""
+        index = buildSearchIndex(self.VEHICLES)
+        results = index.search("skylnie")
+        assert results and results[0]["id"] == "v1"
+        assert results[0]["score"] < 1.0
+
+    def test_punctuation_is_ignored(self):
+        """Test 'gtr' finds 'GT-R'"""
+        index = buildSearchIndex(self.VEHICLES)
+        ids = {r["id"] for r in index.search("gtr")}
+        assert {"v1", "v4"} <= ids
+
+    def test_unrelated_query_returns_nothing(self):
+        """Test queries with no similar names return no results"""
+        index = buildSearchIndex(self.VEHICLES)
+        assert index.search("zzzz") == []
+        assert index.search("   ") == []
+
+    def test_cards_are_indexed_by_vehicle(self):
+        """Test cached cards collapse onto their vehicle"""
+        index = buildSearchIndex(self.VEHICLES, [
+            {"id": "c1", "vehicleId": "v3", "name": "2002 Acura NSX"},
+            {"id": "c2", "vehicleId": "v9", "name": "1998 Toyota Supra"},
+        ])
+        assert len(index) == 5
+        assert index.search("supra")[0]["id"] == "v9"
+
+    @patch('os.system')
+    def test_search_command_links_to_open_listings(self, mock_system, capsys):
+        """Test search shows hits with their open listings"""
+        mock_client = Mock()
+        mock_client.getVehicles.return_value = self.VEHICLES
+        mock_client.card_cache = {}
+        mock_client.getOpenTradesForVehicles.return_value = {
+            "v3": [{"username": "SpeedKing", "price": 9000, "wantCardId": None}]
+        }
+        cli = CLIClient(api_client=mock_client)
+
+        cli.processCommand("search nsx")
+
+        captured = capsys.readouterr()
+        assert "2002 Acura NSX" in captured.out
+        assert "SpeedKing" in captured.out
+        assert "©9,000" in captured.out
+        assert list(mock_client.getOpenTradesForVehicles.call_args[0][0]) == ["v3"]
+
+    @patch('os.system')
+    def test_search_index_is_built_once(self, mock_system):
+        """Test vehicles are fetched only on the first search"""
+        mock_client = Mock()
+        mock_client.getVehicles.return_value = self.VEHICLES
+        mock_client.card_cache = {}
+        mock_client.getOpenTradesForVehicles.return_value = {}
+        cli = CLIClient(api_client=mock_client)
+
+        cli.handleSearch("nsx")
+        cli.handleSearch("supra")
+
+        mock_client.getVehicles.assert_called_once()
+
+    def test_search_index_takes_only_new_cards(self):
+        """Test cards stored after the index was built are added without rescanning the card cache"""
+        client = APIClient()
+        client.getVehicles = Mock(return_value=self.VEHICLES)
+        client.entities.put(CARD, {"id": "c1", "vehicleId": "v9", "name": "1998 Toyota Supra"})
+        cli = CLIClient(api_client=client)
+        index = cli.getSearchIndex()
+        assert index.search("supra")[0]["id"] == "v9"
+
+        client.entities.put(CARD, {"id": "c2", "vehicleId": "v10", "name": "1991 Honda Beat"})
+        client.entities.put(CARD, {"id": "c1", "value": 10})  # known card updated, not new
+        with patch.object(index, "addCards", wraps=index.addCards) as add:
+            assert cli.getSearchIndex() is index
+        assert [card["id"] for call in add.call_args_list for card in call.args[0]] == ["c2"]
+        assert index.search("beat")[0]["id"] == "v10"
+        assert not cli.unindexed_cards
+
+    @patch('os.system')
+    def test_search_without_text_shows_usage(self, mock_system, capsys):
+        """Test empty search prints usage"""
+        cli = CLIClient(api_client=Mock())
+        cli.processCommand("search")
+        assert "Usage: search" in capsys.readouterr().out
+
+
+# ============================================================================
+# PREFETCH TESTS
+# ============================================================================
+
+class TestPrefetcher:
+    """Tests for background predictive prefetching"""
+
+    @staticmethod
+    def makeClock(start=1000.0):
+        now = [start]
+        return now, (lambda: now[0])
+
+    def test_loads_task_and_serves_it_while_fresh(self):
+        """Test prefetched data answers commands until it expires"""
+        now, clock = self.makeClock()
+        prefetcher = Prefetcher({"open": lambda: ["trade"]}, max_age=30, clock=clock)
+
+        assert prefetcher.runOnce() == "open"
+        assert prefetcher.take("open") == ["trade"]
+        now[0] += 31
+        assert prefetcher.take("open") is None
+
+    def test_predicts_next_command_from_history(self):
+        """Test commands that usually follow the last one are warmed first"""
+        prefetcher = Prefetcher({"open": Mock(), "trades": Mock(), "collections": Mock()})
+        for name in ["open", "collections", "open", "collections", "open"]:
+            prefetcher.recordCommand(name)
+
+        assert prefetcher.predict()[0] == "collections"
+
+    def test_prefetched_result_answers_one_command(self):
+        """Test a taken result is gone, so repeating the command fetches fresh data"""
+        prefetcher = Prefetcher({"open": Mock(return_value=["trade"])})
+        prefetcher.runOnce()
+        assert prefetcher.take("open") == ["trade"]
+        assert prefetcher.take("open") is None
+
+    def test_predictions_use_a_bounded_window(self):
+        """Test only the last `window` commands are counted, and old transitions are forgotten"""
+        prefetcher = Prefetcher({"open": Mock(), "trades": Mock()}, window=3)
+        for name in ["trades", "trades", "trades", "open", "open", "open"]:
+            prefetcher.recordCommand(name)
+
+        assert len(prefetcher.history) == 3
+        assert prefetcher.counts == {"open": 3}
+        assert prefetcher.transitions == {"open": {"open": 2}}
+        assert prefetcher.predict()[0] == "open"
+
+    def test_stops_prefetching_when_idle(self):
+        """Test nothing loads once no command has run for idle_limit, until the next command"""
+        now, clock = self.makeClock()
+        prefetcher = Prefetcher({"open": Mock()}, idle_limit=600, clock=clock)
+        now[0] += 601
+        assert prefetcher.runOnce() is None
+
+        prefetcher.recordCommand("trades")
+        assert prefetcher.runOnce() == "open"
+
+    def test_does_not_reload_recent_results(self):
+        """Test fresh results are skipped in favour of the next task"""
+        now, clock = self.makeClock()
+        prefetcher = Prefetcher({"open": Mock(return_value=1), "trades": Mock(return_value=2)},
+                                refresh_after=20, clock=clock)
+
+        assert prefetcher.runOnce() == "open"
+        assert prefetcher.runOnce() == "trades"
+        assert prefetcher.runOnce() is None
+        now[0] += 21
+        assert prefetcher.runOnce() == "open"
+
+    def test_respects_load_budget(self):
+        """Test no more than the budget is loaded per minute"""
+        now, clock = self.makeClock()
+        prefetcher = Prefetcher({"open": Mock(), "trades": Mock(), "collections": Mock()}, budget=2, clock=clock)
+
+        assert prefetcher.runOnce() is not None
+        assert prefetcher.runOnce() is not None
+        assert prefetcher.runOnce() is None
+        now[0] += 61
+        assert prefetcher.runOnce() is not None
+
+    def test_failed_load_is_not_cached(self):
+        """Test errors are counted and leave nothing to serve"""
+        prefetcher = Prefetcher({"open": Mock(side_effect=Exception("down"))})
+        assert prefetcher.runOnce() is None
+        assert prefetcher.errors == 1
+        assert prefetcher.take("open") is None
+
+    def test_load_in_progress_is_cancelled_by_foreground_command(self):
+        """Test a load stops at its next checkpoint once a command starts, and later loads run again"""
+        def task():
+            with prefetcher.foreground():  # the user runs a command mid-load
+                pass
+            prefetcher.checkpoint()
+            return ["stale"]
+        prefetcher = Prefetcher({"open": task})
+
+        assert prefetcher.runOnce() is None
+        assert (prefetcher.cancelled, prefetcher.errors) == (1, 0)
+        assert prefetcher.take("open") is None
+
+        prefetcher.tasks["open"] = lambda: prefetcher.checkpoint() or ["fresh"]
+        assert prefetcher.runOnce() == "open"
+        assert prefetcher.take("open") == ["fresh"]
+
+    @patch('requests.get')
+    def test_cancelled_load_skips_card_requests(self, mock_get):
+        """Test a checkpoint that raises after the listing stops the card lookups"""
+        mock_get.return_value = Mock(status_code=200, content=json_codec.dumps(
+            {"trades": [{"id": "t1", "sellerCardId": "c1"}, {"id": "t2", "sellerCardId": "c2"}]}))
+        client = APIClient()
+        client.access_token = "test-token"
+
+        def checkpoint():
+            raise PrefetchCancelled()
+        with pytest.raises(PrefetchCancelled):
+            client.getCompletedTradesWithDetails(limit=5, checkpoint=checkpoint)
+        assert mock_get.call_count == 1
+
+    def test_pauses_during_foreground_and_stops_cleanly(self):
+        """Test the scheduler waits for foreground commands and exits on stop"""
+        task = Mock(return_value=[])
+        prefetcher = Prefetcher({"open": task}, poll=0.01)
+
+        with prefetcher.foreground():
+            prefetcher.start()
+            time.sleep(0.05)
+            task.assert_not_called()
+
+        deadline = time.time() + 2
+        while not task.called and time.time() < deadline:
+            time.sleep(0.005)
+        prefetcher.stop()
+
+        task.assert_called()
+        assert prefetcher._thread is None
+
+    @patch('os.system')
+    def test_commands_use_prefetched_data(self, mock_system, capsys):
+        """Test trades command is answered from prefetched data"""
+        mock_client = Mock()
+        cli = CLIClient(api_client=mock_client)
+        cli.prefetcher = Prefetcher({"trades": lambda: [{"buyerUsername": "Warm", "price": 10}]})
+        cli.prefetcher.runOnce()
+
+        cli.processCommand("trades")
+
+        mock_client.getCompletedTradesWithDetails.assert_not_called()
+        assert "Warm" in capsys.readouterr().out
+
+    @patch('os.system')
+    def test_filtered_open_bypasses_prefetched_data(self, mock_system):
+        """Test only the default open listing is served from prefetch"""
+        mock_client = Mock()
+        mock_client.getOpenTradesWithDetails.return_value = []
+        cli = CLIClient(api_client=mock_client)
+        cli.prefetcher = Prefetcher({"open": lambda: []})
+        cli.prefetcher.runOnce()
+
+        cli.processCommand("open")
+        mock_client.getOpenTradesWithDetails.assert_not_called()
+        cli.processCommand("open --grade NISMO")
+        mock_client.getOpenTradesWithDetails.assert_called_once()
+
+
+# ============================================================================
+# DASHBOARD TESTS
+# ============================================================================
+
+class TestDashboard:
+    """Tests for the curses live market dashboard"""
+
+    DATA = {
+        "open_trades": [{"grade": "NISMO", "vehicle": "1999 Nissan Skyline GT-R", "seller_username": "TurboLover",
+                         "price": 9000, "type": "FOR_PRICE", "want_vehicle": None}],
+        "completed_trades": [{"grade": "FACTORY", "vehicle": "2002 Acura NSX", "buyer_username": "Collector",
+                              "price": 5000, "executed_date": datetime.now()}],
+        "collections": [{"name": "JDM Legends", "pack_price": 2000, "vehicle_count": 6}]
+    }
+
+    def test_frame_fills_screen_exactly(self):
+        """Test every frame line is exactly the screen width and height"""
+        frame = renderFrame(60, 20, self.DATA, "status")
+        assert len(frame) == 20
+        assert all(len(line) == 60 for line in frame)
+        text = "\n".join(frame)
+        assert "TurboLover" in text and "Collector" in text and "JDM Legends" in text
+        assert frame[-1].startswith(" status")
+
+    def test_identical_frames_need_no_writes(self):
+        """Test an unchanged screen produces no output"""
+        frame = renderFrame(80, 24, self.DATA)
+        assert diffFrames(frame, list(frame)) == []
+
+    def test_diff_writes_only_changed_cells(self):
+        """Test a price change rewrites just the differing run"""
+        old = ["price ©9,000 seller", "unchanged row"]
+        new = ["price ©9,500 seller", "unchanged row"]
+        assert diffFrames(old, new) == [(0, 9, "5")]
+
+    def test_diff_merges_nearby_runs(self):
+        """Test runs separated by a small gap become one write"""
+        assert diffFrames(["abcdefgh"], ["xbcyefgh"], gap=3) == [(0, 0, "xbcy")]
+        assert diffFrames(["abcdefgh"], ["xbcdefgz"], gap=3) == [(0, 0, "x"), (0, 7, "z")]
+
+    def test_draw_writes_full_frame_then_only_changes(self):
+        """Test the first draw paints the screen and later draws only deltas"""
+        dashboard = Dashboard(lambda: {})
+        dashboard.data = dict(self.DATA)
+        screen = Mock()
+
+        dashboard.draw(screen, 80, 24)
+        first_writes = screen.addstr.call_count
+        first_cells = dashboard.cells_written
+        screen.reset_mock()
+
+        dashboard.data["open_trades"] = [dict(self.DATA["open_trades"][0], price=9500)]
+        dashboard.draw(screen, 80, 24)
+
+        assert first_writes > 0
+        assert first_cells < 80 * 24
+        assert screen.addstr.call_count == 1
+        row, col, text = screen.addstr.call_args[0]
+        assert "5" in text and len(text) <= 3
+
+    def test_dashboard_without_refresh_loads_only_on_request(self):
+        """Test refresh=None loads once up front and again only when r is pressed, on the screen thread"""
+        loads = []
+        dashboard = Dashboard(lambda: loads.append(threading.current_thread()) or dict(self.DATA), refresh=None)
+        screen = Mock(**{"getmaxyx.return_value": (24, 80), "getch.side_effect": [-1, ord("r"), -1, ord("q")]})
+
+        with patch('cli_dashboard.curses') as curses:
+            curses.KEY_RESIZE = -2
+            dashboard._main(screen)
+
+        assert loads == [threading.current_thread()] * 2
+        assert "refresh every" not in dashboard.status()
+
+    @patch('os.system')
+    def test_dashboard_command_without_curses(self, mock_system, capsys):
+        """Test a helpful message when curses is unavailable"""
+        cli = CLIClient(api_client=Mock())
+        with patch('cli_dashboard.curses', None):
+            cli.processCommand("dashboard")
+        assert "needs curses" in capsys.readouterr().out
+
+    @patch('os.system')
+    def test_dashboard_data_uses_display_format(self, mock_system):
+        """Test dashboard data is transformed like the line-based commands"""
+        mock_client = Mock()
+        mock_client.getOpenTradesWithDetails.return_value = [{"cardDetails": {"name": "Car", "grade": "nismo"}, "price": 1}]
+        mock_client.getCompletedTradesWithDetails.return_value = []
+        mock_client.getCollections.return_value = [{"name": "JDM", "price": 2000, "cardCount": 6}]
+        cli = CLIClient(api_client=mock_client)
+
+        data = cli.loadDashboardData()
+
+        assert data["open_trades"][0]["grade"] == "NISMO"
+        assert data["collections"][0]["pack_price"] == 2000
+
+
+# ============================================================================
+# PACK EV TESTS
+# ============================================================================
+
+class TestPackEV:
+    """Monte Carlo pack expected-value simulation"""
+
+    def test_parse_odds_normalizes(self):
+        """Test partial odds keep defaults and sum to one"""
+        odds = pack_ev.parseOdds("NISMO=0.2")
+        assert sum(odds.values()) == pytest.approx(1.0)
+        assert odds["NISMO"] > pack_ev.GRADE_ODDS["NISMO"]
+        with pytest.raises(ValueError):
+            pack_ev.parseOdds("FACTORY=-1")
+
+    def test_market_values_fall_back_to_nominal(self):
+        """Test grades without listings use the server's card value formula"""
+        values = pack_ev.marketValues({"NISMO": [{"price": 7000}, {"price": None}]}, pack_price=5000)
+        assert values["NISMO"] == [7000]
+        assert values["FACTORY"] == [1000]
+        assert values["LIMITED_RUN"] == [1500]
+
+    def test_simulation_matches_closed_form(self):
+        """Test the simulated mean converges on the exact expectation"""
+        pytest.importorskip("numpy")
+        values = {"FACTORY": [900, 1100], "LIMITED_RUN": [1500], "NISMO": [3000, 9000]}
+        result = pack_ev.simulate(5000, values, packs=200_000, seed=3)
+
+        assert result.packs == 200_000
+        assert result.mean == pytest.approx(result.expected, abs=5 * result.stderr)
+        assert 0 < result.p_profit < 1
+        assert result.percentiles[5] <= result.percentiles[50] <= result.percentiles[95]
+
+    def test_simulation_is_deterministic_with_seed(self):
+        """Test a seed makes results repeatable"""
+        pytest.importorskip("numpy")
+        values = {"FACTORY": [1000], "LIMITED_RUN": [1500], "NISMO": [3000]}
+        first = pack_ev.simulate(5000, values, packs=1000, seed=11)
+        second = pack_ev.simulate(5000, values, packs=1000, seed=11)
+        assert (first.mean, first.p_profit) == (second.mean, second.p_profit)
+
+    def test_certain_odds_give_exact_value(self):
+        """Test all-NISMO odds always yield five NISMO cards"""
+        pytest.importorskip("numpy")
+        values = {"FACTORY": [1], "LIMITED_RUN": [2], "NISMO": [3000]}
+        odds = {"FACTORY": 0.0, "LIMITED_RUN": 0.0, "NISMO": 1.0}
+        result = pack_ev.simulate(5000, values, odds, packs=10_000, seed=1)
+        assert result.mean == 15000
+        assert result.std == 0
+        assert result.p_profit == 1.0
+
+
+# ============================================================================
+# COMPLETION COST TESTS
+# ============================================================================
+
+class TestCompletion:
+    """Coupon-collector completion estimates"""
+
+    def test_closed_form_matches_coupon_collector(self):
+        """Test expected draws are total * H_missing, and a complete collection costs nothing"""
+        assert completion.expectedDraws(4, 4) == pytest.approx(4 * (1 + 1/2 + 1/3 + 1/4))
+        assert completion.expectedDraws(10, 3, remaining=1) == pytest.approx(10 * (1/2 + 1/3))
+        assert completion.expectedPacks(20, 0) == 0
+        assert completion.harmonic(5000) == pytest.approx(sum(1 / i for i in range(1, 5001)))
+
+    def test_simulation_matches_closed_form_across_collections(self):
+        """Test one vectorized run estimates every collection, skipping complete ones"""
+        pytest.importorskip("numpy")
+        collections = [(20, 20), (8, 0), (50, 5)]
+        packs = completion.simulatePacks(collections, trials=20_000, seed=5)
+
+        assert packs.shape == (20_000, 3)
+        assert not packs[:, 1].any()
+        summary = completion.summarize(packs)
+        for (total, missing), stats in zip(collections, summary):
+            # Rounding draws up to whole packs adds under one pack on average
+            expected = completion.expectedPacks(total, missing)
+            assert expected - 0.2 <= stats["mean"] <= expected + 1
+        assert summary[0]["p50"] <= summary[0]["p90"]
+
+    def test_best_mix_prefers_listings_when_cheap(self):
+        """Test buying is used for the tail when listings are cheaper than more packs"""
+        cheapest = completion.cheapestListings(
+            [{"cardId": "a", "price": 900}, {"cardId": "b", "price": 500}, {"cardId": "c", "price": None}],
+            {"a": {"vehicleId": "v1"}, "b": {"vehicleId": "v1"}, "c": {"vehicleId": "v2"}}
+        )
+        assert cheapest == {"v1": 500}
+
+        assert completion.bestMix(20, 20, 5000, [100] * 20) == (20, 2000)
+        assert completion.bestMix(20, 20, 5000, [10 ** 7])[0] == 0
+        buy, cost = completion.bestMix(20, 20, 1000, [1500])
+        assert 0 < buy < 20
+        assert cost < completion.expectedPacks(20, 20) * 1000
+
+
+# ============================================================================
+# TRADE HISTORY AND CANDLE TESTS
+# ============================================================================
+
+def completedTrade(trade_id, when, price, card="s1", kind="FOR_PRICE"):
+    return {"id": trade_id, "type": kind, "sellerCardId": card, "price": price, "executedDate": when}
+
+
+def historyClient(history, cards=None):
+    """Mock client serving a newest-first history list through getCompletedTrades"""
+    client = Mock()
+    client.getCompletedTrades.side_effect = lambda limit, offset: history[offset:offset + limit]
+    client.getCardsById.return_value = cards or {}
+    return client
+
+
+class TestTradeHistory:
+    """Watermark-based delta sync of completed trades"""
+
+    HISTORY = [completedTrade(f"t{i}", f"2026-01-01T{10 + i // 60:02d}:{i % 60:02d}:00Z", 1000 + i)
+               for i in range(250)][::-1]
+
+    def test_sync_fetches_only_new_pages(self, tmp_path):
+        """Test a resync stops at the first page reaching stored trades"""
+        history = list(self.HISTORY)
+        client = historyClient(history)
+        store = TradeHistory(str(tmp_path))
+
+        assert len(store.sync(client)) == 250
+        assert store.pages_fetched == 3
+
+        history.insert(0, completedTrade("t250", "2026-01-01T15:00:00Z", 5000))
+        new = store.sync(client)
+        assert [t["id"] for t in new] == ["t250"]
+        assert store.pages_fetched == 1
+        assert store.sync(client) == []
+
+        reopened = TradeHistory(str(tmp_path))
+        assert len(reopened) == 251
+        assert reopened.isKnown(history[0]) and not reopened.isKnown(completedTrade("t9", "2026-01-02T00:00:00Z", 1))
+
+    def test_merge_is_idempotent(self, tmp_path):
+        """Test re-merging stored trades, or trades at the watermark instant, adds nothing twice"""
+        store = TradeHistory(str(tmp_path))
+        same_time = "2026-01-01T10:00:00Z"
+        assert len(store.merge([completedTrade("a", same_time, 1), completedTrade("a", same_time, 1)])) == 1
+        assert len(store.merge([completedTrade("a", same_time, 1), completedTrade("b", same_time, 2)])) == 1
+        assert store.watermark["ids"] == ["a", "b"]
+        assert [t["id"] for t in store.read()[0]] == ["a", "b"]
+
+    def test_count_and_dedupe_do_not_read_the_log(self, tmp_path):
+        """Test len and merge use the watermark rather than rereading stored trades"""
+        store = TradeHistory(str(tmp_path))
+        store.merge([completedTrade(f"t{i}", f"2026-01-01T10:00:{i:02d}Z", i) for i in range(20)])
+
+        reopened = TradeHistory(str(tmp_path))
+        with patch.object(TradeHistory, 'read', side_effect=AssertionError("log read")), \
+                patch.object(TradeHistory, 'iterate', side_effect=AssertionError("log read")):
+            assert len(reopened) == 20
+            assert reopened.merge([completedTrade("t19", "2026-01-01T10:00:19Z", 19)]) == []
+            assert len(reopened.merge([completedTrade("t20", "2026-01-01T10:00:20Z", 20)])) == 1
+            assert len(reopened) == 21
+
+    def test_interrupted_merge_is_recovered_from_the_log_tail(self, tmp_path):
+        """Test trades appended before the watermark was saved are counted, not stored again"""
+        store = TradeHistory(str(tmp_path))
+        store.merge([completedTrade("a", "2026-01-01T10:00:00Z", 1)])
+        late = completedTrade("b", "2026-01-01T11:00:00Z", 2)
+        with open(store.path, "ab") as f:
+            f.write(json_codec.dumps(late) + b"\n")
+
+        reopened = TradeHistory(str(tmp_path))
+        assert len(reopened) == 2
+        assert reopened.merge([late]) == []
+        assert [t["id"] for t in reopened.read()[0]] == ["a", "b"]
+
+    def test_read_follows_log_by_offset(self, tmp_path):
+        """Test readers resume from the offset they last reached"""
+        store = TradeHistory(str(tmp_path))
+        store.merge([completedTrade("a", "2026-01-01T10:00:00Z", 1)])
+        first, offset = store.read()
+        store.merge([completedTrade("b", "2026-01-01T11:00:00Z", 2)])
+        later, end = store.read(offset)
+        assert [t["id"] for t in first] == ["a"]
+        assert [t["id"] for t in later] == ["b"]
+        assert store.read(end) == ([], end)
+
+
+class TestCandles:
+    """Incremental OHLC candles from completed trades"""
+
+    CARDS = {"s1": {"vehicleId": "v1", "grade": "NISMO"}, "s2": {"vehicleId": "v1", "grade": "FACTORY"}}
+
+    @staticmethod
+    def makeStore(tmp_path):
+        return CandleStore(str(tmp_path / "candles"), TradeHistory(str(tmp_path / "history")))
+
+    def test_ingest_builds_bars_and_persists_them(self, tmp_path):
+        """Test OHLCV per hour and grade, reloaded from the compact files"""
+        store = self.makeStore(tmp_path)
+        folded = store.ingest([
+            completedTrade("t2", "2026-01-01T10:40:00Z", 900, card="s2"),
+            completedTrade("t1", "2026-01-01T10:05:00Z", 1000),
+            completedTrade("t3", "2026-01-01T11:00:00Z", 1200),
+            completedTrade("t4", "2026-01-01T11:30:00Z", 0, kind="FOR_CARD")
+        ], self.CARDS)
+        assert folded == 3
+
+        reloaded = self.makeStore(tmp_path)
+        hourly = [c.toDict() for c in reloaded.candles("v1")]
+        assert [(c["open"], c["high"], c["low"], c["close"], c["volume"]) for c in hourly] == [
+            (1000, 1000, 900, 900, 2), (1200, 1200, 1200, 1200, 1)
+        ]
+        assert [c.close for c in reloaded.candles("v1", "NISMO", "1d")] == [1200]
+        assert os.path.getsize(reloaded.series("v1", "ALL", "1h").path) == 2 * RECORD.size
+
+    def test_late_trade_keeps_close(self, tmp_path):
+        """Test a trade older than a bar's last one widens it without moving the close"""
+        store = self.makeStore(tmp_path)
+        store.ingest([completedTrade("t1", "2026-01-01T10:50:00Z", 1000),
+                      completedTrade("t2", "2026-01-01T12:10:00Z", 1100)], self.CARDS)
+        store.ingest([completedTrade("t0", "2026-01-01T10:10:00Z", 400),
+                      completedTrade("t9", "2026-01-01T11:10:00Z", 700)], self.CARDS)
+
+        bars = [c.toDict() for c in self.makeStore(tmp_path).candles("v1")]
+        assert [b["close"] for b in bars] == [1000, 700, 1100]
+        assert (bars[0]["low"], bars[0]["volume"]) == (400, 2)
+
+    def test_refresh_folds_only_new_history(self, tmp_path):
+        """Test each refresh folds in just the trades synced since the last one"""
+        history = list(TestTradeHistory.HISTORY)
+        client = historyClient(history, self.CARDS)
+        store = self.makeStore(tmp_path)
+        assert store.refresh(client) == 250
+
+        history.insert(0, completedTrade("t250", "2026-01-01T15:00:00Z", 5000))
+        reopened = self.makeStore(tmp_path)
+        assert reopened.refresh(client) == 1
+        assert reopened.candles("v1", count=1)[0].close == 5000
+        assert sum(c.volume for c in reopened.candles("v1", count=100)) == 251
+        assert reopened.refresh(client) == 0
+
+    def test_refresh_reads_history_in_batches(self, tmp_path):
+        """Test a first refresh looks cards up one bounded batch at a time"""
+        client = historyClient(list(TestTradeHistory.HISTORY), self.CARDS)
+        store = self.makeStore(tmp_path)
+        with patch('candles.REFRESH_BATCH', 100):
+            assert store.refresh(client) == 250
+        assert [len(list(call.args[0])) for call in client.getCardsById.call_args_list] == [100, 100, 50]
+
+    def test_refresh_retries_trades_whose_card_was_not_found(self, tmp_path):
+        """Test a trade with an unresolved card is folded in by a later refresh, not skipped"""
+        history = [completedTrade("t2", "2026-01-01T11:00:00Z", 1200, card="late"),
+                   completedTrade("t1", "2026-01-01T10:00:00Z", 1000)]
+        known = dict(self.CARDS)
+        client = historyClient(history)
+        client.getCardsById.side_effect = lambda ids: {i: known[i] for i in ids if i in known}
+        store = self.makeStore(tmp_path)
+        assert store.refresh(client) == 1
+
+        known["late"] = {"vehicleId": "v1", "grade": "FACTORY"}
+        reopened = self.makeStore(tmp_path)
+        assert reopened.refresh(client) == 1
+        assert [c.close for c in reopened.candles("v1")] == [1000, 1200]
+        assert reopened.cursor["pending"] == []
+
+    def test_refresh_drops_unresolvable_trades_eventually(self, tmp_path):
+        """Test a card that never resolves is retried PENDING_ATTEMPTS times, then given up"""
+        client = historyClient([completedTrade("t1", "2026-01-01T10:00:00Z", 1000, card="gone")])
+        store = self.makeStore(tmp_path)
+        for _ in range(PENDING_ATTEMPTS):
+            assert store.refresh(client) == 0
+        assert store.cursor["pending"] == []
+        assert client.getCardsById.call_count == PENDING_ATTEMPTS
+
+
+# ============================================================================
+# LEDGER AUDIT TESTS
+# ============================================================================
+
+def ledgerTrade(trade_id, minute, card, seller, buyer, buyer_card=None):
+    return {"id": trade_id, "type": "FOR_CARD" if buyer_card else "FOR_PRICE", "sellerCardId": card,
+            "sellerUserId": seller, "buyerUserId": buyer, "buyerCardId": buyer_card, "price": 100,
+            "executedDate": f"2026-01-01T10:{minute:02d}:00Z"}
+
+
+class TestAudit:
+    """Ownership and trade-ledger consistency checks"""
+
+    LEDGER = [
+        ledgerTrade("t1", 1, "c1", "A", "B"),
+        ledgerTrade("t2", 2, "c1", "B", "C"),
+        ledgerTrade("t3", 3, "c2", "A", "B"),
+        ledgerTrade("t4", 4, "c2", "A", "C"),        # A sells c2 again
+        ledgerTrade("t5", 5, "c3", "A", "D", "c4"),  # card swap
+        ledgerTrade("t6", 6, "c5", "A", "B"),        # ...but A still has c5
+        ledgerTrade("t7", 7, "c6", "B", "C"),        # ...and nobody has c6
+        ledgerTrade("t8", 8, "c8", "A", "B"),
+    ]
+    HOLDINGS = {"A": ["c4", "c5", "c8"], "B": ["c2", "c7"], "C": ["c1", "c7"], "D": ["c3"]}
+
+    def makeClient(self):
+        ledger = self.LEDGER[::-1]
+        client = historyClient(ledger)
+
+        def streamUserCards(user_id):
+            if ledger[0]["id"] == "t8":  # c8 goes back to A while ownership is being read
+                ledger.insert(0, ledgerTrade("t9", 9, "c8", "B", "A"))
+            return iter({"id": card} for card in self.HOLDINGS[user_id])
+        client.streamUserCards.side_effect = streamUserCards
+        client.getCardOwner.side_effect = lambda card_id: None  # cards no trader holds are owned by nobody
+        return client
+
+    def test_transfers_cover_both_sides_of_a_swap(self):
+        """Test a FOR_CARD trade moves both cards"""
+        assert audit.transfers(self.LEDGER[4]) == [("c3", "A", "D"), ("c4", "D", "A")]
+        assert audit.transfers(self.LEDGER[0]) == [("c1", "A", "B")]
+
+    def test_flags_impossible_histories(self, tmp_path):
+        """Test double sales, wrong and missing owners are found across worker processes"""
+        report = audit.runAudit(self.makeClient(), TradeHistory(str(tmp_path)), partitions=4,
+                                check_workers=2, directory=str(tmp_path))
+
+        assert report["counts"] == {audit.DOUBLE_SALE: 1, audit.WRONG_OWNER: 2, audit.MISSING: 1,
+                                    audit.MULTIPLE_OWNERS: 1}
+        flagged = {(f["kind"], f["cardId"]) for f in report["findings"]}
+        assert flagged == {(audit.DOUBLE_SALE, "c2"), (audit.WRONG_OWNER, "c2"), (audit.WRONG_OWNER, "c5"),
+                           (audit.MISSING, "c6"), (audit.MULTIPLE_OWNERS, "c7")}
+        assert (report["trades"], report["users"], report["owned"], report["transfers"]) == (8, 4, 8, 9)
+        assert sorted(os.listdir(tmp_path)) == ["trades.jsonl", "watermark.json"]  # spill files removed
+        with patch('audit.ProcessPoolExecutor') as pool:
+            audit.spawnPool(2)
+        assert pool.call_args.kwargs["mp_context"].get_start_method() == "spawn"
+
+    def test_card_held_by_non_trader_is_wrong_owner(self, tmp_path):
+        """Test a card missing from every trader's list is checked with the server, not reported missing"""
+        client = self.makeClient()
+        client.getCardOwner.side_effect = lambda card_id: "E" if card_id == "c6" else None
+        report = audit.runAudit(client, TradeHistory(str(tmp_path)), partitions=4,
+                                executor=ThreadPoolExecutor, directory=str(tmp_path))
+
+        assert report["counts"][audit.MISSING] == 0 and report["counts"][audit.WRONG_OWNER] == 3
+        finding = next(f for f in report["findings"] if f["cardId"] == "c6")
+        assert finding["kind"] == audit.WRONG_OWNER and "held by E" in finding["detail"]
+        client.getCardOwner.assert_called_once_with("c6")
+
+    def test_partition_holds_only_its_cards(self, tmp_path):
+        """Test records are spread over partitions by card, keeping each card's records together"""
+        writer = audit.PartitionWriter(str(tmp_path), partitions=8)
+        for index in range(200):
+            writer.write([audit.TRANSFER, f"card-{index}", 0.0, index, f"t{index}", "A", "B"])
+            writer.write([audit.OWNER, f"card-{index}", "B"])
+        writer.close()
+
+        results = [audit.auditPartition(path) for path in writer.paths]
+        assert sum(result["cards"] for result in results) == 200
+        assert max(result["cards"] for result in results) < 200
+        assert not any(result["counts"] for result in results)
+
+
+# ============================================================================
+# CARD CATALOG TESTS
+# ============================================================================
+
+class CatalogSource:
+    """Vehicles, collections and per-collection /cards pages for building a catalog"""
+
+    VEHICLES = [{"id": "11111111-1111-1111-1111-111111111111", "year": 1999, "make": "Nissan", "model": "Skyline GT-R"},
+                {"id": "22222222-2222-2222-2222-222222222222", "year": 1993, "make": "Mazda", "model": "RX-7"}]
+    COLLECTIONS = [{"id": "aaaaaaaa-0000-0000-0000-000000000001", "name": "JDM Legends"},
+                   {"id": "aaaaaaaa-0000-0000-0000-000000000002", "name": "Rotary Club"}]
+
+    def __init__(self, count, value_offset=0):
+        rng = random.Random(count)
+        names = [catalog.vehicleName(v) for v in self.VEHICLES] + ["1970 Unknown Prototype"]
+        self.cards = {}
+        for index in range(count):
+            card = {"id": str(uuid.UUID(int=rng.getrandbits(128))), "name": names[index % 3],
+                    "grade": catalog.GRADE_CODES[index % 3], "value": 1000 + index + value_offset}
+            self.cards[card["id"]] = (card, self.COLLECTIONS[index % 2]["id"])
+
+    def getVehicles(self):
+        return self.VEHICLES
+
+    def getCollections(self):
+        return self.COLLECTIONS
+
+    def streamCards(self, limit=50, offset=0, collectionId=None):
+        matching = [card for card, collection in self.cards.values() if collection == collectionId]
+        return iter(matching[offset:offset + limit])
+
+
+class TestCardCatalog:
+    """Memory-mapped fixed-width card catalog"""
+
+    def test_build_and_lookup_every_card(self, tmp_path):
+        """Test every card is found with its vehicle, collection, grade and value"""
+        source = CatalogSource(2500)
+        path = str(tmp_path / "cards.cat")
+        assert catalog.buildCatalog(source, path, page_size=300) == 2500
+
+        cards = catalog.CardCatalog(path)
+        assert len(cards) == 2500
+        assert os.path.getsize(path) < catalog.HEADER.size + 2500 * catalog.RECORD.size + 1024
+        for card, collection_id in source.cards.values():
+            found = cards.lookup(card["id"])
+            assert {key: found[key] for key in card} == card
+            assert found["collectionId"] == collection_id
+            expected_vehicle = next((v["id"] for v in source.VEHICLES if catalog.vehicleName(v) == card["name"]), None)
+            assert found["vehicleId"] == expected_vehicle
+
+        assert cards.lookup(str(uuid.uuid4())) is None
+        assert cards.lookup("not-a-uuid") is None
+
+    def test_missing_file_is_empty_and_stale(self, tmp_path):
+        """Test a catalog that has not been built finds nothing"""
+        cards = catalog.CardCatalog(str(tmp_path / "none.cat"))
+        assert len(cards) == 0 and cards.built_at is None and cards.isStale()
+        assert cards.lookup(str(uuid.uuid4())) is None
+
+    def test_sync_swaps_in_new_catalog(self, tmp_path):
+        """Test a rebuild replaces the mapping and lookups see the new values"""
+        path = str(tmp_path / "cards.cat")
+        cards = catalog.CardCatalog(path)
+        assert cards.sync(CatalogSource(10)) == 10
+        card_id = next(iter(CatalogSource(10).cards))
+        before = cards.lookup(card_id)["value"]
+
+        cards.sync(CatalogSource(10, value_offset=500))
+        assert cards.lookup(card_id)["value"] == before + 500
+        assert not cards.isStale()
+
+    def test_background_sync_builds_missing_catalog(self, tmp_path):
+        """Test the sync thread builds a catalog that does not exist yet"""
+        cards = catalog.CardCatalog(str(tmp_path / "cards.cat"))
+        cards.startSync(CatalogSource(50), interval=0.01)
+        deadline = time.monotonic() + 5
+        while len(cards) < 50 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        cards.stop()
+        assert len(cards) == 50 and cards.last_error is None
+
+    @patch('requests.get')
+    def test_client_serves_catalog_hits_locally(self, mock_get, tmp_path):
+        """Test getCardsById only requests cards the catalog does not have"""
+        source = CatalogSource(20)
+        path = str(tmp_path / "cards.cat")
+        catalog.buildCatalog(source, path)
+        mock_get.return_value = Mock(status_code=200, content=json_codec.dumps({"id": "remote", "value": 5}))
+
+        client = APIClient(catalog=catalog.CardCatalog(path))
+        client.access_token = "test-token"
+        local_ids = list(source.cards)[:3]
+        cards = client.getCardsById(local_ids + ["remote"])
+
+        assert set(cards) == set(local_ids) | {"remote"}
+        assert mock_get.call_count == 1
+        assert client.card_cache[local_ids[0]] is cards[local_ids[0]]
+
+        client.missing_cards.add(local_ids[1])
+        client.getCardsById([local_ids[1]])
+        assert local_ids[1] not in client.missing_cards
+
+    @patch('requests.get')
+    def test_single_card_lookup_uses_catalog(self, mock_get, tmp_path):
+        """Test getCard answers from the catalog and only asks the server for unknown cards"""
+        source = CatalogSource(5)
+        path = str(tmp_path / "cards.cat")
+        catalog.buildCatalog(source, path)
+        mock_get.return_value = Mock(status_code=200, content=json_codec.dumps({"id": "remote", "value": 5}))
+
+        client = APIClient(catalog=catalog.CardCatalog(path))
+        client.access_token = "test-token"
+        local_id = next(iter(source.cards))
+
+        assert client.getCard(local_id)["id"] == local_id
+        mock_get.assert_not_called()
+        assert client.getCard("remote") == {"id": "remote", "value": 5}
+        assert mock_get.call_count == 1
+
+    def test_build_spills_sorted_runs_and_merges_them(self, tmp_path):
+        """Test a build that spills many small runs writes the same catalog, and cleans the runs up"""
+        source = CatalogSource(500)
+        whole = str(tmp_path / "whole.cat")
+        spilled = str(tmp_path / "spilled.cat")
+        catalog.buildCatalog(source, whole, page_size=100)
+        with patch('catalog.heapq.merge', wraps=heapq.merge) as merge:
+            assert catalog.buildCatalog(source, spilled, page_size=100, run_size=7) == 500
+        assert len(merge.call_args.args) >= 500 // 7
+
+        with open(whole, "rb") as a, open(spilled, "rb") as b:
+            size = catalog.HEADER.size
+            assert a.read()[size:] == b.read()[size:]
+        assert sorted(os.listdir(tmp_path)) == ["spilled.cat", "whole.cat"]
+
+    def test_vehicles_sharing_a_name_get_no_vehicle_id(self, tmp_path):
+        """Test a name shared by two vehicles is not resolved to either of them"""
+        source = CatalogSource(30)
+        twin = dict(source.VEHICLES[0], id="33333333-3333-3333-3333-333333333333")
+        source.getVehicles = lambda: CatalogSource.VEHICLES + [twin]
+        path = str(tmp_path / "cards.cat")
+        catalog.buildCatalog(source, path)
+
+        cards = catalog.CardCatalog(path)
+        shared = catalog.vehicleName(twin)
+        for card, _ in source.cards.values():
+            found = cards.lookup(card["id"])
+            assert found["name"] == card["name"]
+            if card["name"] == shared:
+                assert found["vehicleId"] is None
+            elif card["name"] == catalog.vehicleName(source.VEHICLES[1]):
+                assert found["vehicleId"] == source.VEHICLES[1]["id"]
+
+    def test_background_client_has_its_own_slow_lane(self):
+        """Test catalog syncs run on a client that shares the login but not the limiter or breakers"""
+        client = APIClient()
+        client.access_token, client.user_id = "test-token", "user-1"
+        background = client.backgroundClient()
+
+        assert (background.access_token, background.user_id) == ("test-token", "user-1")
+        assert background.limiter is not client.limiter and background.breakers is not client.breakers
+        assert background.hedger is None and background.catalog is None
+        assert background.limiter.bucket.rate < client.limiter.bucket.rate
+        assert background.limiter.concurrency.maximum == BACKGROUND_CONCURRENCY
+
+
+# ============================================================================
+# LOAD BALANCER TESTS
+# ============================================================================
+
+class TestReplicaPool:
+    """Client-side balancing over API replicas"""
+
+    def test_prefers_faster_replica(self):
+        """Test the replica with the lower latency average wins the two-choice draw"""
+        pool = ReplicaPool(["http://a", "http://b"], rng=random.Random(1))
+        slow, fast = pool.replicas
+        slow.ewma, fast.ewma = 0.5, 0.05
+
+        picks = [pool.choose() for _ in range(5)]
+        assert all(replica is fast for replica in picks)
+        assert fast.inflight == 5
+
+    def test_route_rewrites_base_url(self):
+        """Test the chosen replica replaces the default base URL"""
+        pool = ReplicaPool(["http://10.0.0.2:8080/"])
+        replica, url = pool.route("http://localhost:8080/trades?limit=5", "http://localhost:8080")
+        assert url == "http://10.0.0.2:8080/trades?limit=5"
+        pool.release(replica, 0.2)
+        assert (replica.inflight, replica.ewma) == (0, 0.2)
+
+    def test_failures_and_probes_change_rotation(self):
+        """Test failing replicas leave rotation until a health probe succeeds"""
+        up = {"http://a": True, "http://b": True}
+
+        def probe(url):
+            if not up[url.rsplit("/", 1)[0]]:
+                raise requests.exceptions.ConnectionError("down")
+            return Mock(status_code=200)
+
+        pool = ReplicaPool(["http://a", "http://b"], probe=probe)
+        a, b = pool.replicas
+        for _ in range(FAILURE_LIMIT):
+            pool.release(a, 1.0, failed=True)
+        assert pool.healthy() == [b]
+        assert all(pool.choose() is b for _ in range(5))
+
+        pool.checkAll()
+        assert a.healthy
+
+        up["http://a"] = up["http://b"] = False
+        pool.checkAll()
+        assert pool.healthy() == []
+        assert pool.choose() in (a, b)  # nothing healthy: still try somebody
+
+    @patch('requests.get')
+    def test_client_fails_over_from_dead_replica(self, mock_get):
+        """Test a refused connection is retried on another replica, so callers never see it"""
+        def side_effect(url, **kwargs):
+            if url.startswith("http://dead"):
+                raise requests.exceptions.ConnectionError("refused")
+            return Mock(status_code=200, content=json_codec.dumps({"trades": []}))
+        mock_get.side_effect = side_effect
+
+        client = APIClient(base_urls=["http://dead:8080", "http://live:8080"])
+        client.access_token = "test-token"
+        client.replicas.rng = random.Random(0)
+        for _ in range(20):
+            assert client.getCompletedTrades(limit=1) == []
+
+        dead, live = client.replicas.replicas
+        assert not dead.healthy
+        assert dead.requests <= FAILURE_LIMIT
+        assert live.requests == 20
+        assert (dead.inflight, live.inflight) == (0, 0)
+        assert mock_get.call_args[0][0] == "http://live:8080/trades/history"
+
+    @patch('requests.get')
+    def test_breakers_are_per_replica(self, mock_get):
+        """Test an endpoint's open breaker on one replica leaves the other replicas serving it"""
+        card_id = "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+        mock_get.return_value = Mock(status_code=200, content=json_codec.dumps({"id": card_id}))
+
+        client = APIClient(base_urls=["http://bad:8080", "http://good:8080"])
+        client.access_token = "test-token"
+        bad_breaker = client.breakers.get("http://bad:8080/cards/{id}")
+        for _ in range(bad_breaker.threshold):
+            bad_breaker.recordFailure()
+
+        for _ in range(10):
+            assert client.getCard(card_id) == {"id": card_id}
+        assert all(call[0][0].startswith("http://good:8080") for call in mock_get.call_args_list)
+        assert client.breakers.get("http://good:8080/cards/{id}").state == CircuitBreaker.CLOSED
+        assert client.replicas.replicas[0].inflight == 0
+
+    @patch('requests.get')
+    def test_every_replica_down_raises_last_error(self, mock_get):
+        """Test the caller sees the connection error once every replica has been tried"""
+        mock_get.side_effect = requests.exceptions.ConnectionError("refused")
+        client = APIClient(base_urls=["http://a:1", "http://b:2"])
+        client.access_token = "test-token"
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.getCompletedTrades()
+        assert mock_get.call_count == 2
+
+    def test_writes_fail_over_only_before_connecting(self):
+        """Test a POST moves on only when no connection was made"""
+        refused = requests.exceptions.ConnectionError(MaxRetryError(None, "/packs", NewConnectionError(None, "refused")))
+        read_timeout = requests.exceptions.ReadTimeout("slow")
+
+        assert canFailOver(read_timeout, "GET")
+        assert not canFailOver(read_timeout, "POST")
+        assert canFailOver(refused, "POST")
+        assert canFailOver(requests.exceptions.ConnectTimeout("syn"), "POST")
+        assert not canFailOver(requests.exceptions.HTTPError("500"), "GET")
+
+
+# ============================================================================
+# CASSETTE TESTS
+# ============================================================================
+
+class TestCassette:
+    """Record/replay of API sessions"""
+
+    @staticmethod
+    def fakeServer(url, **kwargs):
+        response = Mock(status_code=200, headers={"ETag": '"v1"', "X-Ignored": "1"})
+        if url.endswith("/auth/login"):
+            response.content = json_codec.dumps({"accessToken": "tok", "user": {"id": "u1"}})
+        elif url.endswith("/trades"):
+            response.content = json_codec.dumps({"trades": [{"id": "t1", "cardId": "c1", "price": 10}]})
+        else:
+            response.status_code = 404
+            response.content = b'{"error": "missing"}'
+        return response
+
+    def record(self, path):
+        """Record a short session (login, a trade list twice, a missing card) against a fake server"""
+        recorder = CassetteRecorder(path)
+        client = APIClient(cassette=recorder)
+        with patch('requests.post', side_effect=self.fakeServer), patch('requests.get', side_effect=self.fakeServer):
+            assert client.login("player", "hunter2")
+            client.getOpenTrades(limit=5)
+            client.getOpenTrades(limit=5)
+            assert client.getCard("c404") is None
+        recorder.close()
+        return recorder
+
+    def test_replay_serves_recorded_session_offline(self, tmp_path):
+        """Test a replayed client gets the same answers without touching the network"""
+        path = str(tmp_path / "session.cassette")
+        assert self.record(path).records == 4
+        assert b"hunter2" not in open(path, "rb").read()
+
+        player = CassettePlayer(path, speed=0)
+        client = APIClient(cassette=player)
+        with patch('requests.get', side_effect=AssertionError("network used")), \
+                patch('requests.post', side_effect=AssertionError("network used")):
+            assert client.login("anyone", "else")
+            assert client.user_id == "u1"
+            assert client.getOpenTrades(limit=5)[0]["id"] == "t1"
+            assert client.getCard("c404") is None
+            with pytest.raises(CassetteMiss):
+                client.getOpenTrades(limit=99)
+        assert (len(player), player.served, player.misses) == (4, 3, 1)
+        player.close()
+
+    def test_replay_misses_are_not_overload(self, tmp_path):
+        """Test requests missing from the cassette neither trip the breaker nor back off the limiter"""
+        path = str(tmp_path / "session.cassette")
+        self.record(path)
+        player = CassettePlayer(path, speed=0)
+        client = APIClient(cassette=player)
+        client.access_token = "tok"
+        limit = client.limiter.concurrency.limit
+
+        for _ in range(10):
+            with pytest.raises(CassetteMiss):
+                client.getOpenTrades(limit=99)
+        assert client.breakers.get("/trades").state == CircuitBreaker.CLOSED
+        assert client.limiter.concurrency.limit >= limit
+        player.close()
+
+    @patch('os.system')
+    def test_replay_starts_no_background_fetching(self, mock_system, tmp_path):
+        """Test a replaying CLI neither prefetches nor refreshes the dashboard on its own"""
+        path = str(tmp_path / "session.cassette")
+        self.record(path)
+        player = CassettePlayer(path, speed=0)
+        cli = CLIClient(api_client=APIClient(cassette=player))
+
+        cli.startPrefetcher()
+        assert cli.prefetcher is None
+        with patch('cli_dashboard.Dashboard.available', return_value=True), \
+                patch('cli_dashboard.Dashboard.run', autospec=True) as run:
+            cli.handleDashboard()
+        assert run.call_args[0][0].refresh is None
+        player.close()
+
+    def test_replay_timing_is_scaled(self, tmp_path):
+        """Test recorded latency is replayed divided by the speed-up"""
+        path = str(tmp_path / "session.cassette")
+        self.record(path)
+        sleeps = []
+        player = CassettePlayer(path, speed=10, sleep=sleeps.append)
+        response = player.send("GET", "http://replica:9000/trades", params={"sortBy": "date_desc", "offset": 0, "limit": 5})
+
+        assert response.json()["trades"][0]["price"] == 10
+        assert response.headers["etag"] == '"v1"' and "X-Ignored" not in response.headers
+        assert len(sleeps) == 1 and sleeps[0] >= 0
+        player.close()
+
+    def test_torn_final_record_is_ignored(self, tmp_path):
+        """Test a cassette cut short mid-record still replays its complete records"""
+        path = str(tmp_path / "session.cassette")
+        self.record(path)
+        with open(path, "ab") as f:
+            f.write(RECORD_HEADER.pack(10, 10, 10_000, 200, 0.1, 0.0) + b"partial")
+
+        player = CassettePlayer(path, speed=0)
+        assert len(player) == 4
+        player.close()
+
+        (tmp_path / "bad").write_bytes(b"not a cassette")
+        with pytest.raises(ValueError):
+            CassettePlayer(str(tmp_path / "bad"))
+
+
+# ============================================================================
+# CATALOG EXPORT TESTS
+# ============================================================================
+
+class FakeCatalog:
+    """/cards served from a list, ordered by ID descending like the server"""
+
+    def __init__(self, count, fail_first=0):
+        grades = dump_cards.GRADES
+        self.cards = sorted(({"id": f"{i * 7919 % 10007:05d}", "grade": grades[i % 3], "collectionId": f"col-{i % 2}"}
+                             for i in range(count)), key=lambda card: card["id"], reverse=True)
+        self.fail_first = fail_first
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def matching(self, filters):
+        return [card for card in self.cards if all(card[k] == v for k, v in filters.items())]
+
+    def countCards(self, **filters):
+        return len(self.matching(filters))
+
+    def getCollections(self):
+        return [{"id": "col-0"}, {"id": "col-1"}]
+
+    def streamCards(self, limit=50, offset=0, **filters):
+        with self.lock:
+            self.requests += 1
+            if self.fail_first:
+                self.fail_first -= 1
+                raise requests.exceptions.ConnectionError("reset")
+        return iter(self.matching(filters)[offset:offset + limit])
+
+
+class TestDumpCards:
+    """Sharded parallel export of /cards"""
+
+    @staticmethod
+    def readOutput(path):
+        with gzip.open(path, "rb") as f:
+            return [json_codec.loads(line) for line in f]
+
+    def test_plans_offset_and_filter_shards(self):
+        """Test shards cover every card, split per filter value when asked"""
+        catalog = FakeCatalog(25)
+        shards = dump_cards.planShards(catalog, shard_size=10)
+        assert [(s.offset, s.limit) for s in shards] == [(0, 10), (10, 10), (20, 5)]
+
+        by_grade = dump_cards.planShards(catalog, by="grade", shard_size=10)
+        assert sum(s.limit for s in by_grade) == 25
+        assert {s.filters["grade"] for s in by_grade} == set(dump_cards.GRADES)
+        with pytest.raises(ValueError):
+            dump_cards.planShards(catalog, by="owner")
+
+    @pytest.mark.parametrize("by", [None, "collection"])
+    def test_export_is_merged_sorted_and_complete(self, tmp_path, by):
+        """Test the merged output holds every card once, sorted by ID, and shards are cleaned up"""
+        catalog = FakeCatalog(230)
+        output = str(tmp_path / "cards.jsonl.gz")
+
+        stats = dump_cards.dumpCards(catalog, output, workers=4, shard_size=50, by=by, page_size=20)
+
+        cards = self.readOutput(output)
+        assert [card["id"] for card in cards] == sorted(card["id"] for card in catalog.cards)
+        assert stats.fetched == stats.written == stats.expected == 230
+        assert stats.failed == [] and stats.duplicates == 0
+        assert not os.path.exists(output + ".shards")
+
+    def test_overlapping_shards_are_deduplicated(self, tmp_path):
+        """Test a card fetched by two shards is written once"""
+        catalog = FakeCatalog(30)
+        directory = tmp_path / "shards"
+        directory.mkdir()
+        first = dump_cards.Shard(0, {}, 0, 20)
+        second = dump_cards.Shard(1, {}, 15, 15)
+        for shard in (first, second):
+            dump_cards.fetchShard(catalog, shard, str(directory))
+
+        output = str(tmp_path / "out.jsonl.gz")
+        written, duplicates = dump_cards.mergeShards([str(directory / first.name), str(directory / second.name)], output)
+        assert (written, duplicates) == (30, 5)
+
+    def test_failed_shard_retried_then_resumed(self, tmp_path):
+        """Test transient failures are retried, and a rerun only fetches missing shards"""
+        output = str(tmp_path / "cards.jsonl.gz")
+        flaky = FakeCatalog(40, fail_first=dump_cards.SHARD_RETRIES)
+        stats = dump_cards.dumpCards(flaky, output, workers=1, shard_size=20, page_size=20)
+        assert stats.failed == [] and stats.written == 40
+
+        broken = FakeCatalog(40, fail_first=dump_cards.SHARD_RETRIES + 1)
+        stats = dump_cards.dumpCards(broken, output + "2", workers=1, shard_size=20, page_size=20)
+        assert len(stats.failed) == 1
+        assert not os.path.exists(output + "2")
+
+        before = broken.requests
+        stats = dump_cards.dumpCards(broken, output + "2", workers=1, shard_size=20, page_size=20)
+        assert stats.reused == 1 and stats.failed == []
+        assert broken.requests - before == 1
+        assert len(self.readOutput(output + "2")) == 40
+
+    def test_shards_of_a_different_plan_are_not_reused(self, tmp_path):
+        """Test a rerun whose catalog count or sharding changed discards the old shards"""
+        output = str(tmp_path / "cards.jsonl.gz")
+        broken = FakeCatalog(40, fail_first=dump_cards.SHARD_RETRIES + 1)
+        assert len(dump_cards.dumpCards(broken, output, workers=1, shard_size=20, page_size=20).failed) == 1
+
+        grown = FakeCatalog(41)
+        stats = dump_cards.dumpCards(grown, output, workers=1, shard_size=20, page_size=20)
+        assert stats.reused == 0 and stats.written == 41
+
+        directory = output + ".shards"
+        assert dump_cards.preparePlan(directory, {"count": 41}) is False
+        assert dump_cards.preparePlan(directory, {"count": 41}) is True
+        assert dump_cards.preparePlan(directory, {"count": 42}) is False
+        assert os.listdir(directory) == [dump_cards.MANIFEST]
+
+    def test_workers_fetch_shards_concurrently(self, tmp_path):
+        """Test N workers have N shard fetches in flight at once"""
+        workers = 4
+        catalog = FakeCatalog(80)
+        arrived = threading.Barrier(workers, timeout=5)
+        stream = catalog.streamCards
+
+        def streamCards(**kwargs):
+            arrived.wait()  # one page per shard; times out (failing the shard) unless all four are in flight together
+            return stream(**kwargs)
+
+        catalog.streamCards = streamCards
+        stats = dump_cards.dumpCards(catalog, str(tmp_path / "cards.jsonl.gz"), workers=workers,
+                                     shard_size=20, page_size=20)
+        assert stats.failed == [] and stats.written == 80
+        assert not arrived.broken
+
+    def test_export_client_is_unthrottled_and_options_positive(self, monkeypatch):
+        """Test the export uses an unthrottled client and rejects zero-sized options"""
+        monkeypatch.setenv("CARDEX_USERNAME", "u")
+        monkeypatch.setenv("CARDEX_PASSWORD", "p")
+        monkeypatch.setattr("sys.argv", ["dump_cards.py", "--workers", "16"])
+        with patch('dump_cards.APIClient') as client_class, \
+                patch('dump_cards.dumpCards', return_value=dump_cards.DumpStats()) as dump, \
+                patch('dump_cards.printReport'):
+            dump_cards.main()
+        client_class.assert_called_once_with(throttle=False)
+        assert dump.call_args[0][2] == 16
+
+        for option in ("--workers", "--shard-size", "--page-size"):
+            monkeypatch.setattr("sys.argv", ["dump_cards.py", option, "0"])
+            with pytest.raises(SystemExit):
+                dump_cards.main()
+
+    def test_shard_names_follow_filters_and_range(self):
+        """Test a shard's file name identifies the cards in it"""
+        assert dump_cards.Shard(3, {"grade": "NISMO"}, 20, 10).name == "shard-grade=NISMO-000000020+10.jsonl.gz"
+        assert dump_cards.Shard(0, {}, 0, 5).name == "shard-all-000000000+5.jsonl.gz"
+
+
+# ============================================================================
+# LOAD TOOL TESTS
+# ============================================================================
+
+class TestLoadPlayers:
+    """Simulated-player load tool"""
+
+    @staticmethod
+    def makePlayer(mix=None):
+        client = Mock()
+        client.user_id = "me"
+        client.getCollections.return_value = [{"id": "col-1"}]
+        client.getUserCards.return_value = []
+        player = SimulatedPlayer(client, random.Random(1), mix or DEFAULT_MIX)
+        player.setup()
+        return player, client
+
+    def test_players_bypass_client_throttling(self):
+        """Test each player's client sends straight to the server"""
+        with patch('load_players.APIClient') as client_class:
+            client_class.return_value.register.return_value = False
+            stats = runPlayer(0, "run", rate=1, duration=0, mix=DEFAULT_MIX)
+        client_class.assert_called_once_with(throttle=False)
+        assert stats["setup"].errors["register"] == 1
+
+    @pytest.mark.parametrize("option", ["--players", "--rate", "--duration"])
+    def test_non_positive_options_are_rejected(self, option, monkeypatch, capsys):
+        """Test zero or negative players, rate or duration stop at argument parsing"""
+        for value in ("0", "-1"):
+            monkeypatch.setattr("sys.argv", ["load_players.py", option, value])
+            with patch('load_players.runLoad') as run, pytest.raises(SystemExit):
+                load_players.main()
+            run.assert_not_called()
+            assert "must be a positive" in capsys.readouterr().err
+
+    def test_parse_mix(self):
+        """Test flow weights parse and unknown flows are rejected"""
+        assert parseMix("browse=3, buy_pack=1") == {"browse": 3, "buy_pack": 1}
+        with pytest.raises(ValueError):
+            parseMix("teleport=1")
+
+    def test_pick_follows_weights(self):
+        """Test only flows with weight are chosen"""
+        player, _ = self.makePlayer({"browse": 0, "buy_pack": 1})
+        assert {player.pick() for _ in range(20)} == {"buy_pack"}
+
+    def test_pack_to_listing_chain(self):
+        """Test bought packs are opened and pulled cards are listed"""
+        player, client = self.makePlayer()
+        client.purchasePack.return_value = {"pack": {"id": "p1"}}
+        client.openPack.return_value = {"cards": [{"id": "c1", "value": 1000}]}
+        stats = {}
+
+        for flow in ("open_pack", "buy_pack", "open_pack", "list_card"):
+            player.run(flow, stats, time.monotonic())
+
+        assert stats["open_pack"].skipped == 1
+        assert len(stats["open_pack"].latencies) == 1
+        client.openPack.assert_called_once_with("p1")
+        card_id = client.createTrade.call_args[0][0]
+        assert card_id == "c1"
+        assert 800 <= client.createTrade.call_args[1]["price"] <= 1200
+
+    def test_execute_trade_skips_own_listings(self):
+        """Test players only buy other players' listings"""
+        player, client = self.makePlayer()
+        client.getOpenTrades.return_value = [{"id": "mine", "userId": "me"}, {"id": "theirs", "userId": "other"}]
+        player.run("execute_trade", {}, time.monotonic())
+        client.executeTrade.assert_called_once_with("theirs")
+
+    def test_errors_are_counted_by_kind(self):
+        """Test HTTP errors are grouped by status code"""
+        player, client = self.makePlayer()
+        client.executeTrade.side_effect = requests.exceptions.HTTPError(response=Mock(status_code=409))
+        client.getOpenTrades.return_value = [{"id": "t1", "userId": "other"}]
+        stats = {}
+        player.run("execute_trade", stats, time.monotonic())
+        assert stats["execute_trade"].errors == {"HTTP 409": 1}
+
+    def test_merge_stats_across_processes(self):
+        """Test per-process results combine per flow"""
+        first, second = FlowStats(), FlowStats()
+        first.latencies = [0.1]
+        second.latencies = [0.2, 0.3]
+        second.errors["Timeout"] += 1
+        merged = mergeStats([{"browse": first}, {"browse": second, "setup": FlowStats()}])
+
+        assert sorted(merged["browse"].latencies) == [0.1, 0.2, 0.3]
+        assert merged["browse"].errors == {"Timeout": 1}
+        assert set(merged) == {"browse", "setup"}
+        assert percentile(sorted(merged["browse"].latencies), 50) == 0.2
+
+
+# ============================================================================
+# PROFILER TESTS
+# ============================================================================
+
+class TestProfiler:
+    """cProfile / tracemalloc / stack sampling reports"""
+
+    def test_sampler_collects_collapsed_stacks_from_other_threads(self):
+        """Test worker thread stacks appear in the collapsed output"""
+        release = threading.Event()
+        worker = threading.Thread(target=lambda: release.wait(timeout=2), name="worker")
+        worker.start()
+        sampler = StackSampler()
+        sampler.sample()
+        release.set()
+        worker.join()
+
+        assert sampler.samples == 1
+        lines = sampler.collapsed().splitlines()
+        assert any(line.startswith("worker;") and line.endswith(" 1") for line in lines)
+        assert not any(line.startswith("cardex-sampler") for line in lines)
+
+    def test_profile_call_returns_value_and_writes_reports(self, tmp_path):
+        """Test hotspot, memory and collapsed-stack files are written"""
+        def work():
+            blocks = [bytearray(1024) for _ in range(200)]
+            time.sleep(0.03)
+            return len(blocks)
+
+        result = profileCall(work, str(tmp_path), label="open --grade NISMO")
+
+        assert result.value == 200
+        assert result.wall_time >= 0.03
+        assert result.peak_bytes >= 200 * 1024
+        assert set(result.paths) == {"hotspots", "memory", "collapsed"}
+        assert all(os.path.basename(path).startswith("open___grade_NISMO-") for path in result.paths.values())
+
+        hotspots = open(result.paths["hotspots"]).read()
+        assert "By cumulative time" in hotspots and "work" in hotspots
+        assert "Peak traced memory" in open(result.paths["memory"]).read()
+
+    def test_profile_call_without_sampler(self, tmp_path):
+        """Test the collapsed-stack file is optional"""
+        result = profileCall(lambda: None, str(tmp_path), collapsed=False)
+        assert "collapsed" not in result.paths
+        assert not tracemalloc.is_tracing()
+
+
 # ============================================================================
 # CLI CLIENT TESTS
 # ============================================================================
@@ -1175,7 +3802,324 @@ class TestCLIClient:
             cli = CLIClient()
             result = cli.processCommand("   ")
             assert result is True
+
+        @patch('os.system')
+        def test_profile_prefix_runs_command_and_writes_reports(self, mock_system, tmp_path, capsys):
+            """Test 'profile trades' runs trades and reports where time and memory went"""
+            mock_client = Mock()
+            mock_client.getCompletedTradesWithDetails.return_value = []
+            mock_client.missing_cards = NegativeCache()
+            cli = CLIClient(api_client=mock_client)
+
+            with patch('cli_client.PROFILE_DIR', str(tmp_path)):
+                assert cli.processCommand("profile trades") is True
+
+            mock_client.getCompletedTradesWithDetails.assert_called_once()
+            captured = capsys.readouterr()
+            assert "Profiled 'trades'" in captured.out
+            assert "known to be missing" in captured.out
+            suffixes = sorted(path.suffix for path in tmp_path.iterdir())
+            assert suffixes == [".collapsed", ".txt", ".txt"]
+
+        @patch('os.system')
+        def test_profile_bypasses_prefetched_data(self, mock_system, tmp_path):
+            """Test profiling measures a real fetch rather than a prefetch hit"""
+            mock_client = Mock()
+            mock_client.getCompletedTradesWithDetails.return_value = []
+            mock_client.missing_cards = NegativeCache()
+            cli = CLIClient(api_client=mock_client)
+            cli.prefetcher = Mock()
+
+            with patch('cli_client.PROFILE_DIR', str(tmp_path)):
+                cli.processCommand("profile trades")
+
+            cli.prefetcher.take.assert_not_called()
+            cli.prefetcher.recordCommand.assert_called_once_with("trades")
+
+        @patch('os.system')
+        def test_profile_flag_profiles_every_command(self, mock_system, tmp_path):
+            """Test --profile mode wraps commands but still exits normally"""
+            cli = CLIClient(profile=True)
+
+            with patch('cli_client.PROFILE_DIR', str(tmp_path)), patch('cli_client.profileCall') as mock_profile:
+                mock_profile.return_value = Mock(value=True, wall_time=0.1, peak_bytes=0, paths={})
+                assert cli.processCommand("help") is True
+                assert cli.processCommand("exit") is False
+
+            mock_profile.assert_called_once()
+            assert mock_profile.call_args[1]["label"] == "help"
+
+        @patch('os.system')
+        def test_commands_are_traced(self, mock_system):
+            """Test each command opens a root span for its API calls"""
+            mock_client = Mock()
+            mock_client.getCompletedTradesWithDetails.return_value = []
+            exporter = InMemoryExporter()
+            cli = CLIClient(api_client=mock_client, tracer=Tracer(exporter))
+
+            cli.processCommand("trades")
+            cli.processCommand("")
+
+            assert [span.name for span in exporter.spans] == ["command trades"]
+            assert exporter.spans[0].parent_id is None
+
+        @patch('os.system')
+        def test_profile_without_command_shows_usage(self, mock_system, capsys):
+            """Test bare 'profile' explains itself"""
+            cli = CLIClient()
+            assert cli.processCommand("profile") is True
+            assert "Usage: profile" in capsys.readouterr().out
     
+    class TestCommandArguments:
+        """Commands that take filter and sort arguments"""
+
+        @patch('os.system')
+        def test_packev_uses_listings_per_grade(self, mock_system, capsys):
+            """Test packev resolves the collection and prices each grade from its listings"""
+            pytest.importorskip("numpy")
+            mock_client = Mock()
+            mock_client.getCollections.return_value = [
+                {"id": "c1", "name": "JDM Legends", "price": 5000},
+                {"id": "c2", "name": "Euro Classics", "price": 8000}
+            ]
+            mock_client.getOpenTrades.side_effect = lambda **kw: (
+                [{"price": 4000}, {"price": 6000}] if kw["grade"] == "NISMO" else []
+            )
+            cli = CLIClient(api_client=mock_client)
+
+            assert cli.processCommand("packev jdm --packs 2000 --seed 7") is True
+
+            out = capsys.readouterr().out
+            assert "PACK EV - JDM Legends" in out
+            assert "2 open listings" in out
+            assert "nominal (no listings)" in out
+            calls = mock_client.getOpenTrades.call_args_list
+            assert {c[1]["grade"] for c in calls} == {"FACTORY", "LIMITED_RUN", "NISMO"}
+            assert all(c[1]["collectionId"] == "c1" and c[1]["type"] == "FOR_PRICE" for c in calls)
+
+        @patch('os.system')
+        def test_packev_rejects_bad_odds_and_unknown_collections(self, mock_system, capsys):
+            """Test argument and lookup errors are explained"""
+            mock_client = Mock()
+            mock_client.getCollections.return_value = [{"id": "c1", "name": "JDM Legends", "price": 5000}]
+            cli = CLIClient(api_client=mock_client)
+
+            cli.processCommand("packev jdm --odds RUSTY=1")
+            assert "Unknown grade 'RUSTY'" in capsys.readouterr().out
+
+            for packs in ("0", "-5"):
+                cli.processCommand(f"packev jdm --packs {packs}")
+                assert "must be a positive integer" in capsys.readouterr().out
+            cli.processCommand("open --limit 0")
+            assert "must be a positive integer" in capsys.readouterr().out
+
+            with patch('pack_ev.np', None):
+                cli.processCommand("packev jdm")
+            assert "pip install numpy" in capsys.readouterr().out
+
+            if pack_ev.available():
+                cli.processCommand("packev euro")
+                assert "No collection matching 'euro'" in capsys.readouterr().out
+            mock_client.getOpenTrades.assert_not_called()
+
+        @patch('os.system')
+        def test_complete_estimates_every_collection(self, mock_system, capsys):
+            """Test progress is joined to collections and one collection adds the buy path"""
+            mock_client = Mock()
+            mock_client.getCollections.return_value = [
+                {"id": "c1", "name": "JDM Legends", "price": 5000, "cardCount": 4},
+                {"id": "c2", "name": "Euro Classics", "price": 8000, "cardCount": 3}
+            ]
+            mock_client.getCollectionProgress.return_value = [{"collectionId": "c2", "ownedVehicles": 3}]
+            cli = CLIClient(api_client=mock_client)
+
+            with patch('completion.np', None):
+                assert cli.processCommand("complete") is True
+            out = capsys.readouterr().out
+            assert "0/4" in out and "complete!" in out
+            assert "©" + format(round(completion.expectedPacks(4, 4) * 5000), ",") in out
+            mock_client.getOpenTrades.assert_not_called()
+
+            mock_client.getOpenTrades.return_value = [{"cardId": "k1", "price": 700}, {"cardId": "k2", "price": 300}]
+            mock_client.getCardsById.return_value = {"k1": {"vehicleId": "v1"}, "k2": {"vehicleId": "v2"}}
+            mock_client.getUserCards.return_value = [{"vehicleId": "v2"}]
+            with patch('completion.np', None):
+                cli.processCommand("complete jdm")
+            out = capsys.readouterr().out
+            assert "©700 for 1 vehicles" in out
+            assert "3 missing vehicles have no open listing" in out
+            assert mock_client.getOpenTrades.call_args[1]["collectionId"] == "c1"
+
+        @patch('os.system')
+        def test_candles_resolves_vehicle_and_refreshes(self, mock_system, tmp_path, capsys):
+            """Test candles finds the vehicle by name and folds in new trades first"""
+            mock_client = Mock()
+            mock_client.getCompletedTrades.return_value = [
+                {"id": "t1", "type": "FOR_PRICE", "sellerCardId": "s1", "price": 4200,
+                 "executedDate": "2026-01-01T10:05:00Z"}
+            ]
+            mock_client.getCardsById.return_value = {"s1": {"vehicleId": "v1", "grade": "NISMO"}}
+            mock_client.card_cache = {}
+            cli = CLIClient(api_client=mock_client)
+            cli.search_index = buildSearchIndex([{"id": "v1", "year": 1999, "make": "Nissan", "model": "Skyline"}])
+            cli.trade_history = TradeHistory(str(tmp_path / "history"))
+
+            with patch('cli_client.CANDLE_DIR', str(tmp_path / "candles")):
+                assert cli.processCommand("candles skylin --grade nismo --interval 1d") is True
+
+            out = capsys.readouterr().out
+            assert "1999 Nissan Skyline - NISMO - 1d" in out
+            assert "4,200" in out
+            assert "1 new trades" in out
+
+            cli.processCommand("candles zzzz")
+            assert "No vehicle matching 'zzzz'" in capsys.readouterr().out
+
+        @patch('os.system')
+        def test_audit_runs_and_reports(self, mock_system, tmp_path, capsys):
+            """Test audit passes its options through and prints the report"""
+            cli = CLIClient(api_client=Mock())
+            cli.trade_history = Mock()
+            report = {"trades": 0, "users": 0, "owned": 0, "partitions": 16, "cards": 0, "findings": [],
+                      "timings": {"trades": 0.0, "ownership": 0.0, "check": 0.0}, "counts": {}}
+
+            with patch('audit.runAudit', return_value=report) as run:
+                assert cli.processCommand("audit --partitions 16 --workers 2") is True
+            assert run.call_args[1] == {"partitions": 16, "fetch_workers": 2}
+            assert "no problems found" in capsys.readouterr().out
+
+            with patch('audit.runAudit', side_effect=requests.exceptions.ConnectionError("down")):
+                cli.processCommand("audit")
+            assert "Error auditing trades: down" in capsys.readouterr().out
+
+        @patch('os.system')
+        def test_catalog_lookup_and_status(self, mock_system, tmp_path, capsys):
+            """Test catalog looks cards up locally and reports its status"""
+            source = CatalogSource(5)
+            path = str(tmp_path / "cards.cat")
+            catalog.buildCatalog(source, path)
+            mock_client = Mock()
+            mock_client.catalog = catalog.CardCatalog(path)
+            mock_client.missing_cards = NegativeCache()
+            mock_client.missing_cards.add("gone")
+            cli = CLIClient(api_client=mock_client)
+
+            card, _ = next(iter(source.cards.values()))
+            cli.processCommand(f"catalog {card['id']}")
+            out = capsys.readouterr().out
+            assert card["name"] in out and "Found locally in" in out
+
+            cli.processCommand(f"catalog {uuid.uuid4()}")
+            assert "is not in the local catalog" in capsys.readouterr().out
+
+            cli.processCommand("catalog")
+            out = capsys.readouterr().out
+            assert "5 cards, built just now" in out and path in out
+            assert "1 cards known to be missing; 0 of 0 lookups" in out
+
+            mock_client.catalog = None
+            cli.processCommand("catalog")
+            assert "not enabled" in capsys.readouterr().out
+
+        @patch('os.system')
+        def test_sync_reports_new_trades(self, mock_system, tmp_path, capsys):
+            """Test sync stores new history and says how much was fetched"""
+            history = [completedTrade("t1", "2026-01-01T10:00:00Z", 100)]
+            cli = CLIClient(api_client=historyClient(history))
+            cli.trade_history = TradeHistory(str(tmp_path))
+
+            assert cli.processCommand("sync") is True
+            assert "Synced 1 new trades (1 pages fetched); 1 trades stored locally." in capsys.readouterr().out
+            cli.processCommand("sync")
+            assert "Synced 0 new trades" in capsys.readouterr().out
+
+        @patch('os.system')
+        def test_garage_streams_filtered_inventory(self, mock_system, capsys):
+            """Test garage forwards filters and needs a user"""
+            mock_client = Mock()
+            mock_client.user_id = None
+            cli = CLIClient(api_client=mock_client)
+            cli.processCommand("garage")
+            assert "Log in to see your garage" in capsys.readouterr().out
+
+            mock_client.user_id = "user-1"
+            mock_client.streamUserCardsWithVehicles.return_value = iter([
+                {"grade": "LIMITED_RUN", "value": 1500, "year": "1999", "make": "Nissan", "model": "Skyline GT-R"}
+            ])
+            assert cli.processCommand("garage --grade limited_run --collection c1") is True
+
+            out = capsys.readouterr().out
+            assert "1999 Nissan Skyline GT-R" in out
+            assert "1 cards, worth ©1,500" in out
+            assert mock_client.streamUserCardsWithVehicles.call_args[1] == {
+                "user_id": None, "collection_id": "c1", "grade": "LIMITED_RUN"
+            }
+
+        @patch('os.system')
+        def test_open_passes_filters_to_server(self, mock_system):
+            """Test open options are normalized and forwarded"""
+            mock_client = Mock()
+            mock_client.getOpenTradesWithDetails.return_value = []
+            cli = CLIClient(api_client=mock_client)
+
+            assert cli.processCommand("open --grade nismo --max-price 5000 --sort PRICE_ASC") is True
+
+            kwargs = mock_client.getOpenTradesWithDetails.call_args[1]
+            assert kwargs['grade'] == "NISMO"
+            assert kwargs['maxPrice'] == 5000
+            assert kwargs['sortBy'] == "price_asc"
+            assert kwargs['limit'] == 5
+            assert kwargs['vehicleId'] is None
+
+        @patch('os.system')
+        def test_open_reports_invalid_arguments(self, mock_system, capsys):
+            """Test bad options print an error without calling the API"""
+            mock_client = Mock()
+            cli = CLIClient(api_client=mock_client)
+
+            assert cli.processCommand("open --max-price cheap") is True
+
+            captured = capsys.readouterr()
+            assert "open:" in captured.out
+            mock_client.getOpenTradesWithDetails.assert_not_called()
+
+        @patch('os.system')
+        def test_open_help_does_not_exit(self, mock_system, capsys):
+            """Test --help prints usage and keeps the CLI running"""
+            cli = CLIClient(api_client=Mock())
+            assert cli.processCommand("open --help") is True
+            captured = capsys.readouterr()
+            assert "--max-price" in captured.out
+
+        @patch('os.system')
+        def test_cards_command_fetches_and_displays(self, mock_system, capsys):
+            """Test cards command forwards filters and renders results"""
+            mock_client = Mock()
+            mock_client.getCards.return_value = [{"id": "c1", "name": "2002 Acura NSX", "grade": "LIMITED_RUN", "value": 700}]
+            cli = CLIClient(api_client=mock_client)
+
+            cli.processCommand("cards --grade limited_run --sort value_desc --limit 3")
+
+            kwargs = mock_client.getCards.call_args[1]
+            assert kwargs['grade'] == "LIMITED_RUN"
+            assert kwargs['sortBy'] == "value_desc"
+            assert kwargs['limit'] == 3
+            assert "2002 Acura NSX" in capsys.readouterr().out
+
+            # Cards have no creation time, so there is no date order to ask for
+            mock_client.getCards.reset_mock()
+            cli.processCommand("cards --sort date_asc")
+            mock_client.getCards.assert_not_called()
+
+        @patch('os.system')
+        def test_cards_command_with_error(self, mock_system, capsys):
+            """Test cards command error handling"""
+            mock_client = Mock()
+            mock_client.getCards.side_effect = Exception("API Error")
+            cli = CLIClient(api_client=mock_client)
+            cli.handleCards()
+            assert "Error fetching cards" in capsys.readouterr().out
+
     class TestApplicationFlow:
         """Main application flow tests"""
         
@@ -0,0 +1,160 @@
+"""
+Request tracing for CarDex CLI
+Spans for commands, API calls and HTTP attempts, propagated to the server via W3C traceparent
+"""
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import json_codec
+
+# W3C trace context version and "sampled" flag
+TRACEPARENT_VERSION = "00"
+TRACE_FLAGS = "01"
+
+# Span currently active in this thread / task
+_current_span: contextvars.ContextVar = contextvars.ContextVar("cardex_span", default=None)
+
+
+def newTraceId() -> str:
+    return os.urandom(16).hex()
+
+
+def newSpanId() -> str:
+    return os.urandom(8).hex()
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = newSpanId()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.thread = threading.current_thread().name
+        self._started = time.perf_counter()
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent header value identifying this span"""
+        return f"{TRACEPARENT_VERSION}-{self.trace_id}-{self.span_id}-{TRACE_FLAGS}"
+
+    def setAttribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._started
+
+    def toDict(self) -> Dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": self.status,
+            "thread": self.thread,
+            "attributes": self.attributes
+        }
+
+
+class InMemoryExporter:
+    """Keeps finished spans in a list, for tests and interactive inspection"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def byName(self, name: str) -> List[Span]:
+        with self._lock:
+            return [span for span in self.spans if span.name == name]
+
+
+class JsonLinesExporter:
+    """Appends finished spans to a file, one JSON object per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def export(self, span: Span):
+        line = json_codec.dumps(span.toDict()) + b"\n"
+        with self._lock, open(self.path, "ab") as f:
+            f.write(line)
+
+
+def currentSpan() -> Optional[Span]:
+    """The span active in the calling context, if any"""
+    return _current_span.get()
+
+
+def propagate(fn: Callable) -> Callable:
+    """
+    Bind fn to the caller's active span
+
+    Thread pool workers do not inherit context variables, so wrap callables
+    with this before submitting them; spans they open become children of the
+    submitting span.
+    """
+    parent = _current_span.get()
+
+    def run(*args, **kwargs):
+        token = _current_span.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_span.reset(token)
+
+    return run
+
+
+class Tracer:
+    """
+    Creates spans and hands finished ones to an exporter
+
+    Spans nest through a context variable, so a span opened while another
+    is active (in the same thread, or in a worker via propagate) becomes its
+    child. Without an exporter spans are still created, so traceparent
+    headers keep flowing, but nothing is recorded.
+    """
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """Open a span for the duration of the with-block"""
+        parent = _current_span.get()
+        span = Span(
+            name,
+            parent.trace_id if parent else newTraceId(),
+            parent.span_id if parent else None,
+            attributes
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.setAttribute("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            span.finish()
+            if self.exporter is not None:
+                self.exporter.export(span)
@@ -0,0 +1,201 @@
+"""
+Completed-trade history sync for CarDex CLI
+Keeps a local copy of /trades/history fresh by fetching only what is new
+"""
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import json_codec
+
+HISTORY_FILE = "trades.jsonl"
+WATERMARK_FILE = "watermark.json"
+
+# History page size used when catching up on new trades
+SYNC_PAGE = 100
+
+
+def parseTimestamp(iso_string: str) -> float:
+    """Epoch seconds of an ISO 8601 timestamp (naive timestamps are UTC, as the server sends)"""
+    if iso_string.endswith("Z"):
+        iso_string = iso_string[:-1]
+    parsed = datetime.fromisoformat(iso_string)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class TradeHistory:
+    """
+    Local, append-only copy of the completed trade history
+
+    The server lists history newest first. A watermark records the newest
+    executedDate stored and the ids of the trades at that instant, so a sync
+    pages from the top only until it reaches a trade at or behind the
+    watermark: its cost follows the trading since the last sync, not the
+    size of the history.
+
+    Trades are appended to a JSON-lines log before the watermark moves, and
+    merging skips trades at or behind the watermark, so a repeated sync
+    never duplicates a trade. The watermark also keeps the number of trades
+    stored and the log size it covers; trades found past that size on open
+    (a merge interrupted before the watermark was saved) are counted and
+    the watermark moved past them, reading only that tail of the log.
+    Readers can follow the log by byte offset.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, HISTORY_FILE)
+        self.watermark = {"timestamp": None, "ids": [], "count": 0, "size": 0}
+        self.pages_fetched = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.loadWatermark()
+
+    def loadWatermark(self):
+        try:
+            with open(os.path.join(self.directory, WATERMARK_FILE), "rb") as f:
+                self.watermark = json_codec.loads(f.read())
+        except (OSError, ValueError):
+            pass
+        # Watermarks written before counts were kept cover nothing, so the whole log is counted once
+        self.watermark.setdefault("count", 0)
+        self.watermark.setdefault("size", 0)
+        if self.size() > self.watermark["size"]:
+            trades, end = self.read(self.watermark["size"])
+            if trades:
+                self.advance(trades, end)
+
+    def saveWatermark(self):
+        path = os.path.join(self.directory, WATERMARK_FILE)
+        with open(path + ".tmp", "wb") as f:
+            f.write(json_codec.dumps(self.watermark))
+        os.replace(path + ".tmp", path)
+
+    def __len__(self):
+        return self.watermark["count"]
+
+    def isKnown(self, trade: Dict) -> bool:
+        """Whether a trade is at or behind the watermark (already stored)"""
+        if self.watermark.get("timestamp") is None or not trade.get("executedDate"):
+            return False
+        timestamp = parseTimestamp(trade["executedDate"])
+        if timestamp != self.watermark["timestamp"]:
+            return timestamp < self.watermark["timestamp"]
+        return trade.get("id") in self.watermark["ids"]
+
+    def fetchNew(self, api_client, page_size: int = SYNC_PAGE) -> List[Dict]:
+        """
+        Page through the server's history until reaching stored trades
+
+        Returns:
+            List[Dict]: Trades newer than the watermark, newest first
+        """
+        new_trades = []
+        offset = 0
+        self.pages_fetched = 0
+        while True:
+            page = api_client.getCompletedTrades(limit=page_size, offset=offset)
+            self.pages_fetched += 1
+            fresh = [trade for trade in page if not self.isKnown(trade)]
+            new_trades.extend(fresh)
+            if len(fresh) < len(page) or len(page) < page_size:
+                return new_trades
+            offset += page_size
+
+    def merge(self, trades: Iterable[Dict]) -> List[Dict]:
+        """
+        Store trades not stored yet and advance the watermark
+
+        Returns:
+            List[Dict]: The trades that were new, oldest first
+        """
+        with self._lock:
+            added = {}
+            for trade in trades:
+                trade_id = trade.get("id")
+                if trade_id and trade.get("executedDate") and not self.isKnown(trade):
+                    added.setdefault(trade_id, trade)
+            if not added:
+                return []
+
+            ordered = sorted(added.values(), key=lambda trade: parseTimestamp(trade["executedDate"]))
+            with open(self.path, "ab") as f:
+                f.write(b"".join(json_codec.dumps(trade) + b"\n" for trade in ordered))
+                end = f.tell()
+            self.advance(ordered, end)
+            return ordered
+
+    def advance(self, ordered: List[Dict], end: int):
+        """Move the watermark past trades just appended to the log (oldest first), ending at byte offset end"""
+        newest = parseTimestamp(ordered[-1]["executedDate"])
+        if self.watermark["timestamp"] is None or newest > self.watermark["timestamp"]:
+            self.watermark["timestamp"], self.watermark["ids"] = newest, []
+        if newest == self.watermark["timestamp"]:
+            self.watermark["ids"] = sorted(set(self.watermark["ids"]) | {
+                trade["id"] for trade in ordered if parseTimestamp(trade["executedDate"]) == newest
+            })
+        self.watermark["count"] += len(ordered)
+        self.watermark["size"] = end
+        self.saveWatermark()
+
+    def sync(self, api_client, page_size: int = SYNC_PAGE) -> List[Dict]:
+        """
+        Fetch and store every trade completed since the last sync
+
+        Returns:
+            List[Dict]: Newly stored trades, oldest first
+        """
+        return self.merge(self.fetchNew(api_client, page_size))
+
+    def read(self, offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+        """
+        Stored trades from a byte offset in the log onwards
+
+        Args:
+            limit: Read at most this many trades (all of them if None)
+
+        Returns:
+            (trades, end offset): pass the end offset back in to read only later trades
+        """
+        if not os.path.exists(self.path):
+            return [], 0
+        trades = []
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # ignore a torn trailing line
+                offset += len(line)
+                if line.strip():
+                    trades.append(json_codec.loads(line))
+                    if limit is not None and len(trades) >= limit:
+                        break
+        return trades, offset
+
+    def iterate(self, offset: int = 0, end: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Stream stored trades from a byte offset, one line at a time
+
+        Args:
+            end: Stop at this byte offset (e.g. the log size when a sync finished)
+
+        Returns:
+            Iterator[Dict]: Trades, oldest first
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                offset += len(line)
+                if (end is not None and offset > end) or not line.endswith(b"\n"):
+                    return  # past the end, or a torn trailing line
+                if line.strip():
+                    yield json_codec.loads(line)
+
+    def size(self) -> int:
+        """Bytes of the log written so far"""
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0